@@ -0,0 +1 @@
+# Пакет микробенчмарков (запуск: python -m benchmarks.run)
@@ -0,0 +1,36 @@
+"""
+Бенчмарки utils/messages
+"""
+from typing import Dict
+
+from telegram import KeyboardButton, ReplyKeyboardMarkup
+
+from benchmarks.common import per_call_ns
+from utils.messages import keyboard, load_catalog, resolve_locale, text
+
+
+def _build_reply() -> tuple:
+    """Прежний способ: текст и клавиатура собираются заново и сериализуются при отправке"""
+    reply_markup = ReplyKeyboardMarkup(
+        [[KeyboardButton("⚙️ Настройки"), KeyboardButton("⏰ Оставшееся время")]],
+        resize_keyboard=True, one_time_keyboard=False
+    )
+    return "\n🤖 Главное меню\n\nВыберите действие:\n    ", reply_markup.to_dict()
+
+
+def bench_messages(size: int) -> Dict[str, float]:
+    """Стоимость подготовки ответа: текст и клавиатура из каталога против сборки на каждый ответ"""
+    load_catalog()
+    catalog_reply = per_call_ns(lambda: (text("main_menu", resolve_locale("en")), keyboard("main", "en")))
+    build_reply = per_call_ns(_build_reply)
+    return {
+        "catalog_reply_ns": catalog_reply,
+        "build_reply_ns": build_reply,
+        "catalog_reply_speedup": build_reply / catalog_reply,
+        "catalog_template_ns": per_call_ns(lambda: text("notifications_on", "en", time="09:00")),
+    }
+
+
+BENCHMARKS = [
+    ("messages", bench_messages, False),
+]
@@ -0,0 +1,78 @@
+"""
+Бенчмарки handlers/router
+"""
+import re
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List
+
+from telegram import Chat, Message, MessageEntity, Update, User
+from telegram.ext import BaseHandler, CommandHandler, MessageHandler, filters
+
+from benchmarks.common import per_call_ns
+from handlers.router import UpdateRouter
+
+ROUTE_COUNTS = (10, 100, 1000)
+
+
+async def _noop(update: Update, context) -> None:
+    """Пустой обработчик маршрута"""
+
+
+def _message_update(text: str) -> Update:
+    """Собрать обновление с текстовым сообщением без обращения к сети"""
+    entities = [MessageEntity(MessageEntity.BOT_COMMAND, 0, len(text.split()[0]))] if text[0] == "/" else None
+    message = Message(1, datetime.now(), Chat(1, Chat.PRIVATE), from_user=User(1, "bench", False),
+                      text=text, entities=entities)
+    message.set_bot(SimpleNamespace(username="bench_bot"))
+    return Update(1, message=message)
+
+
+def _regex_chain(count: int) -> List[BaseHandler]:
+    """Прежняя схема: отдельный обработчик на каждую команду и кнопку с filters.Regex"""
+    handlers: List[BaseHandler] = [CommandHandler(f"command{index}", _noop) for index in range(count)]
+    handlers.extend(
+        MessageHandler(filters.Regex(f"^{re.escape(f'Кнопка {index}')}$"), _noop) for index in range(count)
+    )
+    return handlers
+
+
+def _dispatch_chain(handlers: List[BaseHandler], update: Update) -> None:
+    """Перебор обработчиков по порядку, как в Application.process_update"""
+    for handler in handlers:
+        check = handler.check_update(update)
+        if check is not None and check is not False:
+            return
+
+
+def bench_router(size: int) -> Dict[str, float]:
+    """Стоимость выбора обработчика для одного обновления в зависимости от числа маршрутов"""
+    results: Dict[str, float] = {}
+    for count in ROUTE_COUNTS:
+        router = UpdateRouter()
+        for index in range(count):
+            router.add_command(f"command{index}", _noop)
+            router.add_button(f"Кнопка {index}", _noop)
+        chain = _regex_chain(count)
+
+        # Худший случай для цепочки: последний маршрут и текст, которому ничего не подходит
+        button = _message_update(f"Кнопка {count - 1}")
+        command = _message_update(f"/command{count - 1}")
+        miss = _message_update("произвольный текст")
+        # Цепочка дорожает линейно, поэтому число повторов для нее уменьшается
+        chain_iterations = min(20000, 200000 // count)
+
+        router_button = per_call_ns(lambda: router.check_update(button))
+        chain_button = per_call_ns(lambda: _dispatch_chain(chain, button), chain_iterations)
+        results[f"router_button_{count}_ns"] = router_button
+        results[f"router_command_{count}_ns"] = per_call_ns(lambda: router.check_update(command))
+        results[f"router_miss_{count}_ns"] = per_call_ns(lambda: router.check_update(miss))
+        results[f"regex_chain_button_{count}_ns"] = chain_button
+        results[f"regex_chain_miss_{count}_ns"] = per_call_ns(lambda: _dispatch_chain(chain, miss), chain_iterations)
+        results[f"router_button_{count}_speedup"] = chain_button / router_button
+    return results
+
+
+BENCHMARKS = [
+    ("router", bench_router, False),
+]
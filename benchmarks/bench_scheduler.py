@@ -0,0 +1,75 @@
+"""
+Бенчмарки services/scheduler_service
+"""
+import asyncio
+import time
+from typing import Dict
+
+from benchmarks.bench_storage import populate
+from benchmarks.common import MockBot, reset_state
+from services import scheduler_service
+from services.sender import OutboundSender, set_sender
+from utils import storage
+from utils.time_utils import DEFAULT_TIMEZONE
+
+
+def bench_registration(size: int) -> Dict[str, float]:
+    """Пропускная способность регистрации уведомлений"""
+    reset_state()
+    start = time.perf_counter()
+    for user_id in range(1, size + 1):
+        scheduler_service.setup_notification_job(user_id, (user_id // 60) % 24, user_id % 60)
+    elapsed = time.perf_counter() - start
+
+    reset_state()
+    populate(size)
+    start = time.perf_counter()
+    scheduler_service.restore_notification_jobs()
+    restore_elapsed = time.perf_counter() - start
+
+    return {
+        "setup_notification_job_per_sec": size / elapsed,
+        "restore_notification_jobs_s": restore_elapsed,
+    }
+
+
+def bench_tick(size: int) -> Dict[str, float]:
+    """Время одной минуты рассылки, когда все пользователи выбрали одно время"""
+    reset_state()
+    populate(size)
+    for user_id in range(1, size + 1):
+        storage.set_user_notification(user_id, "09:00")
+    scheduler_service.restore_notification_jobs()
+
+    async def run() -> Dict[str, float]:
+        bot = MockBot()
+        # Без ограничения скорости измеряется только собственная стоимость пути рассылки
+        sender = OutboundSender(bot, workers=8, global_rate=float("inf"), per_chat_interval=0)
+        sender.bucket.capacity = sender.bucket.tokens = float("inf")
+        set_sender(sender)
+
+        # Корзины хранятся по UTC: 09:00 в поясе по умолчанию
+        minute = scheduler_service.to_utc_minute_of_day(9 * 60, DEFAULT_TIMEZONE)
+        start = time.perf_counter()
+        await scheduler_service.fire_minute(minute)
+        tick_elapsed = time.perf_counter() - start
+
+        while sender.pending():
+            await asyncio.sleep(0.01)
+        drain_elapsed = time.perf_counter() - start
+
+        await sender.stop()
+        set_sender(None)
+        return {
+            "tick_s": tick_elapsed,
+            "tick_and_drain_s": drain_elapsed,
+            "tick_per_user_ns": tick_elapsed * 1e9 / size,
+        }
+
+    return asyncio.run(run())
+
+
+BENCHMARKS = [
+    ("scheduler_registration", bench_registration, True),
+    ("scheduler_tick", bench_tick, True),
+]
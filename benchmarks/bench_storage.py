@@ -0,0 +1,38 @@
+"""
+Бенчмарки utils/storage
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict
+
+from benchmarks.common import measure_memory, per_call_ns, reset_state
+from utils import storage
+
+
+def populate(size: int) -> None:
+    """Заполнить хранилище синтетическими пользователями"""
+    base = datetime.now() + timedelta(days=1)
+    rng = random.Random(size)
+    for user_id in range(1, size + 1):
+        storage.set_user_date(user_id, base + timedelta(days=rng.randrange(365)))
+        storage.set_user_notification(user_id, f"{rng.randrange(24):02d}:{rng.choice((0, 30)):02d}")
+
+
+def bench_storage(size: int) -> Dict[str, float]:
+    """Память на пользователя и задержка аксессоров хранилища"""
+    reset_state()
+    _, memory = measure_memory(lambda: populate(size))
+
+    user_id = size // 2
+    date = storage.get_user_date(user_id)
+    return {
+        "memory_per_user_bytes": memory / size,
+        "get_user_date_ns": per_call_ns(lambda: storage.get_user_date(user_id)),
+        "has_user_notification_ns": per_call_ns(lambda: storage.has_user_notification(user_id)),
+        "set_user_date_ns": per_call_ns(lambda: storage.set_user_date(user_id, date)),
+    }
+
+
+BENCHMARKS = [
+    ("storage", bench_storage, True),
+]
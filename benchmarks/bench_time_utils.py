@@ -0,0 +1,62 @@
+"""
+Бенчмарки utils/time_utils
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from benchmarks.common import per_call_ns
+from utils.time_utils import (
+    calculate_time_left, format_time_left, parse_date, parse_time, render_time_left, countdown_cache,
+    _parse_date_cached, _parse_time_cached
+)
+
+
+def _swallow(parse: Callable, text: str) -> Callable[[], None]:
+    """Вызов парсера, который глотает ValueError (замер неверного ввода)"""
+    def call():
+        try:
+            parse(text)
+        except ValueError:
+            pass
+    return call
+
+
+def bench_time_utils(size: int) -> Dict[str, float]:
+    """Задержка одного вызова функций работы со временем"""
+    target = datetime.now() + timedelta(days=100)
+    days, hours, minutes = calculate_time_left(target)
+
+    # Без кэша: каждый вызов разбирает строку заново (как strptime)
+    parse_date_uncached = _parse_date_cached.__wrapped__
+    parse_time_uncached = _parse_time_cached.__wrapped__
+
+    strptime_date = per_call_ns(lambda: datetime.strptime("25.12.2026", "%d.%m.%Y"))
+    strptime_date_invalid = per_call_ns(_swallow(lambda text: datetime.strptime(text, "%d.%m.%Y"), "32.13.2026"))
+    strptime_time = per_call_ns(lambda: datetime.strptime("09:00", "%H:%M"))
+    date_uncached = per_call_ns(lambda: parse_date_uncached("25.12.2026"))
+    date_invalid_uncached = per_call_ns(lambda: parse_date_uncached("32.13.2026"))
+    time_uncached = per_call_ns(lambda: parse_time_uncached("09:00"))
+
+    countdown_cache.clear()
+    return {
+        "parse_date_ns": per_call_ns(lambda: parse_date("25.12.2026")),
+        "parse_date_invalid_ns": per_call_ns(_swallow(parse_date, "32.13.2026")),
+        "parse_time_ns": per_call_ns(lambda: parse_time("09:00")),
+        "parse_date_uncached_ns": date_uncached,
+        "parse_date_invalid_uncached_ns": date_invalid_uncached,
+        "parse_time_uncached_ns": time_uncached,
+        "strptime_date_ns": strptime_date,
+        "strptime_time_ns": strptime_time,
+        "parse_date_speedup": strptime_date / per_call_ns(lambda: parse_date("25.12.2026")),
+        "parse_date_invalid_speedup": strptime_date_invalid / per_call_ns(_swallow(parse_date, "32.13.2026")),
+        "parse_date_uncached_speedup": strptime_date / date_uncached,
+        "parse_time_speedup": strptime_time / per_call_ns(lambda: parse_time("09:00")),
+        "calculate_time_left_ns": per_call_ns(lambda: calculate_time_left(target)),
+        "format_time_left_ns": per_call_ns(lambda: format_time_left(days, hours, minutes, target)),
+        "render_time_left_cached_ns": per_call_ns(lambda: render_time_left(target)),
+    }
+
+
+BENCHMARKS = [
+    ("time_utils", bench_time_utils, False),
+]
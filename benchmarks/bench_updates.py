@@ -0,0 +1,77 @@
+"""
+Бенчмарки services/update_lanes
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from telegram import Chat, Message, Update, User
+from telegram.ext import BaseUpdateProcessor, SimpleUpdateProcessor
+
+from services.update_lanes import UserLaneProcessor
+
+USER_COUNTS = (10, 50, 200)
+UPDATES_PER_USER = 2
+
+# Смешанная нагрузка: обновления приходят раз в ARRIVAL_INTERVAL, обработчик ждет ответа
+# Telegram FAST секунд, каждое десятое обновление - SLOW секунд
+ARRIVAL_INTERVAL = 0.001
+FAST = 0.002
+SLOW = 0.02
+
+
+def _update(update_id: int, user_id: int) -> Update:
+    """Собрать обновление с сообщением пользователя без обращения к сети"""
+    user = User(user_id, "bench", False)
+    message = Message(update_id, datetime.now(), Chat(user_id, Chat.PRIVATE), from_user=user, text="x")
+    return Update(update_id, message=message)
+
+
+async def _simulate(processor: BaseUpdateProcessor, users: int) -> Tuple[float, bool]:
+    """
+    Прогнать смешанную нагрузку через обработчик обновлений
+
+    Returns:
+        Tuple[float, bool]: (p99 задержки ответа в миллисекундах, сохранен ли порядок у каждого пользователя)
+    """
+    loop = asyncio.get_running_loop()
+    latencies: List[float] = []
+    order: Dict[int, List[int]] = {}
+
+    async def handle(user_id: int, sequence: int, received: float) -> None:
+        await asyncio.sleep(SLOW if (user_id * 7 + sequence) % 10 == 0 else FAST)
+        order.setdefault(user_id, []).append(sequence)
+        latencies.append(loop.time() - received)
+
+    tasks = []
+    update_id = 0
+    for sequence in range(UPDATES_PER_USER):
+        for user_id in range(1, users + 1):
+            update_id += 1
+            coroutine = handle(user_id, sequence, loop.time())
+            tasks.append(asyncio.create_task(processor.process_update(_update(update_id, user_id), coroutine)))
+            await asyncio.sleep(ARRIVAL_INTERVAL)
+    await asyncio.gather(*tasks)
+
+    latencies.sort()
+    ordered = all(sequences == sorted(sequences) for sequences in order.values())
+    return latencies[int(len(latencies) * 0.99) - 1] * 1000, ordered
+
+
+def bench_updates(size: int) -> Dict[str, float]:
+    """p99 задержки ответа при последовательной обработке и с полосами по пользователям"""
+    results: Dict[str, float] = {}
+    for users in USER_COUNTS:
+        sequential, _ = asyncio.run(_simulate(SimpleUpdateProcessor(1), users))
+        lanes, ordered = asyncio.run(_simulate(UserLaneProcessor(16, 20), users))
+        if not ordered:
+            raise AssertionError("Нарушен порядок обновлений пользователя")
+        results[f"sequential_p99_{users}_ms"] = sequential
+        results[f"lanes_p99_{users}_ms"] = lanes
+        results[f"lanes_p99_{users}_speedup"] = sequential / lanes
+    return results
+
+
+BENCHMARKS = [
+    ("updates", bench_updates, False),
+]
@@ -0,0 +1,110 @@
+"""
+Общие инструменты для бенчмарков
+"""
+import gc
+import logging
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+# Бенчмарки не должны зависеть от скорости вывода логов
+logging.disable(logging.CRITICAL)
+
+
+class MockBot:
+    """Заглушка telegram.Bot: принимает сообщения без сети"""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        self.sent += 1
+
+
+def reset_state() -> None:
+    """Очистить глобальное состояние хранилища и диспетчера между прогонами"""
+    from utils import storage
+    from services import scheduler_service
+    from services.dispatcher import MinuteDispatcher
+    from utils.time_utils import countdown_cache
+
+    storage.user_store.clear()
+    storage.date_index.clear()
+    storage.countdown_store.clear()
+    storage.countdown_index.clear()
+    storage._inactive.clear()
+    storage.aggregates.clear()
+    scheduler_service.dispatcher = MinuteDispatcher()
+    scheduler_service.countdown_dispatcher = MinuteDispatcher()
+    scheduler_service.journal = None
+    scheduler_service._in_flight.clear()
+    scheduler_service._countdowns_in_flight.clear()
+    countdown_cache.clear()
+    gc.collect()
+
+
+# Минимальная длительность одного повтора: короткие замеры сильнее искажает планировщик ОС
+MIN_REPEAT_NS = 50_000_000
+
+
+def per_call_ns(func: Callable[[], object], iterations: int = 20000, repeats: int = 7) -> float:
+    """
+    Измерить время одного вызова (медиана нескольких повторов)
+
+    Число вызовов в повторе увеличивается, пока повтор не займет MIN_REPEAT_NS.
+    Медиана меньше минимума зависит от одного удачного повтора и поэтому
+    стабильнее между запусками на загруженной машине.
+
+    Returns:
+        float: наносекунд на вызов
+    """
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter_ns() - start
+    if elapsed < MIN_REPEAT_NS:
+        iterations = int(iterations * MIN_REPEAT_NS / max(elapsed, 1)) + 1
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter_ns() - start) / iterations)
+    return statistics.median(timings)
+
+
+def _reference_workload() -> int:
+    """Эталонная нагрузка на интерпретатор: словари, строки, целые числа"""
+    table = {}
+    for number in range(50):
+        table[str(number)] = number * 7
+    return sum(table.values())
+
+
+def reference_ns() -> float:
+    """
+    Скорость машины: время эталонной нагрузки в наносекундах
+
+    Сохраняется вместе с результатами, чтобы сравнение с базовым уровнем,
+    снятым на другой машине (или на той же под другой нагрузкой), учитывало
+    разницу в скорости.
+    """
+    return per_call_ns(_reference_workload, repeats=9)
+
+
+def measure_memory(func: Callable[[], object]) -> Tuple[object, int]:
+    """
+    Выполнить функцию и измерить прирост памяти Python
+
+    Returns:
+        Tuple[object, int]: (результат функции, прирост памяти в байтах)
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
@@ -0,0 +1,166 @@
+"""
+Запуск микробенчмарков и сравнение с сохраненным базовым уровнем
+
+Примеры:
+    python -m benchmarks.run --sizes 1000,10000,100000 --save benchmarks/baselines/baseline.json
+    python -m benchmarks.run --compare benchmarks/baselines/baseline.json --runs 3
+    python -m benchmarks.run --compare benchmarks/baselines/baseline.json --relative   # другая машина
+
+Шум замеров гасится в три слоя:
+    - per_call_ns берет медиану повторов длиной не меньше MIN_REPEAT_NS;
+    - с --runs N каждый бенчмарк выполняется N раз и сравнивается медиана;
+    - бенчмарки с найденной регрессией замеряются повторно, и регрессией
+      считается только ухудшение, которое повторилось.
+С --relative метрики времени и пропускной способности пересчитываются по
+скорости машины (эталонная нагрузка reference_ns из common), чтобы сравнивать
+с базовым уровнем, снятым на другой машине.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks import (
+    bench_messages, bench_router, bench_scheduler, bench_storage, bench_time_utils, bench_updates
+)
+from benchmarks.common import reference_ns
+
+MODULES = [bench_time_utils, bench_storage, bench_scheduler, bench_router, bench_messages, bench_updates]
+
+DEFAULT_SIZES = "1000,10000,100000"
+
+
+def higher_is_better(metric: str) -> bool:
+    """Метрики пропускной способности и ускорения растут при улучшении, остальные - уменьшаются"""
+    return metric.endswith(("_per_sec", "_speedup"))
+
+
+def depends_on_machine(metric: str) -> bool:
+    """Метрики времени и пропускной способности (ускорения и память от скорости машины не зависят)"""
+    return metric.endswith(("_ns", "_s", "_per_sec"))
+
+
+def median_results(runs: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """Медиана каждой метрики по нескольким прогонам"""
+    return {
+        key: {metric: statistics.median(run[key][metric] for run in runs) for metric in metrics}
+        for key, metrics in runs[0].items()
+    }
+
+
+def run_benchmarks(sizes: List[int], only: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Выполнить бенчмарки
+
+    Returns:
+        Dict[str, Dict[str, float]]: {"имя@размер": {метрика: значение}}
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for module in MODULES:
+        for name, func, scales in module.BENCHMARKS:
+            if only and name not in only:
+                continue
+            for size in (sizes if scales else [sizes[0]]):
+                key = f"{name}@{size}" if scales else name
+                started = time.perf_counter()
+                results[key] = func(size)
+                print(f"{key}: {time.perf_counter() - started:.1f} с", file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float, speed_ratio: float = 1.0) -> Dict[Tuple[str, str], str]:
+    """
+    Сравнить результаты с базовым уровнем
+
+    Args:
+        results: текущие результаты
+        baseline: результаты базового уровня
+        threshold: допустимое ухудшение
+        speed_ratio: во сколько раз эталонная нагрузка сейчас медленнее, чем при снятии базового уровня
+
+    Returns:
+        Dict[Tuple[str, str], str]: (бенчмарк, метрика) -> описание регрессии
+    """
+    regressions = {}
+    for key, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(key, {}).get(metric)
+            if not base:
+                continue
+            if depends_on_machine(metric):
+                base = base / speed_ratio if higher_is_better(metric) else base * speed_ratio
+            change = (base - value) / base if higher_is_better(metric) else (value - base) / base
+            marker = ""
+            if change > threshold:
+                marker = "  <-- РЕГРЕССИЯ"
+                regressions[key, metric] = f"{key}.{metric}: {base:.4g} -> {value:.4g} ({change:+.1%})"
+            print(f"{key}.{metric}: {base:.4g} -> {value:.4g} ({change:+.1%} хуже){marker}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Микробенчмарки бота")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="размеры популяции через запятую (до 1000000)")
+    parser.add_argument("--only", default="", help="имена бенчмарков через запятую")
+    parser.add_argument("--save", help="сохранить результаты в JSON файл")
+    parser.add_argument("--compare", help="сравнить с базовым JSON файлом")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое ухудшение (0.2 = 20%%)")
+    parser.add_argument("--runs", type=int, default=1, help="сколько раз выполнить бенчмарки (берется медиана)")
+    parser.add_argument("--relative", action="store_true",
+                        help="учесть разницу в скорости машин при сравнении с базовым уровнем")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    only = [name for name in args.only.split(",") if name]
+    runs = max(1, args.runs)
+    reference = reference_ns()
+    results = median_results([run_benchmarks(sizes, only) for _ in range(runs)])
+    # Скорость машины измеряется до и после прогона: нагрузка на машину могла измениться
+    reference = (reference + reference_ns()) / 2
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "reference_ns": reference,
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Результаты сохранены в {args.save}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        speed_ratio = 1.0
+        if args.relative and baseline.get("reference_ns"):
+            speed_ratio = reference / baseline["reference_ns"]
+            print(f"Скорость машины относительно базового уровня: {1 / speed_ratio:.2f}", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.threshold, speed_ratio)
+
+        # Единичный выброс не считается: регрессия должна повториться при повторном замере
+        if regressions:
+            names = sorted({key.split("@")[0] for key, _ in regressions})
+            print(f"Повторный замер: {', '.join(names)}", file=sys.stderr)
+            retry = median_results([run_benchmarks(sizes, names) for _ in range(runs)])
+            confirmed = compare(retry, baseline["results"], args.threshold, speed_ratio)
+            regressions = {item: description for item, description in confirmed.items() if item in regressions}
+        if regressions:
+            for description in regressions.values():
+                print(f"РЕГРЕССИЯ {description}", file=sys.stderr)
+            print(f"Найдено регрессий: {len(regressions)}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
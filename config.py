@@ -9,4 +9,116 @@ if not BOT_TOKEN:
 
 # Проверяем что токен не пустой
 if not isinstance(BOT_TOKEN, str) or len(BOT_TOKEN.strip()) == 0:
-    raise ValueError("BOT_TOKEN должен быть непустой строкой") 
\ No newline at end of file
+    raise ValueError("BOT_TOKEN должен быть непустой строкой") 
+
+# Хранилище данных пользователей
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sqlite')
+STORAGE_PATH = os.getenv('STORAGE_PATH', 'data/time_bot.db')
+STORAGE_FLUSH_INTERVAL = float(os.getenv('STORAGE_FLUSH_INTERVAL', '1.0'))
+
+# Журнал доставок и окно досылки пропущенных уведомлений (в минутах)
+DELIVERY_JOURNAL_PATH = os.getenv('DELIVERY_JOURNAL_PATH', 'data/deliveries.log')
+CATCHUP_GRACE_MINUTES = int(os.getenv('CATCHUP_GRACE_MINUTES', '180'))
+
+# Живые отсчеты в закрепленных сообщениях: список отсчетов и бюджет правок в секунду
+LIVE_COUNTDOWNS_PATH = os.getenv('LIVE_COUNTDOWNS_PATH', 'data/live_countdowns.txt')
+LIVE_EDIT_RATE = float(os.getenv('LIVE_EDIT_RATE', '5'))
+
+# Логирование: уровень, формат (json или text), доля событий горячих путей в логе
+# и период сводок по всем событиям (в секундах, 0 - без сводок)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.01'))
+LOG_SUMMARY_INTERVAL = float(os.getenv('LOG_SUMMARY_INTERVAL', '60'))
+
+if LOG_FORMAT not in ('json', 'text'):
+    raise ValueError("LOG_FORMAT должен быть json или text")
+if not 0 <= LOG_SAMPLE_RATE <= 1:
+    raise ValueError("LOG_SAMPLE_RATE должен быть от 0 до 1")
+
+# Сколько секунд при остановке (SIGTERM) бот дорабатывает обновления и досылает очередь
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '20'))
+
+# Очередь исходящих сообщений
+SEND_WORKERS = int(os.getenv('SEND_WORKERS', '8'))
+SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', '30'))
+SEND_PER_CHAT_INTERVAL = float(os.getenv('SEND_PER_CHAT_INTERVAL', '1.0'))
+SEND_DEADLINE = float(os.getenv('SEND_DEADLINE', '600'))
+# После скольких подряд недоставленных из-за временных ошибок сообщений чат считается недоступным
+SEND_UNREACHABLE_AFTER = int(os.getenv('SEND_UNREACHABLE_AFTER', '5'))
+
+# Режим получения обновлений: polling, webhook или shard (воркер шардированного развертывания)
+UPDATE_MODE = os.getenv('UPDATE_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+
+# Параллельная обработка обновлений: разные пользователи параллельно, обновления одного - по порядку
+# (UPDATE_CONCURRENCY=1 - последовательная обработка)
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '16'))
+UPDATE_LANE_LIMIT = int(os.getenv('UPDATE_LANE_LIMIT', '20'))
+
+if UPDATE_MODE not in ('polling', 'webhook', 'shard'):
+    raise ValueError("UPDATE_MODE должен быть polling, webhook или shard")
+
+if UPDATE_MODE == 'webhook' and not WEBHOOK_URL:
+    raise ValueError("Для режима webhook укажите WEBHOOK_URL (публичный HTTPS адрес бота)")
+
+# Без секрета любой, кто знает адрес webhook или воркера шарда, может подсовывать боту обновления
+if UPDATE_MODE in ('webhook', 'shard') and not WEBHOOK_SECRET:
+    raise ValueError(
+        f"Для режима {UPDATE_MODE} укажите WEBHOOK_SECRET (случайная строка из A-Z, a-z, 0-9, _ и -)"
+    )
+
+# Рассылка администратора: файл с курсором для продолжения и темп (сообщений в секунду,
+# меньше SEND_GLOBAL_RATE, чтобы оставался запас для уведомлений)
+BROADCAST_PATH = os.getenv('BROADCAST_PATH', 'data/broadcast.json')
+BROADCAST_RATE = float(os.getenv('BROADCAST_RATE', '10'))
+
+# Администраторы бота (ID через запятую): им доступны служебные команды (/stats, /broadcast)
+ADMIN_IDS = frozenset(
+    int(user_id) for user_id in os.getenv('ADMIN_IDS', '').split(',') if user_id.strip()
+)
+
+# Эндпоинт метрик Prometheus (METRICS_PORT=0 отключает)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+
+# Типы обновлений, которые бот реально обрабатывает
+ALLOWED_UPDATES = ['message', 'callback_query', 'inline_query']
+
+# Шардированное развертывание: пользователи делятся между SHARD_COUNT воркерами
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '1'))
+SHARD_INDEX = int(os.getenv('SHARD_INDEX', '0'))
+SHARD_BASE_PORT = int(os.getenv('SHARD_BASE_PORT', '8600'))
+# Адреса воркеров host:port через запятую (по умолчанию все на этой машине)
+SHARD_HOSTS = [
+    host.strip() for host in os.getenv('SHARD_HOSTS', '').split(',') if host.strip()
+] or [f"127.0.0.1:{SHARD_BASE_PORT + index}" for index in range(SHARD_COUNT)]
+
+if len(SHARD_HOSTS) != SHARD_COUNT:
+    raise ValueError("Количество адресов в SHARD_HOSTS должно совпадать с SHARD_COUNT")
+
+if UPDATE_MODE == 'shard':
+    if not 0 <= SHARD_INDEX < SHARD_COUNT:
+        raise ValueError("SHARD_INDEX должен быть в диапазоне от 0 до SHARD_COUNT - 1")
+    # Каждый воркер хранит свою часть пользователей и слушает свой порт
+    root, extension = os.path.splitext(STORAGE_PATH)
+    STORAGE_PATH = f"{root}.shard{SHARD_INDEX}{extension}"
+    root, extension = os.path.splitext(DELIVERY_JOURNAL_PATH)
+    DELIVERY_JOURNAL_PATH = f"{root}.shard{SHARD_INDEX}{extension}"
+    root, extension = os.path.splitext(LIVE_COUNTDOWNS_PATH)
+    LIVE_COUNTDOWNS_PATH = f"{root}.shard{SHARD_INDEX}{extension}"
+    root, extension = os.path.splitext(BROADCAST_PATH)
+    BROADCAST_PATH = f"{root}.shard{SHARD_INDEX}{extension}"
+    WEBHOOK_LISTEN, WEBHOOK_PORT = SHARD_HOSTS[SHARD_INDEX].rsplit(':', 1)
+    WEBHOOK_PORT = int(WEBHOOK_PORT)
+    if METRICS_PORT:
+        METRICS_PORT += SHARD_INDEX
+    # Лимит Telegram общий для токена, поэтому делится между воркерами
+    SEND_GLOBAL_RATE /= SHARD_COUNT
+    BROADCAST_RATE /= SHARD_COUNT
@@ -2,105 +2,318 @@
 Обработчики команд бота
 """
 import logging
-from datetime import datetime
-from telegram import Update, ReplyKeyboardMarkup, KeyboardButton
+from datetime import datetime, timezone
+from telegram import Update
 from telegram.ext import ContextTypes
 
-from utils.storage import user_dates, user_notifications
+from utils.messages import text, keyboard, user_locale, variants
+from utils.storage import (
+    get_user_date, get_user_notification, get_user_timezone, get_user_zone, set_user_timezone,
+    add_countdown, remove_countdown, find_countdown, get_countdown, get_countdowns, set_countdown_notification,
+    is_user_inactive, get_statistics, format_minute_of_day, MAX_COUNTDOWNS_PER_USER, MAX_COUNTDOWN_NAME_LENGTH
+)
+from utils.time_utils import ParseError, render_time_left, parse_timezone, parse_date, parse_time
 
 logger = logging.getLogger(__name__)
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработчик команды /start"""
-    welcome_text = """
-🤖 Привет! Я бот для отсчета времени до важных дат.
+    locale = user_locale(update.effective_user)
+    await update.message.reply_text(text("start", locale), reply_markup=keyboard("main", locale))
 
-📅 Доступные команды:
-/set_date - Установить дату для отсчета
-/time_left - Показать оставшееся время
-/notifications - Настроить уведомления
-/help - Показать справку
 
-Выберите действие:
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик команды /help"""
+    await update.message.reply_text(text("help", user_locale(update.effective_user)))
+
+
+async def reactivate_on_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Вернуть уведомления пользователю, который снова пишет боту после блокировки (для любого обновления)"""
+    user = update.effective_user
+    if user is not None and is_user_inactive(user.id):
+        from services.scheduler_service import reactivate_user_notifications
+        reactivate_user_notifications(user.id)
+
+
+def is_admin(update: Update) -> bool:
+    """Проверить, что обновление от администратора бота (ADMIN_IDS)"""
+    from config import ADMIN_IDS
+    return update.effective_user is not None and update.effective_user.id in ADMIN_IDS
+
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
+    Обработчик команды /stats (только для администраторов, остальным бот не отвечает)
     
-    # Создаем главную клавиатуру с двумя кнопками
-    keyboard = [
-        [KeyboardButton("⚙️ Настройки"), KeyboardButton("⏰ Оставшееся время")]
-    ]
-    
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
+    В шардированном режиме команда приходит всем шардам, и каждый отвечает
+    статистикой своих пользователей с подписью шарда.
+    """
+    if not is_admin(update):
+        return
+    from services.sharding import shard_label
     
+    locale = user_locale(update.effective_user)
+    stats = get_statistics()
+    empty = text("stats_empty", locale)
+    busiest = ", ".join(f"{format_minute_of_day(minute)} ({count})" for minute, count in stats.pop("busiest"))
+    hourly = ", ".join(f"{hour:02d}: {count}" for hour, count in enumerate(stats.pop("hourly")) if count)
     await update.message.reply_text(
-        welcome_text,
-        reply_markup=reply_markup
+        shard_label(locale) + text("stats", locale, busiest=busiest or empty, hourly=hourly or empty, **stats)
     )
 
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Обработчик команды /help"""
-    help_text = """
-📋 Справка по использованию бота:
-
-1️⃣ /set_date - Установить дату для отсчета
-   Бот попросит ввести дату в формате ДД.ММ.ГГГГ
-   Например: 25.12.2024
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Рассылка всем пользователям (только для администраторов)
+    
+    /broadcast текст сообщения
+    /broadcast стоп
+    
+    В шардированном режиме фронт пересылает команду всем шардам: каждый шард
+    рассылает своим пользователям и показывает ход в отдельном сообщении с
+    подписью шарда. Справку отправляет только шард администратора.
+    """
+    if not is_admin(update):
+        return
+    from services.broadcast import get_broadcast
+    from services.sharding import local_shard, shard_label
+    
+    service = get_broadcast()
+    locale = user_locale(update.effective_user)
+    label = shard_label(locale)
+    args = context.args or []
+    
+    if len(args) == 1 and args[0].lower() in variants("broadcast_arg_stop"):
+        stopped = await service.cancel()
+        if not stopped:
+            await update.message.reply_text(label + text("broadcast_not_running", locale))
+        return
+    
+    # Текст берется из сообщения целиком, чтобы сохранить переносы строк
+    parts = update.message.text.split(maxsplit=1)
+    if len(parts) < 2:
+        if local_shard(update.effective_user.id):
+            await update.message.reply_text(text("broadcast_usage", locale))
+        return
+    if service.state is not None:
+        await update.message.reply_text(label + text("broadcast_busy", locale))
+        return
+    await service.begin(parts[1].strip(), update.message.chat_id)
 
-2️⃣ /time_left - Показать оставшееся время
-   Показывает сколько дней и часов осталось до установленной даты
 
-3️⃣ /notifications - Настроить уведомления
-   Установить время ежедневных уведомлений (например: 09:00)
-   Или отключить уведомления
+def render_named_countdowns(user_id: int, locale: str, now: datetime) -> str:
+    """Текст всех именованных отсчетов пользователя (пустая строка, если их нет)"""
+    parts = []
+    for _, name, target_date, _ in get_countdowns(user_id):
+        if target_date <= now:
+            parts.append(text("countdown_named_reached", locale, name=name))
+        else:
+            parts.append(text("countdown_named", locale, name=name,
+                              countdown=render_time_left(target_date, now, locale)))
+    return "\n\n".join(parts)
 
-4️⃣ /help - Показать эту справку
 
-💡 Совет: Установите дату с помощью /set_date, а затем настройте уведомления!
+def compose_time_left(user_id: int, locale: str, source: str = "command") -> str:
+    """
+    Ответ на запрос оставшегося времени: основная дата и все именованные отсчеты
+    
+    Args:
+        user_id: ID пользователя
+        locale: язык
+        source: откуда пришел запрос ("command" или "button"), от него зависят подсказки
     """
-    await update.message.reply_text(help_text)
+    now = datetime.now(timezone.utc)
+    named = render_named_countdowns(user_id, locale, now)
+    target_date = get_user_date(user_id)
+    
+    if target_date is None or target_date <= now:
+        if named:
+            return text("countdowns_title", locale) + named
+        return text(("date_not_set_" if target_date is None else "date_passed_") + source, locale)
+    
+    # Формируем сообщение (общий кэш на дату, язык и минуту)
+    time_text = render_time_left(target_date, now, locale)
+    
+    # Добавляем информацию об уведомлениях
+    notification_time = get_user_notification(user_id)
+    if notification_time:
+        time_text += text("notifications_on", locale, time=notification_time)
+    else:
+        time_text += text("notifications_off_" + source, locale)
+    
+    if named:
+        time_text += "\n\n" + text("countdowns_title", locale) + named
+    return time_text
 
 
 async def time_left_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Показать оставшееся время до установленной даты (команда)"""
+    """Показать оставшееся время до установленной даты и именованных отсчетов (команда)"""
+    locale = user_locale(update.effective_user)
+    await update.message.reply_text(compose_time_left(update.message.from_user.id, locale))
+
+
+async def timezone_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показать или изменить часовой пояс пользователя (/timezone Europe/Berlin)"""
     user_id = update.message.from_user.id
+    locale = user_locale(update.effective_user)
     
-    if user_id not in user_dates:
+    if not context.args:
+        local_now = datetime.now(get_user_zone(user_id))
         await update.message.reply_text(
-            "❌ Дата не установлена!\n\n"
-            "Сначала установите дату с помощью команды /set_date"
+            text("timezone_current", locale, zone=get_user_timezone(user_id), now=local_now.strftime('%H:%M'))
         )
         return
     
-    target_date = user_dates[user_id]
-    now = datetime.now()
+    try:
+        zone_name = parse_timezone(" ".join(context.args))
+    except ValueError:
+        await update.message.reply_text(text("timezone_unknown", locale))
+        return
     
-    if target_date <= now:
-        await update.message.reply_text(
-            "🎉 Установленная дата уже наступила!\n\n"
-            "Установите новую дату с помощью /set_date"
-        )
+    set_user_timezone(user_id, zone_name)
+    
+    # Время уведомлений (основных и именованных отсчетов) остается тем же по местным часам,
+    # меняется его минута в UTC
+    from services.scheduler_service import setup_countdown_notification, setup_notification_job
+    notification_time = get_user_notification(user_id)
+    if notification_time:
+        hour, minute = map(int, notification_time.split(":"))
+        setup_notification_job(user_id, hour, minute)
+    for countdown_id, _, _, countdown_time in get_countdowns(user_id):
+        if countdown_time:
+            hour, minute = map(int, countdown_time.split(":"))
+            setup_countdown_notification(countdown_id, hour, minute)
+    
+    from services.live_countdown import refresh_live_countdown
+    refresh_live_countdown(user_id)
+    
+    # Момент наступления дат в UTC сдвинулся вместе с поясом
+    from services.arrival_timer import wake_arrival_timer
+    wake_arrival_timer()
+    
+    local_now = datetime.now(get_user_zone(user_id))
+    await update.message.reply_text(
+        text("timezone_set", locale, zone=zone_name, now=local_now.strftime('%H:%M'))
+    )
+
+
+async def live_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Включить или выключить живой отсчет в закрепленном сообщении (/live час, /live выкл)"""
+    from services.live_countdown import GRANULARITIES, get_live_countdowns
+    
+    user_id = update.message.from_user.id
+    locale = user_locale(update.effective_user)
+    service = get_live_countdowns()
+    argument = context.args[0].lower() if context.args else None
+    
+    if service is None or argument is None:
+        await update.message.reply_text(text("live_usage", locale))
         return
     
-    # Вычисляем разность
-    time_diff = target_date - now
+    if argument in variants("live_arg_off"):
+        stopped = service.disable(user_id)
+        await update.message.reply_text(text("live_stopped" if stopped else "live_not_active", locale))
+        return
     
-    days = time_diff.days
-    hours = time_diff.seconds // 3600
-    minutes = (time_diff.seconds % 3600) // 60
+    granularity = next((name for name in GRANULARITIES if argument in variants(f"live_arg_{name}")), None)
+    if granularity is None:
+        await update.message.reply_text(text("live_usage", locale))
+        return
     
-    # Формируем сообщение
-    if days > 0:
-        time_text = f"📅 До {target_date.strftime('%d.%m.%Y')} осталось:\n\n"
-        time_text += f"🕐 {days} дней, {hours} часов, {minutes} минут"
-    else:
-        time_text = f"📅 До {target_date.strftime('%d.%m.%Y')} осталось:\n\n"
-        time_text += f"🕐 {hours} часов, {minutes} минут"
+    target_date = get_user_date(user_id)
+    if target_date is None:
+        await update.message.reply_text(text("date_not_set_command", locale))
+        return
+    if target_date <= datetime.now(timezone.utc):
+        await update.message.reply_text(text("date_passed_command", locale))
+        return
     
-    # Добавляем информацию об уведомлениях
-    if user_id in user_notifications:
-        time_text += f"\n\n🔔 Уведомления настроены на {user_notifications[user_id]}"
-    else:
-        time_text += f"\n\n🔕 Уведомления не настроены. Используйте /notifications для настройки."
+    await service.enable(user_id, update.message.chat_id, granularity)
+    await update.message.reply_text(text("live_started", locale, every=text(f"live_every_{granularity}", locale)))
+
+
+async def countdown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Управление именованными отсчетами
+    
+    /countdown добавить 25.12.2026 Новый год
+    /countdown удалить Новый год
+    /countdown уведомления Новый год 09:00 (или выкл)
+    """
+    from services.arrival_timer import wake_arrival_timer
+    from services.scheduler_service import setup_countdown_notification, remove_countdown_notification
+    
+    user_id = update.message.from_user.id
+    locale = user_locale(update.effective_user)
+    args = context.args or []
+    action = args[0].lower() if args else None
+    
+    if action in variants("countdown_arg_add") and len(args) >= 3:
+        try:
+            target_date = parse_date(args[1]).replace(tzinfo=get_user_zone(user_id))
+        except ParseError as e:
+            await update.message.reply_text(text("countdown_date_invalid", locale, error=e.message(locale)))
+            return
+        if target_date <= datetime.now(timezone.utc):
+            await update.message.reply_text(text("countdown_date_in_past", locale))
+            return
+        try:
+            countdown_id = add_countdown(user_id, " ".join(args[2:]), target_date)
+        except ValueError:
+            await update.message.reply_text(text(
+                "countdown_rejected", locale, limit=MAX_COUNTDOWNS_PER_USER, length=MAX_COUNTDOWN_NAME_LENGTH
+            ))
+            return
+        
+        # Отсчет с тем же названием заменяется: его уведомления продолжают работать с новой датой
+        _, name, _, notification_time = get_countdown(countdown_id)
+        if notification_time:
+            hour, minute = map(int, notification_time.split(":"))
+            setup_countdown_notification(countdown_id, hour, minute)
+        wake_arrival_timer()
+        await update.message.reply_text(
+            text("countdown_added", locale, name=name, date=target_date.strftime('%d.%m.%Y'))
+        )
+        return
+    
+    if action in variants("countdown_arg_remove") and len(args) >= 2:
+        name = " ".join(args[1:])
+        countdown_id = remove_countdown(user_id, name)
+        if countdown_id is None:
+            await update.message.reply_text(text("countdown_not_found", locale, name=name))
+            return
+        remove_countdown_notification(countdown_id)
+        await update.message.reply_text(text("countdown_removed", locale, name=name))
+        return
+    
+    if action in variants("countdown_arg_notify") and len(args) >= 3:
+        name = " ".join(args[1:-1])
+        countdown_id = find_countdown(user_id, name)
+        if countdown_id < 0:
+            await update.message.reply_text(text("countdown_not_found", locale, name=name))
+            return
+        
+        if args[-1].lower() in variants("countdown_arg_off"):
+            set_countdown_notification(countdown_id, None)
+            remove_countdown_notification(countdown_id)
+            await update.message.reply_text(text("countdown_notify_off", locale, name=name))
+            return
+        
+        try:
+            notification_time = parse_time(args[-1])
+        except ParseError as e:
+            await update.message.reply_text(text("countdown_time_invalid", locale, error=e.message(locale)))
+            return
+        time_str = notification_time.strftime('%H:%M')
+        set_countdown_notification(countdown_id, time_str)
+        setup_countdown_notification(countdown_id, notification_time.hour, notification_time.minute)
+        await update.message.reply_text(text(
+            "countdown_notify_on", locale, name=name, time=time_str, zone=get_user_timezone(user_id)
+        ))
+        return
     
-    await update.message.reply_text(time_text) 
\ No newline at end of file
+    # Без аргументов или с неизвестным действием - справка и список отсчетов
+    named = render_named_countdowns(user_id, locale, datetime.now(timezone.utc))
+    usage = text("countdown_usage", locale, limit=MAX_COUNTDOWNS_PER_USER)
+    await update.message.reply_text(usage + "\n\n" + text("countdowns_title", locale) + named if named else usage)
@@ -2,14 +2,16 @@
 Обработчики диалогов (ConversationHandler)
 """
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 
+from utils.messages import text, keyboard, user_locale, variants
+
 from utils.storage import (
     set_user_date, set_user_notification, remove_user_notification,
-    has_user_date, get_user_date, get_user_notification
+    has_user_date, get_user_date, get_user_notification, get_user_timezone, get_user_zone
 )
-from utils.time_utils import parse_date, parse_time, is_date_in_future, is_date_passed
+from utils.time_utils import ParseError, parse_date, parse_time, is_date_in_future, is_date_passed
 
 logger = logging.getLogger(__name__)
 
@@ -20,38 +22,27 @@ WAITING_FOR_NOTIFICATION_TIME = 2
 
 async def start_set_date(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Начало процесса установки даты (entry point)"""
-    await update.message.reply_text(
-        "📅 Введите дату в формате ДД.ММ.ГГГГ\n"
-        "Например: 25.12.2024\n\n"
-        "Или нажмите кнопку для отмены:",
-        reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("❌ Отмена", callback_data="cancel")]
-        ])
-    )
+    locale = user_locale(update.effective_user)
+    await update.message.reply_text(text("ask_date", locale), reply_markup=keyboard("cancel", locale))
     return WAITING_FOR_DATE
 
 
 async def start_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Начало процесса настройки уведомлений (entry point)"""
     user_id = update.message.from_user.id
+    locale = user_locale(update.effective_user)
     
     if not has_user_date(user_id):
-        await update.message.reply_text(
-            "❌ Сначала установите дату с помощью команды /set_date!"
-        )
+        await update.message.reply_text(text("date_required", locale))
         return ConversationHandler.END
     
-    current_notification = get_user_notification(user_id) or "Не настроено"
-    
     await update.message.reply_text(
-        f"🔔 Настройка уведомлений\n\n"
-        f"Текущее время уведомлений: {current_notification}\n\n"
-        f"Введите время для ежедневных уведомлений в формате ЧЧ:ММ (московское время)\n"
-        f"Например: 09:00 или 18:30\n\n"
-        f"Или введите 'отключить' чтобы отключить уведомления:",
-        reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("❌ Отмена", callback_data="cancel")]
-        ])
+        text(
+            "ask_notification_time", locale,
+            current=get_user_notification(user_id) or text("not_configured", locale),
+            zone=get_user_timezone(user_id)
+        ),
+        reply_markup=keyboard("cancel", locale)
     )
     return WAITING_FOR_NOTIFICATION_TIME
 
@@ -62,48 +53,37 @@ async def process_date_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return ConversationHandler.END
         
     user_id = update.message.from_user.id
+    locale = user_locale(update.effective_user)
     date_text = update.message.text.strip()
     
     try:
-        # Парсим дату
-        target_date = parse_date(date_text)
+        # Парсим дату (полночь по часовому поясу пользователя)
+        target_date = parse_date(date_text).replace(tzinfo=get_user_zone(user_id))
         
         # Проверяем, что дата в будущем
         if not is_date_in_future(target_date):
-            await update.message.reply_text(
-                "❌ Дата должна быть в будущем! Попробуйте еще раз или нажмите отмену:",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("❌ Отмена", callback_data="cancel")]
-                ])
-            )
+            await update.message.reply_text(text("date_in_past", locale), reply_markup=keyboard("cancel", locale))
             return WAITING_FOR_DATE
         
         # Сохраняем дату для пользователя
         set_user_date(user_id, target_date)
         
-        # Создаем клавиатуру с опциями
-        keyboard = [
-            [InlineKeyboardButton("⏰ Настроить уведомления", callback_data="setup_notifications")],
-            [InlineKeyboardButton("⏰ Показать время", callback_data="show_time")]
-        ]
+        from services.live_countdown import refresh_live_countdown
+        refresh_live_countdown(user_id)
+        
+        from services.arrival_timer import wake_arrival_timer
+        wake_arrival_timer()
         
         await update.message.reply_text(
-            f"✅ Дата успешно установлена: {target_date.strftime('%d.%m.%Y')}\n\n"
-            f"Теперь используйте команду /time_left чтобы узнать оставшееся время!\n"
-            f"Или настройте уведомления для ежедневных напоминаний.",
-            reply_markup=InlineKeyboardMarkup(keyboard)
+            text("date_saved", locale, date=target_date.strftime('%d.%m.%Y')),
+            reply_markup=keyboard("date_saved", locale)
         )
         
         return ConversationHandler.END
         
-    except ValueError:
+    except ParseError as e:
         await update.message.reply_text(
-            "❌ Неверный формат даты! Используйте формат ДД.ММ.ГГГГ\n"
-            "Например: 25.12.2024\n\n"
-            "Попробуйте еще раз или нажмите отмену:",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("❌ Отмена", callback_data="cancel")]
-            ])
+            text("date_invalid", locale, error=e.message(locale)), reply_markup=keyboard("cancel", locale)
         )
         return WAITING_FOR_DATE
 
@@ -114,22 +94,26 @@ async def process_notification_time(update: Update, context: ContextTypes.DEFAUL
         return ConversationHandler.END
         
     user_id = update.message.from_user.id
+    locale = user_locale(update.effective_user)
     time_text = update.message.text.strip().lower()
     
-    if time_text == "отключить":
+    # Слово для отключения принимается на любом языке
+    if time_text in variants("disable_word"):
         # Отключаем уведомления
         remove_user_notification(user_id)
         
-        await update.message.reply_text(
-            "🔕 Уведомления отключены!"
-        )
+        from services.scheduler_service import remove_notification_job
+        remove_notification_job(user_id)
+        
+        await update.message.reply_text(text("notifications_disabled", locale))
         return ConversationHandler.END
     
     try:
         # Парсим время
         notification_time = parse_time(time_text)
         
-        # Сохраняем настройки уведомлений
+        # Сохраняем настройки уведомлений (в каноническом виде ЧЧ:ММ, ввод мог быть 900 или 9:00)
+        time_text = f"{notification_time.hour:02d}:{notification_time.minute:02d}"
         set_user_notification(user_id, time_text)
         
         # Настраиваем задачу в планировщике
@@ -138,21 +122,16 @@ async def process_notification_time(update: Update, context: ContextTypes.DEFAUL
         
         target_date = get_user_date(user_id)
         
-        await update.message.reply_text(
-            f"✅ Уведомления настроены на {time_text} каждый день (московское время)!\n\n"
-            f"Бот будет присылать вам оставшееся время до {target_date.strftime('%d.%m.%Y')} в это время."
-        )
+        await update.message.reply_text(text(
+            "notifications_saved", locale,
+            time=time_text, zone=get_user_timezone(user_id), date=target_date.strftime('%d.%m.%Y')
+        ))
         
         return ConversationHandler.END
         
-    except ValueError:
+    except ParseError as e:
         await update.message.reply_text(
-            "❌ Неверный формат времени! Используйте формат ЧЧ:ММ (московское время)\n"
-            "Например: 09:00 или 18:30\n\n"
-            "Попробуйте еще раз или нажмите отмену:",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("❌ Отмена", callback_data="cancel")]
-            ])
+            text("time_invalid", locale, error=e.message(locale)), reply_markup=keyboard("cancel", locale)
         )
         return WAITING_FOR_NOTIFICATION_TIME
 
@@ -161,15 +140,16 @@ async def conversation_button_callback(update: Update, context: ContextTypes.DEF
     """Обработчик нажатий на кнопки внутри ConversationHandler"""
     query = update.callback_query
     await query.answer()
+    locale = user_locale(update.effective_user)
     
     if query.data == "cancel":
-        await query.edit_message_text("❌ Операция отменена.")
+        await query.edit_message_text(text("cancelled", locale))
         return ConversationHandler.END
     elif query.data == "show_time":
-        await query.edit_message_text("⏰ Используйте команду /time_left для просмотра оставшегося времени!")
+        await query.edit_message_text(text("show_time_hint", locale))
         return ConversationHandler.END
     elif query.data == "setup_notifications":
-        await query.edit_message_text("🔔 Используйте команду /notifications для настройки уведомлений!")
+        await query.edit_message_text(text("setup_notifications_hint", locale))
         return ConversationHandler.END
     
     return ConversationHandler.END
@@ -177,5 +157,5 @@ async def conversation_button_callback(update: Update, context: ContextTypes.DEF
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Отмена операции"""
-    await update.message.reply_text("❌ Операция отменена.")
+    await update.message.reply_text(text("cancelled", user_locale(update.effective_user)))
     return ConversationHandler.END 
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Inline-режим: отсчет до даты в любом чате (@bot 25.12.2026 Новый год)
+
+Пока пользователь печатает запрос, Telegram присылает обновление на каждое
+изменение строки, поэтому ответ должен почти ничего не стоить. Готовые
+результаты лежат в LRU-кэше по (запрос, язык, часовой пояс, минута): текст
+отсчета меняется раз в минуту, и повторы запроса в ту же минуту, в том числе
+от других пользователей того же пояса, берутся из кэша. Неразобранные
+запросы (недопечатанная дата) кэшируются так же, как пустой ответ.
+
+cache_time равен остатку текущей минуты: до смены текста Telegram отдает
+результат из своего кэша и не присылает запрос боту.
+"""
+from datetime import datetime, timezone
+from typing import Tuple
+
+from telegram import InlineQueryResultArticle, InputTextMessageContent, Update
+from telegram.ext import ContextTypes
+
+from utils.log import hot_path_log
+from utils.messages import text, user_locale
+from utils.render_cache import LRUCache
+from utils.storage import get_user_timezone, MAX_COUNTDOWN_NAME_LENGTH
+from utils.time_utils import calculate_time_left, format_time_left, get_zone, parse_date
+
+hot_log = hot_path_log(__name__)
+
+# Готовые результаты: ключ (запрос, язык, часовой пояс, минута UTC)
+inline_cache = LRUCache(max_size=4096, ttl=60)
+
+
+def build_results(query: str, locale: str, zone_name: str, now: datetime) -> Tuple[InlineQueryResultArticle, ...]:
+    """
+    Собрать результаты для запроса "дата [название]"
+
+    Args:
+        query: запрос без лишних пробелов
+        locale: язык текста
+        zone_name: часовой пояс, в котором задана дата
+        now: текущая минута (aware datetime)
+
+    Returns:
+        Tuple[InlineQueryResultArticle, ...]: результаты (пусто, если дату не удалось разобрать или она прошла)
+    """
+    date_text, _, name = query.partition(" ")
+    try:
+        target_date = parse_date(date_text).replace(tzinfo=get_zone(zone_name))
+    except ValueError:
+        return ()
+    if target_date <= now:
+        return ()
+
+    days, hours, minutes = calculate_time_left(target_date, now)
+    countdown = format_time_left(days, hours, minutes, target_date, locale)
+    name = name[:MAX_COUNTDOWN_NAME_LENGTH]
+    message = text("countdown_named", locale, name=name, countdown=countdown) if name else countdown
+    date = target_date.strftime('%d.%m.%Y')
+    return (
+        InlineQueryResultArticle(
+            id=f"{target_date:%Y%m%d}",
+            title=name or text("inline_title", locale, date=date),
+            description=countdown.rsplit("\n", 1)[-1],
+            input_message_content=InputTextMessageContent(message),
+        ),
+    )
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обработчик inline-запросов"""
+    query = update.inline_query
+    normalized = " ".join(query.query.split())
+    if not normalized:
+        await query.answer([], cache_time=3600, is_personal=False)
+        return
+
+    now = datetime.now(timezone.utc)
+    locale = user_locale(query.from_user)
+    zone_name = get_user_timezone(query.from_user.id)
+    results = inline_cache.get_or_compute(
+        (normalized, locale, zone_name, int(now.timestamp()) // 60),
+        lambda: build_results(normalized, locale, zone_name, now.replace(second=0, microsecond=0))
+    )
+    hot_log.event("inline_query", "Inline-запрос '%s' от пользователя %d: результатов %d",
+                  normalized, query.from_user.id, len(results), user_id=query.from_user.id)
+
+    # Дата считается в поясе пользователя, поэтому результат личный
+    await query.answer(results, cache_time=max(1, 60 - now.second), is_personal=True)
@@ -2,16 +2,15 @@
 Обработчики клавиатуры
 """
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 
-from utils.storage import (
-    user_dates, user_notifications, has_user_date, get_user_date, 
-    get_user_notification, has_user_notification
-)
-from utils.time_utils import calculate_time_left, format_time_left, is_date_passed
+from handlers.commands import compose_time_left
+from utils.log import hot_path_log
+from utils.messages import text, keyboard, user_locale, variants
+from utils.storage import has_user_date, get_user_date, get_user_notification, get_user_timezone
 
-logger = logging.getLogger(__name__)
+hot_log = hot_path_log(__name__)
 
 
 async def handle_keyboard_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -20,129 +19,59 @@ async def handle_keyboard_button(update: Update, context: ContextTypes.DEFAULT_T
         return
         
     text = update.message.text
-    logger.info(f"Обработка кнопки клавиатуры: '{text}' от пользователя {update.message.from_user.id}")
+    user_id = update.message.from_user.id
+    hot_log.event("button", "Обработка кнопки клавиатуры: '%s' от пользователя %d", text, user_id,
+                  user_id=user_id, button=text)
     
-    if text == "⚙️ Настройки":
-        await show_settings_keyboard(update, context)
-    elif text == "⏰ Оставшееся время":
-        await show_time_left_menu(update, context)
-    elif text == "🔙 Назад":
-        await show_main_keyboard(update, context)
-    else:
-        logger.warning(f"Неизвестная кнопка: '{text}'")
+    handler = KEYBOARD_BUTTONS.get(text)
+    if handler is None:
+        hot_log.event("unknown_button", "Неизвестная кнопка: '%s'", text, level=logging.WARNING, button=text)
+        return
+    await handler(update, context)
 
 
 async def show_settings_keyboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать клавиатуру настроек"""
-    settings_text = """
-⚙️ Настройки
-
-Выберите действие:
-    """
-    
-    # Создаем клавиатуру настроек
-    keyboard = [
-        [KeyboardButton("📅 Установить дату"), KeyboardButton("🔔 Уведомления")],
-        [KeyboardButton("🔙 Назад")]
-    ]
-    
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
-    
-    await update.message.reply_text(
-        settings_text,
-        reply_markup=reply_markup
-    )
+    locale = user_locale(update.effective_user)
+    await update.message.reply_text(text("settings_keyboard", locale), reply_markup=keyboard("settings", locale))
 
 
 async def show_main_keyboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать главную клавиатуру"""
-    main_text = """
-🤖 Главное меню
-
-Выберите действие:
-    """
-    
-    # Создаем главную клавиатуру
-    keyboard = [
-        [KeyboardButton("⚙️ Настройки"), KeyboardButton("⏰ Оставшееся время")]
-    ]
-    
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
-    
-    await update.message.reply_text(
-        main_text,
-        reply_markup=reply_markup
-    )
+    locale = user_locale(update.effective_user)
+    await update.message.reply_text(text("main_menu", locale), reply_markup=keyboard("main", locale))
 
 
 async def show_settings_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать меню настроек через текстовое сообщение"""
     user_id = update.message.from_user.id
+    locale = user_locale(update.effective_user)
     
     # Проверяем, установлена ли дата
     if not has_user_date(user_id):
-        await update.message.reply_text(
-            "❌ Дата не установлена!\n\n"
-            "Сначала установите дату с помощью кнопки '📅 Установить дату'"
-        )
+        await update.message.reply_text(text("date_not_set_button", locale))
         return
     
-    current_notification = get_user_notification(user_id) or "Не настроено"
     target_date = get_user_date(user_id)
     
-    settings_text = f"""
-⚙️ Настройки
-
-📅 Установленная дата: {target_date.strftime('%d.%m.%Y')}
-🔔 Уведомления: {current_notification}
-
-Используйте кнопки клавиатуры для управления:
-• 📅 Установить дату - изменить дату
-• 🔔 Уведомления - настроить уведомления
-    """
-    
-    await update.message.reply_text(settings_text)
+    await update.message.reply_text(text(
+        "settings_menu", locale,
+        date=target_date.strftime('%d.%m.%Y'),
+        notification=get_user_notification(user_id) or text("not_configured", locale),
+        zone=get_user_timezone(user_id)
+    ))
 
 
 async def show_time_left_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Показать оставшееся время через текстовое сообщение"""
-    user_id = update.message.from_user.id
-    
-    if not has_user_date(user_id):
-        await update.message.reply_text(
-            "❌ Дата не установлена!\n\n"
-            "Сначала установите дату с помощью кнопки '📅 Установить дату'"
-        )
-        return
-    
-    target_date = get_user_date(user_id)
-    
-    if is_date_passed(target_date):
-        await update.message.reply_text(
-            "🎉 Установленная дата уже наступила!\n\n"
-            "Установите новую дату с помощью кнопки '📅 Установить дату'"
-        )
-        return
-    
-    # Вычисляем разность
-    days, hours, minutes = calculate_time_left(target_date)
-    
-    # Формируем сообщение
-    time_text = format_time_left(days, hours, minutes, target_date)
-    
-    # Добавляем информацию об уведомлениях
-    if has_user_notification(user_id):
-        notification_time = get_user_notification(user_id)
-        time_text += f"\n\n🔔 Уведомления настроены на {notification_time}"
-    else:
-        time_text += f"\n\n🔕 Уведомления не настроены. Используйте кнопку '🔔 Уведомления' для настройки."
-    
-    await update.message.reply_text(time_text)
+    locale = user_locale(update.effective_user)
+    await update.message.reply_text(compose_time_left(update.message.from_user.id, locale, "button"))
 
 
 async def set_date(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Начало процесса установки даты"""
-    logger.info(f"Пользователь {update.message.from_user.id} нажал кнопку '📅 Установить дату'")
+    hot_log.event("set_date_button", "Пользователь %d нажал кнопку установки даты", update.message.from_user.id,
+                  user_id=update.message.from_user.id)
     # Импортируем функцию из conversations
     from handlers.conversations import start_set_date
     await start_set_date(update, context)
@@ -152,4 +81,16 @@ async def notifications_command(update: Update, context: ContextTypes.DEFAULT_TY
     """Начало процесса настройки уведомлений"""
     # Импортируем функцию из conversations
     from handlers.conversations import start_notifications
-    await start_notifications(update, context) 
\ No newline at end of file
+    await start_notifications(update, context)
+
+
+# Кнопки постоянной клавиатуры и их обработчики на всех языках (маршруты регистрируются в setup_handlers)
+KEYBOARD_BUTTONS = {
+    label: handler
+    for key, handler in (
+        ("button_settings", show_settings_keyboard),
+        ("button_time_left", show_time_left_menu),
+        ("button_back", show_main_keyboard),
+    )
+    for label in variants(key)
+}
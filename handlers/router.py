@@ -0,0 +1,153 @@
+"""
+Маршрутизатор обновлений
+
+Вместо цепочки MessageHandler с filters.Regex, через которую последовательно
+проходит каждое сообщение, команды, тексты кнопок и callback_data
+раскладываются по словарям и находятся одним поиском по хэшу. Регулярные
+выражения остаются только как запасной вариант для текстов, которые нельзя
+описать точным совпадением.
+
+Порядок проверки повторяет прежний порядок обработчиков:
+    1. команды
+    2. вложенные обработчики (диалоги ConversationHandler) - по очереди
+    3. точные тексты кнопок, затем регулярные выражения
+    4. callback_data, затем общий обработчик callback-кнопок
+"""
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from telegram import Message, Update
+from telegram.ext import BaseHandler, filters
+
+logger = logging.getLogger(__name__)
+
+# Обработчик маршрута: (update, context) -> корутина
+RouteCallback = Callable[[Update, Any], Awaitable[Any]]
+
+
+class ExactText(filters.MessageFilter):
+    """Фильтр точного совпадения текста сообщения (проверка по множеству вместо регулярного выражения)"""
+
+    def __init__(self, *texts: str):
+        self.texts = frozenset(texts)
+        super().__init__(name=f"ExactText({', '.join(sorted(self.texts))})")
+
+    def filter(self, message: Message) -> bool:
+        return message.text in self.texts
+
+
+class UpdateRouter(BaseHandler):
+    """Один обработчик приложения, который выбирает маршрут поиском по словарям"""
+
+    def __init__(self, block: bool = True):
+        super().__init__(self._not_routed, block=block)
+        self._commands: Dict[str, RouteCallback] = {}
+        self._buttons: Dict[str, RouteCallback] = {}
+        self._callback_data: Dict[str, RouteCallback] = {}
+        self._patterns: List[Tuple[re.Pattern, RouteCallback]] = []
+        self._handlers: List[BaseHandler] = []
+        self._callback_fallback: Optional[RouteCallback] = None
+
+    @staticmethod
+    async def _not_routed(update: Update, context: Any) -> None:
+        """Заглушка для BaseHandler: вызов идет через handle_update"""
+
+    def add_command(self, command: str, callback: RouteCallback) -> None:
+        """Добавить команду (без символа "/")"""
+        self._commands[command.lower()] = callback
+
+    def add_button(self, text: str, callback: RouteCallback) -> None:
+        """Добавить точный текст кнопки клавиатуры"""
+        self._buttons[text] = callback
+
+    def add_callback_data(self, data: str, callback: RouteCallback) -> None:
+        """Добавить точное значение callback_data inline-кнопки"""
+        self._callback_data[data] = callback
+
+    def add_pattern(self, pattern: str, callback: RouteCallback) -> None:
+        """Добавить регулярное выражение для текстов без точного совпадения"""
+        self._patterns.append((re.compile(pattern), callback))
+
+    def add_handler(self, handler: BaseHandler) -> None:
+        """Добавить вложенный обработчик (например, ConversationHandler), проверяется после команд"""
+        self._handlers.append(handler)
+
+    def set_callback_fallback(self, callback: RouteCallback) -> None:
+        """Обработчик callback-кнопок, для которых не нашлось маршрута"""
+        self._callback_fallback = callback
+
+    def route_count(self) -> int:
+        """Количество маршрутов"""
+        return (len(self._commands) + len(self._buttons) + len(self._callback_data)
+                + len(self._patterns) + len(self._handlers))
+
+    def _command_route(self, message: Message, text: str) -> Optional[RouteCallback]:
+        """Найти команду по тексту вида "/команда[@бот] аргументы" """
+        words = text[1:].split(maxsplit=1)
+        if not words:
+            return None
+        command, _, bot_name = words[0].partition("@")
+        callback = self._commands.get(command.lower())
+        if callback is not None and bot_name:
+            # Команда, адресованная другому боту в группе
+            username = message.get_bot().username
+            if username and bot_name.lower() != username.lower():
+                return None
+        return callback
+
+    def check_update(self, update: object) -> Optional[Tuple[Optional[BaseHandler], object, Optional[List[str]]]]:
+        """
+        Выбрать маршрут для обновления
+
+        Returns:
+            (вложенный обработчик, результат его check_update, None) или (None, функция маршрута,
+            аргументы команды или None); None, если обновление не подходит ни одному маршруту
+        """
+        if not isinstance(update, Update):
+            return None
+
+        message = update.message
+        text = message.text if message is not None else None
+        if text and text[0] == "/":
+            callback = self._command_route(message, text)
+            if callback is not None:
+                # Как у CommandHandler: аргументы - слова после команды
+                return None, callback, text.split()[1:]
+
+        for handler in self._handlers:
+            check = handler.check_update(update)
+            if check is not None and check is not False:
+                return handler, check, None
+
+        if text:
+            callback = self._buttons.get(text)
+            if callback is not None:
+                return None, callback, None
+            for pattern, callback in self._patterns:
+                if pattern.match(text):
+                    return None, callback, None
+            return None
+
+        query = update.callback_query
+        if query is not None:
+            callback = self._callback_data.get(query.data) if query.data is not None else None
+            if callback is None:
+                callback = self._callback_fallback
+            if callback is not None:
+                return None, callback, None
+        return None
+
+    def collect_additional_context(self, context, update: Update, application, check_result) -> None:
+        """Передать маршруту команды ее аргументы в context.args (вложенные обработчики делают это сами)"""
+        args = check_result[2]
+        if args is not None:
+            context.args = args
+
+    async def handle_update(self, update: Update, application, check_result, context) -> Any:
+        """Передать обновление выбранному маршруту"""
+        handler, target, _ = check_result
+        if handler is not None:
+            return await handler.handle_update(update, application, target, context)
+        self.collect_additional_context(context, update, application, check_result)
+        return await target(update, context)
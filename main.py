@@ -1,95 +1,393 @@
 """
 Основной файл Telegram бота для отсчета времени до даты
 """
+import asyncio
 import logging
+import signal
+from typing import Optional
+
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from telegram.ext import (
+    Application, CommandHandler, MessageHandler, CallbackQueryHandler, InlineQueryHandler, TypeHandler, filters
+)
 
-from config import BOT_TOKEN
-from handlers.commands import start_command, help_command, time_left_command
-from handlers.keyboard import handle_keyboard_button
+from config import (
+    BOT_TOKEN, STORAGE_BACKEND, STORAGE_PATH, STORAGE_FLUSH_INTERVAL,
+    SEND_WORKERS, SEND_GLOBAL_RATE, SEND_PER_CHAT_INTERVAL, SEND_DEADLINE, SEND_UNREACHABLE_AFTER,
+    UPDATE_MODE, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET,
+    WEBHOOK_QUEUE_SIZE, WEBHOOK_MAX_CONNECTIONS, METRICS_HOST, METRICS_PORT, ALLOWED_UPDATES,
+    SHARD_COUNT, SHARD_INDEX, DELIVERY_JOURNAL_PATH, CATCHUP_GRACE_MINUTES, LIVE_COUNTDOWNS_PATH, LIVE_EDIT_RATE,
+    SHUTDOWN_TIMEOUT, UPDATE_CONCURRENCY, UPDATE_LANE_LIMIT, BROADCAST_PATH, BROADCAST_RATE,
+    LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE, LOG_SUMMARY_INTERVAL
+)
+from handlers.commands import (
+    start_command, help_command, time_left_command, timezone_command, live_command, countdown_command,
+    reactivate_on_update, stats_command, broadcast_command
+)
+from handlers.inline import inline_query, inline_cache
+from handlers.keyboard import KEYBOARD_BUTTONS
+from handlers.router import UpdateRouter, ExactText
 from handlers.conversations import (
     start_set_date, start_notifications, process_date_input, process_notification_time, 
     conversation_button_callback, cancel, WAITING_FOR_DATE, WAITING_FOR_NOTIFICATION_TIME
 )
-from services.scheduler_service import start_scheduler, set_application
-
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+from services import scheduler_service
+from services.delivery_journal import DeliveryJournal
+from services.live_countdown import LiveCountdownService, set_live_countdowns, get_live_countdowns
+from services.arrival_timer import ArrivalTimer, set_arrival_timer, get_arrival_timer
+from services.broadcast import BroadcastService, set_broadcast, get_broadcast
+from services.dispatcher import MINUTES_PER_DAY
+from services.metrics import timed, register_gauge_callback, start_metrics_server, stop_metrics_server
+from services.scheduler_service import (
+    scheduler, start_scheduler, stop_scheduler, set_application, restore_notification_jobs, set_journal,
+    utc_minute, catch_up_missed_notifications, prune_unreachable_chat
+)
+from services.sender import OutboundSender, set_sender, get_sender
+from services.systemd import ReadinessRequest, notify, watchdog_interval, watchdog_loop
+from services.update_lanes import UserLaneProcessor
+from services.webhook import WebhookReceiver
+from utils.log import setup_logging, stop_logging
+from utils.messages import variants
+from utils.storage import (
+    init_storage, close_storage, count_users, count_inactive_users, countdown_store, countdown_index, date_index
 )
+from utils.time_utils import countdown_cache
+from utils.storage_backends import create_backend
+
+# Настройка логирования: записи форматирует и пишет фоновый поток
+setup_logging(logging.getLevelName(LOG_LEVEL), LOG_FORMAT, LOG_SAMPLE_RATE, LOG_SUMMARY_INTERVAL)
 logger = logging.getLogger(__name__)
 
 
 def setup_handlers(application: Application) -> None:
     """Настройка обработчиков для приложения"""
     
+    # Любое обновление от пользователя, помеченного недоступным, возвращает ему уведомления
+    application.add_handler(TypeHandler(Update, reactivate_on_update), group=-1)
+    
     # Создаем ConversationHandler для установки даты
     from telegram.ext import ConversationHandler
     date_conv_handler = ConversationHandler(
         entry_points=[
-            CommandHandler("set_date", start_set_date),
-            MessageHandler(filters.Regex(r'^📅 Установить дату$'), start_set_date)
+            CommandHandler("set_date", timed(start_set_date)),
+            MessageHandler(ExactText(*variants("button_set_date")), timed(start_set_date))
         ],
         states={
             WAITING_FOR_DATE: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, process_date_input),
-                CallbackQueryHandler(conversation_button_callback)
+                MessageHandler(filters.TEXT & ~filters.COMMAND, timed(process_date_input)),
+                CallbackQueryHandler(timed(conversation_button_callback))
             ]
         },
-        fallbacks=[CommandHandler("cancel", cancel)]
+        fallbacks=[CommandHandler("cancel", timed(cancel))]
     )
     
     # Создаем ConversationHandler для настройки уведомлений
     notification_conv_handler = ConversationHandler(
         entry_points=[
-            CommandHandler("notifications", start_notifications),
-            MessageHandler(filters.Regex(r'^🔔 Уведомления$'), start_notifications)
+            CommandHandler("notifications", timed(start_notifications)),
+            MessageHandler(ExactText(*variants("button_notifications")), timed(start_notifications))
         ],
         states={
             WAITING_FOR_NOTIFICATION_TIME: [
-                MessageHandler(filters.TEXT & ~filters.COMMAND, process_notification_time),
-                CallbackQueryHandler(conversation_button_callback)
+                MessageHandler(filters.TEXT & ~filters.COMMAND, timed(process_notification_time)),
+                CallbackQueryHandler(timed(conversation_button_callback))
             ]
         },
-        fallbacks=[CommandHandler("cancel", cancel)]
+        fallbacks=[CommandHandler("cancel", timed(cancel))]
+    )
+    
+    # Все маршруты собраны в одном обработчике: команды, кнопки и callback_data ищутся по словарям
+    router = UpdateRouter()
+    router.add_command("start", timed(start_command))
+    router.add_command("help", timed(help_command))
+    router.add_command("time_left", timed(time_left_command))
+    router.add_command("timezone", timed(timezone_command))
+    router.add_command("live", timed(live_command))
+    router.add_command("countdown", timed(countdown_command))
+    router.add_command("stats", timed(stats_command))
+    router.add_command("broadcast", timed(broadcast_command))
+    
+    # Диалоги проверяются после команд, но раньше кнопок, чтобы текст внутри диалога попадал в него
+    router.add_handler(date_conv_handler)
+    router.add_handler(notification_conv_handler)
+    
+    # Кнопки постоянной клавиатуры (кроме кнопок, которые начинают диалоги)
+    for text, handler in KEYBOARD_BUTTONS.items():
+        router.add_button(text, timed(handler))
+    
+    # Callback кнопки без отдельного маршрута
+    router.set_callback_fallback(timed(conversation_button_callback))
+    
+    application.add_handler(router)
+    
+    # Inline-запросы (@bot 25.12.2026) маршрутизатор не принимает, у них отдельный обработчик
+    application.add_handler(InlineQueryHandler(timed(inline_query)))
+
+
+def register_metrics(application: Application) -> None:
+    """Зарегистрировать показатели, которые считаются в момент запроса метрик"""
+    processor = application.update_processor
+    if isinstance(processor, UserLaneProcessor):
+        register_gauge_callback("timebot_update_lanes", "Пользователей с обновлениями в обработке", processor.lane_count)
+        register_gauge_callback(
+            "timebot_updates_dropped", "Обновлений, отброшенных из-за переполнения очереди пользователя",
+            lambda: processor.stats["dropped"]
+        )
+    register_gauge_callback("timebot_users", "Пользователей в хранилище", count_users)
+    register_gauge_callback(
+        "timebot_notification_subscribers", "Пользователей с уведомлениями", lambda: len(scheduler_service.dispatcher)
+    )
+    register_gauge_callback(
+        "timebot_notification_minutes", "Различных минут уведомлений", lambda: scheduler_service.dispatcher.bucket_count()
+    )
+    register_gauge_callback("timebot_named_countdowns", "Именованных отсчетов", lambda: len(countdown_store))
+    register_gauge_callback(
+        "timebot_named_countdowns_pending", "Именованных отсчетов, дата которых не наступила",
+        lambda: len(countdown_index)
+    )
+    register_gauge_callback(
+        "timebot_pending_dates", "Дат, наступление которых еще не обработано",
+        lambda: len(date_index) + len(countdown_index)
+    )
+    register_gauge_callback(
+        "timebot_arrivals_sent", "Сообщений о наступлении дат с запуска",
+        lambda: get_arrival_timer().stats["arrivals"] + get_arrival_timer().stats["countdown_arrivals"]
+    )
+    register_gauge_callback("timebot_inactive_users", "Пользователей, до которых не доходят сообщения", count_inactive_users)
+    register_gauge_callback(
+        "timebot_chats_pruned", "Недоступных чатов, отключенных с запуска", lambda: scheduler_service.prune_stats["pruned"]
+    )
+    register_gauge_callback(
+        "timebot_chats_reactivated", "Отключенных пользователей, вернувшихся с запуска",
+        lambda: scheduler_service.prune_stats["reactivated"]
+    )
+    register_gauge_callback("timebot_send_queue_pending", "Сообщений в очереди отправки", lambda: get_sender().pending())
+    register_gauge_callback(
+        "timebot_countdown_cache_hit_rate", "Доля попаданий в кэш текстов отсчета", lambda: countdown_cache.stats()["hit_rate"]
+    )
+    register_gauge_callback(
+        "timebot_inline_cache_hit_rate", "Доля inline-запросов из кэша результатов", lambda: inline_cache.stats()["hit_rate"]
+    )
+    register_gauge_callback("timebot_live_countdowns", "Живых отсчетов", lambda: len(get_live_countdowns().entries))
+    register_gauge_callback(
+        "timebot_live_countdown_edits", "Правок живых отсчетов с запуска", lambda: get_live_countdowns().stats["edits"]
+    )
+    register_gauge_callback(
+        "timebot_live_countdown_skipped", "Пропущенных поминутных правок с запуска",
+        lambda: get_live_countdowns().stats["skipped"]
     )
+
+
+async def post_init(application: Application) -> None:
+    """Действия после инициализации приложения (внутри цикла событий)"""
+    if METRICS_PORT:
+        await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    
+    # Досылаем уведомления, пропущенные пока бот был остановлен
+    await catch_up_missed_notifications()
+    
+    # Живые отсчеты проверяются сразу после запуска и дальше по своей куче событий
+    get_live_countdowns().start()
     
-    # Добавляем обработчики команд
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("time_left", time_left_command))
+    # Наступление дат отслеживает один таймер по куче ближайших дат
+    get_arrival_timer().start()
     
-    # Добавляем обработчики диалогов (должны быть перед общими обработчиками)
-    application.add_handler(date_conv_handler)
-    application.add_handler(notification_conv_handler)
+    # Рассылка администратора, прерванная остановкой бота, продолжается с сохраненного курсора
+    get_broadcast().start()
+
+
+def stop_on_signals() -> asyncio.Event:
+    """Событие, которое выставляется по SIGINT и SIGTERM"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    return stop_event
+
+
+def start_watchdog(application: Application) -> Optional[asyncio.Task]:
+    """Запустить пинги watchdog systemd (если он включен в юните)"""
+    interval = watchdog_interval()
+    if interval is None:
+        return None
     
-    # Добавляем обработчик для кнопок клавиатуры (только для кнопок, не обрабатываемых ConversationHandler)
-    keyboard_filter = filters.Regex(r'^(⚙️ Настройки|⏰ Оставшееся время|🔙 Назад)$')
-    application.add_handler(MessageHandler(keyboard_filter, handle_keyboard_button))
+    def healthy() -> bool:
+        # Пинг идет из цикла событий, поэтому зависший цикл тоже останавливает пинги
+        return scheduler.running and (application.updater is None or application.updater.running)
     
-    # Добавляем обработчик для callback кнопок (в самом конце)
-    application.add_handler(CallbackQueryHandler(conversation_button_callback))
+    logger.info(f"Watchdog systemd включен: пинг каждые {interval:.1f} с")
+    return asyncio.create_task(watchdog_loop(interval, healthy), name="systemd-watchdog")
+
+
+async def graceful_shutdown(application: Application, receiver: Optional[WebhookReceiver] = None,
+                            watchdog: Optional[asyncio.Task] = None) -> None:
+    """
+    Остановить бота без потери работы (не дольше SHUTDOWN_TIMEOUT)
+    
+    Сначала бот перестает принимать обновления и создавать новые сообщения,
+    затем дорабатывает уже принятые обновления и досылает очередь отправки.
+    Данные хранилища и журнал сбрасываются на диск после этого в main().
+    """
+    notify("STOPPING=1", "STATUS=Завершение работы")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SHUTDOWN_TIMEOUT
+    logger.info(f"Остановка бота: завершение работы не дольше {SHUTDOWN_TIMEOUT:.0f} с")
+    
+    # Новые обновления больше не принимаются
+    if receiver is not None:
+        await receiver.stop()
+    if application.updater is not None and application.updater.running:
+        await application.updater.stop()
+    
+    # Новые уведомления, правки и поздравления больше не создаются
+    if scheduler.running:
+        stop_scheduler()
+    await get_arrival_timer().stop()
+    await get_live_countdowns().stop()
+    await get_broadcast().stop()
+    
+    # Дорабатываем обновления, которые уже приняты
+    if application.running:
+        try:
+            await asyncio.wait_for(application.stop(), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            logger.warning("Не все принятые обновления обработаны до истечения времени остановки")
+    
+    # Досылаем очередь исходящих сообщений
+    sender = get_sender()
+    undelivered = await sender.drain(max(0.0, deadline - loop.time()))
+    if undelivered:
+        logger.warning(f"При остановке не доставлено сообщений: {undelivered}")
+    await sender.stop()
+    
+    # Эндпоинт метрик закрывается последним, чтобы остановку было видно в метриках
+    await stop_metrics_server()
+    if watchdog is not None:
+        watchdog.cancel()
+    logger.info("Бот остановлен")
+
+
+async def run_polling(application: Application) -> None:
+    """Запустить бота в режиме polling"""
+    stop_event = stop_on_signals()
+    
+    async with application:
+        await post_init(application)
+        await application.start()
+        start_scheduler()
+        
+        # Готовность сообщается после первого успешного getUpdates (см. ReadinessRequest)
+        await application.updater.start_polling(allowed_updates=ALLOWED_UPDATES)
+        logger.info("🤖 Бот запущен с поддержкой уведомлений...")
+        watchdog = start_watchdog(application)
+        
+        try:
+            await stop_event.wait()
+        finally:
+            await graceful_shutdown(application, watchdog=watchdog)
+
+
+async def run_webhook(application: Application) -> None:
+    """Запустить бота в режиме webhook (или воркера шарда) со встроенным HTTP сервером"""
+    receiver = WebhookReceiver(
+        application,
+        path=WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        host=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT
+    )
+    
+    stop_event = stop_on_signals()
+    
+    async with application:
+        await post_init(application)
+        await application.start()
+        start_scheduler()
+        await receiver.start()
+        if UPDATE_MODE == 'shard':
+            # Обновления присылает фронт шардирования, webhook в Telegram не регистрируется
+            logger.info(f"🤖 Воркер шарда {SHARD_INDEX + 1}/{SHARD_COUNT} запущен на {WEBHOOK_LISTEN}:{WEBHOOK_PORT}...")
+        else:
+            await application.bot.set_webhook(
+                url=WEBHOOK_URL,
+                secret_token=WEBHOOK_SECRET or None,
+                allowed_updates=ALLOWED_UPDATES,
+                max_connections=WEBHOOK_MAX_CONNECTIONS
+            )
+            logger.info(f"🤖 Бот запущен в режиме webhook ({WEBHOOK_URL})...")
+        
+        # Обновления начнут приходить сразу: бот готов
+        notify("READY=1", f"STATUS=Работает ({UPDATE_MODE})")
+        watchdog = start_watchdog(application)
+        
+        try:
+            await stop_event.wait()
+        finally:
+            await graceful_shutdown(application, receiver, watchdog)
 
 
 def main() -> None:
     """Запуск бота"""
     # Создаем приложение
-    application = Application.builder().token(BOT_TOKEN).build()
+    builder = Application.builder().token(BOT_TOKEN)
+    if UPDATE_MODE in ('webhook', 'shard'):
+        # Ограниченная очередь обновлений: при переполнении webhook отвечает 503
+        builder = builder.update_queue(asyncio.Queue(maxsize=WEBHOOK_QUEUE_SIZE)).updater(None)
+    else:
+        # systemd узнает о готовности, когда polling получил первый ответ Telegram
+        builder = builder.get_updates_request(
+            ReadinessRequest(lambda: notify("READY=1", "STATUS=Работает (polling)"))
+        )
+    if UPDATE_CONCURRENCY > 1:
+        # Пользователи обрабатываются параллельно, обновления одного пользователя - по порядку
+        builder = builder.concurrent_updates(UserLaneProcessor(UPDATE_CONCURRENCY, UPDATE_LANE_LIMIT))
+    application = builder.build()
     
     # Устанавливаем ссылку на приложение в сервисе планировщика
     set_application(application)
     
-    # Настраиваем обработчики
+    # Все сообщения по инициативе бота идут через очередь с ограничением скорости
+    set_sender(OutboundSender(
+        application.bot,
+        workers=SEND_WORKERS,
+        global_rate=SEND_GLOBAL_RATE,
+        per_chat_interval=SEND_PER_CHAT_INTERVAL,
+        deadline=SEND_DEADLINE,
+        transient_threshold=SEND_UNREACHABLE_AFTER,
+        on_unreachable=prune_unreachable_chat
+    ))
+    
+    # Настраиваем обработчики и метрики
     setup_handlers(application)
+    register_metrics(application)
+    
+    # Загружаем пользователей из хранилища и восстанавливаем их уведомления
+    init_storage(create_backend(STORAGE_BACKEND, STORAGE_PATH), STORAGE_FLUSH_INTERVAL)
+    restore_notification_jobs()
+    
+    # Журнал доставок: какие уведомления уже доставлены и когда бот последний раз работал
+    journal = DeliveryJournal(DELIVERY_JOURNAL_PATH)
+    journal.open(utc_minute() // MINUTES_PER_DAY)
+    set_journal(journal, CATCHUP_GRACE_MINUTES)
     
-    # Запускаем планировщик
-    start_scheduler()
+    # Живые отсчеты в закрепленных сообщениях
+    live_countdowns = LiveCountdownService(application.bot, LIVE_COUNTDOWNS_PATH, LIVE_EDIT_RATE)
+    live_countdowns.load()
+    set_live_countdowns(live_countdowns)
+    set_arrival_timer(ArrivalTimer(CATCHUP_GRACE_MINUTES))
+    broadcast = BroadcastService(application.bot, BROADCAST_PATH, BROADCAST_RATE)
+    broadcast.load()
+    set_broadcast(broadcast)
     
-    # Запускаем бота
-    logger.info("🤖 Бот запущен с поддержкой уведомлений...")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    try:
+        if UPDATE_MODE in ('webhook', 'shard'):
+            asyncio.run(run_webhook(application))
+        else:
+            asyncio.run(run_polling(application))
+    finally:
+        journal.close()
+        close_storage()
+        stop_logging()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,183 @@
+"""
+Точная доставка сообщений о наступлении даты
+
+Основные даты пользователей и даты именованных отсчетов лежат в индексированных
+min-кучах хранилища (date_index и countdown_index) по минуте наступления в UTC.
+Один цикл на все даты спит до ближайшей из двух куч, в момент наступления
+забирает из них всех, чья дата пришлась на эту минуту, и одной пачкой ставит
+поздравления в очередь отправки. Уведомления таких дат сразу убираются из
+диспетчеров, поэтому ежедневная рассылка больше не натыкается на прошедшие даты.
+
+Задач планировщика на пользователя нет: постановка и отмена даты - операции
+кучи за O(log n). После изменения даты или часового пояса обработчики будят
+цикл (wake_arrival_timer), чтобы он пересчитал время сна.
+
+Даты, наступившие пока бот не работал, при запуске досылаются, если опоздание
+не больше окна досылки (как у уведомлений); более старые убираются из куч молча.
+Недоступным пользователям (заблокировали бота) сообщения не отправляются.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from utils.messages import get_user_locale, text
+from utils.storage import (
+    get_user_date, get_countdown, next_date, next_countdown, pop_reached_dates, pop_reached_countdowns,
+    is_user_inactive
+)
+from services.sender import get_sender
+from services.scheduler_service import remove_notification_job, remove_countdown_notification
+
+logger = logging.getLogger(__name__)
+
+# Максимальное время сна: страховка на случай, если цикл не разбудили после изменения даты
+MAX_SLEEP = 3600.0
+
+
+class ArrivalTimer:
+    """Один таймер на наступление всех дат"""
+
+    def __init__(self, grace_minutes: int = 180):
+        """
+        Args:
+            grace_minutes: сколько минут после наступления даты сообщение о ней еще отправляется
+        """
+        self.grace_minutes = grace_minutes
+        self.stats: Dict[str, int] = {"arrivals": 0, "countdown_arrivals": 0, "stale": 0, "inactive": 0}
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запустить цикл в текущем цикле событий"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="arrival-timer")
+        logger.info("Таймер наступления дат запущен")
+
+    async def stop(self) -> None:
+        """Остановить цикл"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def wake(self) -> None:
+        """Пересчитать время сна (после изменения дат или часового пояса)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @staticmethod
+    def next_deadline() -> Optional[int]:
+        """Ближайшая минута наступления по UTC от 1970-01-01 среди всех дат (None, если дат нет)"""
+        heads = [head[0] for head in (next_date(), next_countdown()) if head is not None]
+        return min(heads) if heads else None
+
+    async def _run(self) -> None:
+        """Цикл: обработать наступившие даты и уснуть до ближайшей следующей"""
+        while True:
+            self._wakeup.clear()
+            try:
+                self.fire(time.time())
+            except Exception as e:
+                logger.error(f"Ошибка в таймере наступления дат: {e}")
+
+            deadline = self.next_deadline()
+            delay = MAX_SLEEP if deadline is None else min(MAX_SLEEP, max(0.0, deadline * 60 - time.time()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def fire(self, now: float) -> int:
+        """
+        Поставить в очередь сообщения обо всех датах, наступивших к моменту now
+
+        Args:
+            now: текущий момент (unix timestamp)
+
+        Returns:
+            int: количество поставленных в очередь сообщений
+        """
+        current = int(now) // 60
+        users = pop_reached_dates(current)
+        countdowns = pop_reached_countdowns(current)
+        if not users and not countdowns:
+            return 0
+
+        stale_before = current - self.grace_minutes
+        sender = get_sender()
+        queued = 0
+
+        for user_id in users:
+            remove_notification_job(user_id)
+            target_date = get_user_date(user_id)
+            if target_date is None or self._is_stale(target_date, stale_before):
+                self.stats["stale"] += 1
+                continue
+            if is_user_inactive(user_id):
+                self.stats["inactive"] += 1
+                continue
+            locale = get_user_locale(user_id)
+            if self._submit(sender, user_id, text("date_arrived", locale, date=target_date.strftime('%d.%m.%Y'))):
+                self.stats["arrivals"] += 1
+                queued += 1
+
+        for countdown_id in countdowns:
+            remove_countdown_notification(countdown_id)
+            countdown = get_countdown(countdown_id)
+            if countdown is None or self._is_stale(countdown[2], stale_before):
+                self.stats["stale"] += 1
+                continue
+            user_id, name, target_date, _ = countdown
+            if is_user_inactive(user_id):
+                self.stats["inactive"] += 1
+                continue
+            locale = get_user_locale(user_id)
+            message = text("countdown_arrived", locale, name=name, date=target_date.strftime('%d.%m.%Y'))
+            if self._submit(sender, user_id, message):
+                self.stats["countdown_arrivals"] += 1
+                queued += 1
+
+        logger.info(f"Наступление дат: {len(users)} основных, {len(countdowns)} отсчетов, "
+                    f"сообщений в очереди {queued}")
+        return queued
+
+    @staticmethod
+    def _is_stale(target_date: datetime, stale_before: int) -> bool:
+        """Дата наступила раньше окна досылки"""
+        return int(target_date.timestamp()) // 60 < stale_before
+
+    @staticmethod
+    def _submit(sender, user_id: int, message: str) -> bool:
+        """Поставить сообщение в очередь отправки"""
+        if sender is None:
+            logger.error(f"Очередь исходящих сообщений недоступна для сообщения пользователю {user_id}")
+            return False
+        sender.submit(user_id, message)
+        return True
+
+
+# Глобальный таймер наступления дат
+_arrival_timer: Optional[ArrivalTimer] = None
+
+
+def set_arrival_timer(timer: ArrivalTimer) -> None:
+    """Установить глобальный таймер наступления дат"""
+    global _arrival_timer
+    _arrival_timer = timer
+
+
+def get_arrival_timer() -> Optional[ArrivalTimer]:
+    """Получить глобальный таймер наступления дат"""
+    return _arrival_timer
+
+
+def wake_arrival_timer() -> None:
+    """Разбудить таймер наступления дат (если он запущен)"""
+    if _arrival_timer is not None:
+        _arrival_timer.wake()
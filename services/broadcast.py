@@ -0,0 +1,251 @@
+"""
+Рассылка администратора всем пользователям с продолжением после остановки
+
+Пользователи обходятся по возрастанию ID, поэтому позицию рассылки задает
+одно число - ID последнего пользователя, которому сообщение поставлено в
+очередь (курсор). Курсор вместе с текстом и счетчиками периодически
+сохраняется в файл: после перезапуска рассылка продолжается со следующего
+ID. Сообщения, поставленные в очередь после последнего сохранения, при
+аварийной остановке могут прийти повторно.
+
+Рассылка идет через общую очередь отправки, но уступает уведомлениям: новое
+сообщение ставится, только когда в очереди почти ничего нет, и не чаще
+BROADCAST_RATE в секунду. Когда минутная рассылка уведомлений заполняет
+очередь, рассылка администратора ждет, пока очередь разберется.
+
+Ход рассылки бот показывает администратору в одном сообщении, которое
+редактирует не чаще раза в PROGRESS_INTERVAL секунд.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from telegram.error import BadRequest, TelegramError
+
+from services.sender import TokenBucket, OutboundMessage, OUTCOME_SENT, get_sender
+from services.sharding import shard_label
+from utils.messages import get_user_locale, text
+from utils.storage import user_ids_after
+
+logger = logging.getLogger(__name__)
+
+# Как часто сохраняется курсор (в сообщениях и в секундах) и обновляется сообщение о ходе рассылки
+CHECKPOINT_EVERY = 100
+CHECKPOINT_INTERVAL = 5.0
+PROGRESS_INTERVAL = 5.0
+
+# Рассылка ставит сообщение, только пока в очереди отправки меньше стольких сообщений
+QUEUE_HEADROOM = 8
+
+
+class BroadcastService:
+    """Одна рассылка администратора за раз, с курсором в файле"""
+
+    def __init__(self, bot, path: str, rate: float = 10.0):
+        """
+        Args:
+            bot: объект telegram.Bot
+            path: путь к файлу состояния рассылки
+            rate: максимум сообщений рассылки в секунду
+        """
+        self.bot = bot
+        self.path = path
+        self.bucket = TokenBucket(rate, capacity=1)
+        self.state: Optional[Dict[str, Any]] = None
+
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Идет ли рассылка"""
+        return self._task is not None and not self._task.done()
+
+    def load(self) -> bool:
+        """
+        Прочитать состояние прерванной рассылки
+
+        Returns:
+            bool: есть ли рассылка, которую нужно продолжить
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                self.state = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.error(f"Не удалось прочитать состояние рассылки: {e}")
+            return False
+        logger.info(f"Найдена прерванная рассылка: {self.state['done']} из {self.state['total']}, "
+                    f"курсор {self.state['cursor']}")
+        return True
+
+    def save(self) -> None:
+        """Записать состояние рассылки (атомарно, через временный файл)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(self.state, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+
+    async def begin(self, message_text: str, admin_chat_id: int) -> None:
+        """
+        Начать новую рассылку
+
+        Args:
+            message_text: текст сообщения
+            admin_chat_id: чат администратора, где показывается ход рассылки
+
+        Raises:
+            RuntimeError: если рассылка уже идет
+        """
+        if self.running:
+            raise RuntimeError("Рассылка уже идет")
+        total = len(user_ids_after(0))
+        locale = get_user_locale(admin_chat_id)
+        status = await self.bot.send_message(
+            chat_id=admin_chat_id,
+            text=shard_label(locale) + text("broadcast_progress", locale, done=0, total=total, percent=0, eta="-")
+        )
+        self.state = {
+            "text": message_text,
+            "admin_chat_id": admin_chat_id,
+            "status_message_id": status.message_id,
+            "cursor": 0,
+            "total": total,
+            "done": 0,
+            "sent": 0,
+            "failed": 0,
+        }
+        self.save()
+        self.start()
+        logger.info(f"Рассылка начата администратором {admin_chat_id}: {total} пользователей")
+
+    def start(self) -> None:
+        """Запустить (или продолжить по курсору) рассылку из состояния в текущем цикле событий"""
+        if self.state is None or self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="broadcast")
+
+    async def stop(self) -> None:
+        """Приостановить рассылку с сохранением курсора (при остановке бота)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def cancel(self) -> bool:
+        """
+        Отменить рассылку насовсем
+
+        Returns:
+            bool: шла ли рассылка
+        """
+        if self.state is None:
+            return False
+        await self.stop()
+        await self._report("broadcast_stopped")
+        self._finish()
+        return True
+
+    def _finish(self) -> None:
+        """Забыть рассылку и удалить файл состояния"""
+        self.state = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _on_outcome(self, message: OutboundMessage) -> None:
+        """Посчитать итог доставки сообщения рассылки"""
+        if self.state is None:
+            return
+        if message.outcome == OUTCOME_SENT:
+            self.state["sent"] += 1
+        else:
+            self.state["failed"] += 1
+
+    async def _run(self) -> None:
+        """Цикл рассылки: по одному пользователю в порядке ID, пока очередь отправки свободна"""
+        state = self.state
+        recipients = user_ids_after(state["cursor"])
+        sender = get_sender()
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        started_done = state["done"]
+        saved_at = reported_at = started_at
+        logger.info(f"Рассылка: осталось {len(recipients)} пользователей")
+
+        try:
+            for user_id in recipients:
+                # Уведомления и ответы пользователям важнее: ждем, пока очередь разберется
+                while sender.pending() >= QUEUE_HEADROOM:
+                    await asyncio.sleep(0.1)
+                await self.bucket.acquire()
+
+                sender.submit(user_id, state["text"], callback=self._on_outcome)
+                state["cursor"] = user_id
+                state["done"] += 1
+
+                now = loop.time()
+                if state["done"] % CHECKPOINT_EVERY == 0 or now - saved_at >= CHECKPOINT_INTERVAL:
+                    self.save()
+                    saved_at = now
+                if now - reported_at >= PROGRESS_INTERVAL:
+                    rate = (state["done"] - started_done) / (now - started_at)
+                    remaining = max(0, state["total"] - state["done"])
+                    await self._report("broadcast_progress", rate=rate, remaining=remaining)
+                    reported_at = now
+        except asyncio.CancelledError:
+            self.save()
+            raise
+
+        # Итог доставки последних сообщений приходит после того, как очередь их отправит
+        await sender.drain(PROGRESS_INTERVAL * 6)
+        await self._report("broadcast_done")
+        logger.info(f"Рассылка завершена: доставлено {state['sent']}, не доставлено {state['failed']}")
+        self._finish()
+        self._task = None
+
+    async def _report(self, key: str, rate: float = 0.0, remaining: int = 0) -> None:
+        """Обновить сообщение о ходе рассылки у администратора"""
+        state = self.state
+        locale = get_user_locale(state["admin_chat_id"])
+        total = state["total"]
+        eta = str(timedelta(seconds=int(remaining / rate))) if rate > 0 else "-"
+        try:
+            await self.bot.edit_message_text(
+                chat_id=state["admin_chat_id"],
+                message_id=state["status_message_id"],
+                text=shard_label(locale) + text(
+                    key, locale, done=state["done"], total=total, sent=state["sent"], failed=state["failed"],
+                    percent=state["done"] * 100 // total if total else 100, eta=eta
+                )
+            )
+        except BadRequest as e:
+            if "not modified" not in str(e):
+                logger.warning(f"Не удалось обновить сообщение о ходе рассылки: {e}")
+        except TelegramError as e:
+            logger.warning(f"Не удалось обновить сообщение о ходе рассылки: {e}")
+
+
+# Глобальный сервис рассылки
+_broadcast: Optional[BroadcastService] = None
+
+
+def set_broadcast(service: BroadcastService) -> None:
+    """Установить глобальный сервис рассылки"""
+    global _broadcast
+    _broadcast = service
+
+
+def get_broadcast() -> Optional[BroadcastService]:
+    """Получить глобальный сервис рассылки"""
+    return _broadcast
@@ -0,0 +1,154 @@
+"""
+Журнал доставки уведомлений
+
+Append-only текстовый файл, в который пишутся три записи:
+    D <день> <ID пользователя>             - уведомление за день доставлено
+    C <день> <ID пользователя> <название>  - уведомление именованного отсчета за день доставлено
+    T <минута>                             - минутная рассылка обработана
+
+День и минута считаются от 1970-01-01 по UTC. Отсчет записывается по владельцу
+и названию (JSON строка), потому что ID отсчета после перезапуска другой.
+При старте журнал читается целиком: дни доставки раскладываются в колонки
+хранилища, а последняя обработанная минута показывает, с какого момента бот
+был недоступен. Чтобы файл не рос бесконечно, он периодически переписывается
+в компактном виде (только записи за последние дни).
+"""
+import json
+import logging
+import os
+from typing import Dict, Optional, TextIO, Tuple
+
+from services.dispatcher import MINUTES_PER_DAY
+from utils.storage import (
+    find_countdown, get_countdown, iter_countdown_delivery_days, iter_delivery_days,
+    set_countdown_delivery_day, set_delivery_day
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryJournal:
+    """Журнал доставленных уведомлений и обработанных минут"""
+
+    def __init__(self, path: str, retention_days: int = 2):
+        """
+        Args:
+            path: путь к файлу журнала
+            retention_days: сколько последних дней хранить при сжатии
+        """
+        self.path = path
+        self.retention_days = retention_days
+        self.last_tick: Optional[int] = None
+        self._file: Optional[TextIO] = None
+        self._compacted_day = 0
+
+    def open(self, today: int) -> int:
+        """
+        Прочитать журнал, применить дни доставки к хранилищу и открыть файл на дозапись
+
+        Вызывается после загрузки хранилища, чтобы у пользователей уже были слоты.
+
+        Args:
+            today: текущий день от 1970-01-01
+
+        Returns:
+            int: количество пользователей с записями о доставке
+        """
+        delivered: Dict[int, int] = {}
+        delivered_countdowns: Dict[Tuple[int, str], int] = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="ascii", errors="replace") as file:
+                for line_number, line in enumerate(file, 1):
+                    parts = line.split(maxsplit=3)
+                    try:
+                        if parts[0] == "D":
+                            day, user_id = int(parts[1]), int(parts[2])
+                            if day > delivered.get(user_id, 0):
+                                delivered[user_id] = day
+                        elif parts[0] == "C":
+                            key = int(parts[2]), json.loads(parts[3])
+                            delivered_countdowns[key] = max(delivered_countdowns.get(key, 0), int(parts[1]))
+                        elif parts[0] == "T":
+                            self.last_tick = max(self.last_tick or 0, int(parts[1]))
+                    except (IndexError, ValueError):
+                        # Недописанная строка после аварийной остановки
+                        logger.warning(f"Пропущена поврежденная строка {line_number} журнала доставок")
+
+        for user_id, day in delivered.items():
+            set_delivery_day(user_id, day)
+        for (user_id, name), day in delivered_countdowns.items():
+            countdown_id = find_countdown(user_id, name)
+            if countdown_id >= 0:
+                set_countdown_delivery_day(countdown_id, day)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.compact(today)
+
+        logger.info(f"Журнал доставок загружен: {len(delivered)} пользователей, "
+                    f"{len(delivered_countdowns)} именованных отсчетов, "
+                    f"последняя обработанная минута: {self.last_tick}")
+        return len(delivered)
+
+    def compact(self, today: int) -> None:
+        """
+        Переписать журнал, оставив только записи за последние retention_days дней
+
+        Args:
+            today: текущий день от 1970-01-01
+        """
+        if self._file is not None:
+            self._file.close()
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="ascii") as file:
+            for user_id, day in iter_delivery_days(today - self.retention_days + 1):
+                file.write(f"D {day} {user_id}\n")
+            for user_id, name, day in iter_countdown_delivery_days(today - self.retention_days + 1):
+                file.write(f"C {day} {user_id} {json.dumps(name)}\n")
+            if self.last_tick is not None:
+                file.write(f"T {self.last_tick}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+
+        self._file = open(self.path, "a", encoding="ascii")
+        self._compacted_day = today
+
+    def record_delivery(self, user_id: int, day: int) -> None:
+        """Записать доставку уведомления за день"""
+        set_delivery_day(user_id, day)
+        self._write(f"D {day} {user_id}\n")
+
+    def record_countdown_delivery(self, countdown_id: int, day: int) -> None:
+        """Записать доставку уведомления именованного отсчета за день (удаленный отсчет пропускается)"""
+        countdown = get_countdown(countdown_id)
+        if countdown is None:
+            return
+        set_countdown_delivery_day(countdown_id, day)
+        self._write(f"C {day} {countdown[0]} {json.dumps(countdown[1])}\n")
+
+    def record_tick(self, minute: int) -> None:
+        """Записать обработанную минуту (при смене дня журнал сжимается)"""
+        self.last_tick = minute
+        day = minute // MINUTES_PER_DAY
+        if day != self._compacted_day and self._file is not None:
+            self.compact(day)
+        self._write(f"T {minute}\n")
+
+    def _write(self, line: str) -> None:
+        """Дописать строку в файл (сброс в ОС сразу, без fsync на каждую запись)"""
+        if self._file is None:
+            return
+        try:
+            self._file.write(line)
+            self._file.flush()
+        except OSError as e:
+            logger.error(f"Ошибка записи в журнал доставок: {e}")
+
+    def close(self) -> None:
+        """Закрыть файл журнала"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
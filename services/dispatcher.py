@@ -0,0 +1,101 @@
+"""
+Диспетчер уведомлений по минутам суток
+
+Вместо отдельной задачи планировщика на каждого пользователя хранится индекс
+"минута суток -> множество пользователей", а одна задача раз в минуту
+забирает всю корзину текущей минуты.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class MinuteDispatcher:
+    """Индекс пользователей по минуте суток (0-1439)"""
+
+    def __init__(self):
+        self._buckets: Dict[int, Set[int]] = {}
+        self._user_minutes: Dict[int, int] = {}
+
+    def add(self, user_id: int, minute_of_day: int) -> None:
+        """
+        Добавить пользователя в корзину минуты (перемещает, если он уже был в другой)
+
+        Args:
+            user_id: ID пользователя
+            minute_of_day: минута суток (0-1439)
+
+        Raises:
+            ValueError: если минута вне диапазона
+        """
+        if not 0 <= minute_of_day < MINUTES_PER_DAY:
+            raise ValueError(f"Минута суток вне диапазона: {minute_of_day}")
+
+        previous = self._user_minutes.get(user_id)
+        if previous == minute_of_day:
+            return
+        if previous is not None:
+            self._discard(user_id, previous)
+
+        self._user_minutes[user_id] = minute_of_day
+        bucket = self._buckets.get(minute_of_day)
+        if bucket is None:
+            bucket = self._buckets[minute_of_day] = set()
+        bucket.add(user_id)
+
+    def add_many(self, entries: Iterable[Tuple[int, int]]) -> int:
+        """
+        Массово добавить пользователей
+
+        Args:
+            entries: пары (user_id, минута суток)
+
+        Returns:
+            int: количество добавленных пользователей
+        """
+        count = 0
+        for user_id, minute_of_day in entries:
+            self.add(user_id, minute_of_day)
+            count += 1
+        return count
+
+    def remove(self, user_id: int) -> bool:
+        """
+        Удалить пользователя из индекса
+
+        Returns:
+            bool: True если пользователь был в индексе
+        """
+        minute_of_day = self._user_minutes.pop(user_id, None)
+        if minute_of_day is None:
+            return False
+        self._discard(user_id, minute_of_day)
+        return True
+
+    def _discard(self, user_id: int, minute_of_day: int) -> None:
+        """Убрать пользователя из корзины и удалить пустую корзину"""
+        bucket = self._buckets.get(minute_of_day)
+        if bucket is None:
+            return
+        bucket.discard(user_id)
+        if not bucket:
+            del self._buckets[minute_of_day]
+
+    def get_minute(self, user_id: int) -> Optional[int]:
+        """Получить минуту суток пользователя"""
+        return self._user_minutes.get(user_id)
+
+    def due(self, minute_of_day: int) -> List[int]:
+        """Получить снимок корзины минуты (безопасно изменять индекс во время рассылки)"""
+        bucket = self._buckets.get(minute_of_day)
+        return list(bucket) if bucket else []
+
+    def bucket_count(self) -> int:
+        """Количество непустых корзин"""
+        return len(self._buckets)
+
+    def __len__(self) -> int:
+        return len(self._user_minutes)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._user_minutes
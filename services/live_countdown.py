@@ -0,0 +1,414 @@
+"""
+Живой отсчет в закрепленном сообщении
+
+Пользователь включает его командой /live: бот отправляет сообщение с
+оставшимся временем, закрепляет его и дальше только редактирует. Точность
+выбирает пользователь (минута, час, день).
+
+Перебора всех отсчетов по таймеру нет: каждый отсчет лежит в min-куче по
+моменту, когда его текст может измениться (следующая граница минуты, часа или
+дня до целевой даты). Цикл спит до ближайшего момента, заново получает текст
+через общий кэш render_time_left и ставит правку только если текст изменился.
+
+Правки расходуют собственный бюджет (LIVE_EDIT_RATE в секунду) и токены общего
+ограничителя очереди отправки, поэтому вместе с уведомлениями не превышают
+лимиты Telegram. Когда токенов не хватает или в очереди ждут уведомления,
+первыми отправляются правки с редким обновлением (день, час). Поминутные
+правки пропускаются: через минуту их текст все равно устареет. Правки одного
+сообщения схлопываются, а текст берется в момент отправки, поэтому он всегда
+актуален.
+
+Список отсчетов (пользователь, чат, сообщение, точность) хранится в текстовом
+файле и переписывается целиком при включении и выключении.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from services.sender import TokenBucket, get_sender
+from utils.messages import get_user_locale, text
+from utils.storage import get_user_date
+from utils.time_utils import render_time_left
+
+logger = logging.getLogger(__name__)
+
+# Точность обновления и длина шага в секундах
+GRANULARITIES = {"minute": 60, "hour": 3600, "day": 86400}
+
+# Очередность правок при нехватке бюджета: редкие обновления важнее, их пропуск заметнее
+PRIORITIES = {"day": 0, "hour": 1, "minute": 2}
+
+# Запас после границы минуты, чтобы не проснуться чуть раньше смены текста
+WAKEUP_MARGIN = 0.05
+
+
+@dataclass
+class LiveCountdown:
+    """Живой отсчет пользователя"""
+    user_id: int
+    chat_id: int
+    message_id: int
+    granularity: str
+    text: Optional[str] = None
+    next_check: float = 0.0
+    final: bool = False
+
+
+def next_change(target: float, now: float, granularity: str) -> float:
+    """
+    Момент, когда текст отсчета с данной точностью изменится
+
+    Текст считается от начала текущей минуты, поэтому меняется только на границах минут.
+
+    Args:
+        target: целевой момент (unix timestamp)
+        now: текущий момент (unix timestamp)
+        granularity: точность отсчета
+
+    Returns:
+        float: unix timestamp ближайшей смены текста
+    """
+    minute_start = now // 60 * 60
+    remaining = target - minute_start
+    step = GRANULARITIES[granularity]
+    if granularity == "day" and remaining < 86400:
+        # В последние сутки отсчет с точностью до дня показывает часы
+        step = 3600
+    value = remaining // step
+    if value <= 0:
+        # Дальше текст сменится только когда дата наступит
+        return -(-target // 60) * 60
+    return ((target - value * step) // 60 + 1) * 60
+
+
+class LiveCountdownService:
+    """Обновление живых отсчетов с бюджетом правок"""
+
+    def __init__(self, bot, path: str, edit_rate: float = 5.0):
+        """
+        Args:
+            bot: объект telegram.Bot
+            path: путь к файлу со списком отсчетов
+            edit_rate: бюджет правок в секунду
+        """
+        self.bot = bot
+        self.path = path
+        self.bucket = TokenBucket(edit_rate)
+        self.entries: Dict[int, LiveCountdown] = {}
+        self.stats: Dict[str, int] = {"edits": 0, "unchanged": 0, "coalesced": 0, "skipped": 0, "failed": 0}
+
+        self._heap: List[Tuple[float, int]] = []
+        self._pending: List[Dict[int, LiveCountdown]] = [{} for _ in PRIORITIES]
+        self._edits: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> int:
+        """
+        Прочитать список отсчетов (все они будут проверены сразу после запуска)
+
+        Returns:
+            int: количество отсчетов
+        """
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding="ascii", errors="replace") as file:
+            for line_number, line in enumerate(file, 1):
+                try:
+                    user_id, chat_id, message_id, granularity = line.split()
+                    if granularity not in GRANULARITIES:
+                        raise ValueError(granularity)
+                    entry = LiveCountdown(int(user_id), int(chat_id), int(message_id), granularity)
+                except ValueError:
+                    logger.warning(f"Пропущена поврежденная строка {line_number} списка живых отсчетов")
+                    continue
+                self.entries[entry.user_id] = entry
+                self._schedule(entry, 0.0)
+        logger.info(f"Живые отсчеты загружены: {len(self.entries)}")
+        return len(self.entries)
+
+    def save(self) -> None:
+        """Переписать файл со списком отсчетов"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="ascii") as file:
+            for entry in self.entries.values():
+                file.write(f"{entry.user_id} {entry.chat_id} {entry.message_id} {entry.granularity}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+
+    def start(self) -> None:
+        """Запустить цикл обновления в текущем цикле событий"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="live-countdowns")
+
+    async def stop(self) -> None:
+        """Остановить цикл обновления"""
+        tasks = list(self._edits)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def enable(self, user_id: int, chat_id: int, granularity: str) -> Optional[LiveCountdown]:
+        """
+        Отправить и закрепить сообщение с отсчетом
+
+        Returns:
+            Optional[LiveCountdown]: отсчет или None, если у пользователя нет даты или она наступила
+        """
+        now = datetime.now(timezone.utc)
+        target_date = get_user_date(user_id)
+        if target_date is None or target_date <= now:
+            return None
+        rendered = self._render(user_id, granularity, now)
+
+        previous = self.entries.get(user_id)
+        message = await self.bot.send_message(chat_id=chat_id, text=rendered)
+        try:
+            if previous is not None:
+                await self.bot.unpin_chat_message(chat_id=previous.chat_id, message_id=previous.message_id)
+            await self.bot.pin_chat_message(chat_id=chat_id, message_id=message.message_id, disable_notification=True)
+        except TelegramError as e:
+            logger.warning(f"Не удалось закрепить живой отсчет пользователя {user_id}: {e}")
+
+        entry = LiveCountdown(user_id, chat_id, message.message_id, granularity, text=rendered)
+        self._discard_pending(user_id)
+        self.entries[user_id] = entry
+        next_check = self._next_check(user_id, granularity, time.time())
+        if next_check is not None:
+            self._schedule(entry, next_check)
+        self.save()
+        logger.info(f"Живой отсчет включен для пользователя {user_id} (точность: {granularity})")
+        return entry
+
+    def disable(self, user_id: int) -> bool:
+        """
+        Выключить отсчет (сообщение остается с последним текстом)
+
+        Returns:
+            bool: был ли отсчет включен
+        """
+        entry = self.entries.pop(user_id, None)
+        if entry is None:
+            return False
+        self._discard_pending(user_id)
+        self.save()
+        logger.info(f"Живой отсчет отключен для пользователя {user_id}")
+        return True
+
+    def refresh(self, user_id: int) -> None:
+        """Проверить отсчет пользователя сразу (после смены даты или часового пояса)"""
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            entry.final = False
+            self._schedule(entry, time.time())
+
+    def pending(self) -> int:
+        """Количество правок, ожидающих бюджета"""
+        return sum(len(queue) for queue in self._pending)
+
+    def _schedule(self, entry: LiveCountdown, at: float) -> None:
+        """Поставить проверку отсчета в кучу (старые записи кучи становятся недействительными)"""
+        entry.next_check = at
+        heapq.heappush(self._heap, (at, entry.user_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _discard_pending(self, user_id: int) -> None:
+        """Убрать ожидающую правку пользователя"""
+        for queue in self._pending:
+            queue.pop(user_id, None)
+
+    @staticmethod
+    def _render(user_id: int, granularity: str, now: datetime) -> Optional[str]:
+        """Текст отсчета (None, если у пользователя больше нет даты)"""
+        target_date = get_user_date(user_id)
+        if target_date is None:
+            return None
+        locale = get_user_locale(user_id)
+        if target_date <= now:
+            return text("date_passed_command", locale)
+        return render_time_left(target_date, now, locale, granularity)
+
+    @staticmethod
+    def _next_check(user_id: int, granularity: str, now: float) -> Optional[float]:
+        """Момент следующей проверки (None, если дата наступила или удалена)"""
+        target_date = get_user_date(user_id)
+        if target_date is None:
+            return None
+        target = target_date.timestamp()
+        if target <= now:
+            return None
+        return next_change(target, now, granularity) + WAKEUP_MARGIN
+
+    async def _run(self) -> None:
+        """Цикл: проверить наступившие отсчеты, раздать бюджет, уснуть до следующего события"""
+        while True:
+            try:
+                now = time.time()
+                self._check_due(now)
+                self._drain()
+            except Exception as e:
+                logger.error(f"Ошибка в цикле живых отсчетов: {e}")
+
+            # Пока есть ожидающие правки, проверяем бюджет раз в секунду
+            delay = 1.0 if self.pending() else 3600.0
+            if self._heap:
+                delay = min(delay, max(0.0, self._heap[0][0] - time.time()))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _check_due(self, now: float) -> None:
+        """Сравнить текст наступивших отсчетов с отправленным и поставить правки"""
+        heap = self._heap
+        current = datetime.fromtimestamp(now, timezone.utc)
+        while heap and heap[0][0] <= now:
+            at, user_id = heapq.heappop(heap)
+            entry = self.entries.get(user_id)
+            if entry is None or entry.next_check != at:
+                continue
+
+            rendered = self._render(user_id, entry.granularity, current)
+            if rendered is None:
+                self.disable(user_id)
+                continue
+
+            if rendered == entry.text:
+                self.stats["unchanged"] += 1
+            else:
+                queue = self._pending[PRIORITIES[entry.granularity]]
+                if user_id in queue:
+                    self.stats["coalesced"] += 1
+                queue[user_id] = entry
+
+            next_check = self._next_check(user_id, entry.granularity, now)
+            if next_check is None:
+                # Дата наступила: после последней правки отсчет выключается
+                entry.final = True
+                if rendered == entry.text:
+                    self.disable(user_id)
+            else:
+                entry.next_check = next_check
+                heapq.heappush(heap, (next_check, user_id))
+
+    def _take_token(self) -> bool:
+        """Взять токен из бюджета правок и из общего ограничителя отправки"""
+        if not self.bucket.try_acquire():
+            return False
+        sender = get_sender()
+        if sender is not None and not sender.bucket.try_acquire():
+            self.bucket.tokens += 1
+            return False
+        return True
+
+    def _drain(self) -> None:
+        """Отправить ожидающие правки в пределах бюджета, по приоритету"""
+        if not self.pending():
+            return
+
+        # Уведомления в очереди важнее правок: пока они ждут, токены не забираем
+        sender = get_sender()
+        busy = sender is not None and sender.pending() > 0
+
+        for queue in self._pending:
+            while queue and not busy:
+                if not self._take_token():
+                    busy = True
+                    break
+                user_id = next(iter(queue))
+                entry = queue.pop(user_id)
+                task = asyncio.create_task(self._edit(entry))
+                self._edits.add(task)
+                task.add_done_callback(self._edits.discard)
+
+        if busy:
+            minute_queue = self._pending[PRIORITIES["minute"]]
+            skipped = sum(1 for entry in minute_queue.values() if not entry.final)
+            if skipped:
+                self.stats["skipped"] += skipped
+                self._pending[PRIORITIES["minute"]] = {
+                    user_id: entry for user_id, entry in minute_queue.items() if entry.final
+                }
+
+    async def _edit(self, entry: LiveCountdown) -> None:
+        """Отредактировать сообщение отсчета актуальным текстом"""
+        if self.entries.get(entry.user_id) is not entry:
+            return
+        rendered = self._render(entry.user_id, entry.granularity, datetime.now(timezone.utc))
+        if rendered is None:
+            self.disable(entry.user_id)
+            return
+
+        previous, entry.text = entry.text, rendered
+        try:
+            await self.bot.edit_message_text(text=rendered, chat_id=entry.chat_id, message_id=entry.message_id)
+            self.stats["edits"] += 1
+        except RetryAfter as e:
+            logger.warning(f"Flood control: правки живых отсчетов приостановлены на {e.retry_after} с")
+            self.bucket.pause(e.retry_after)
+            sender = get_sender()
+            if sender is not None:
+                sender.bucket.pause(e.retry_after)
+            entry.text = previous
+            self._pending[PRIORITIES[entry.granularity]][entry.user_id] = entry
+            return
+        except BadRequest as e:
+            error = str(e).lower()
+            if "not modified" not in error:
+                if "not found" in error or "can't be edited" in error:
+                    logger.info(f"Сообщение живого отсчета пользователя {entry.user_id} удалено, отсчет отключен")
+                    self.disable(entry.user_id)
+                    return
+                self.stats["failed"] += 1
+                entry.text = None
+                logger.error(f"Не удалось обновить живой отсчет пользователя {entry.user_id}: {e}")
+        except Forbidden:
+            logger.info(f"Пользователь {entry.user_id} заблокировал бота, живой отсчет отключен")
+            self.disable(entry.user_id)
+            return
+        except TelegramError as e:
+            self.stats["failed"] += 1
+            entry.text = None
+            logger.error(f"Не удалось обновить живой отсчет пользователя {entry.user_id}: {e}")
+
+        if entry.final and entry.text is not None:
+            self.disable(entry.user_id)
+
+
+# Глобальный сервис живых отсчетов
+_live_countdowns: Optional[LiveCountdownService] = None
+
+
+def set_live_countdowns(service: LiveCountdownService) -> None:
+    """Установить глобальный сервис живых отсчетов"""
+    global _live_countdowns
+    _live_countdowns = service
+
+
+def get_live_countdowns() -> Optional[LiveCountdownService]:
+    """Получить глобальный сервис живых отсчетов"""
+    return _live_countdowns
+
+
+def refresh_live_countdown(user_id: int) -> None:
+    """Обновить живой отсчет пользователя без ожидания (если он включен)"""
+    if _live_countdowns is not None:
+        _live_countdowns.refresh(user_id)
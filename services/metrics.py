@@ -0,0 +1,195 @@
+"""
+Метрики бота в формате Prometheus
+
+Счетчики и гистограммы обновляются на горячих путях за константное время
+(без блокировок и аллокаций), а значения, которые дорого поддерживать
+постоянно (глубина очереди, число пользователей), считаются только в момент
+запроса к эндпоинту /metrics.
+"""
+import functools
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.http_server import HTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин по умолчанию (в секундах)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEPTH_BUCKETS = (0, 10, 100, 1000, 10000, 100000)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Отформатировать метки в виде {name="value",...}"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric:
+    """Семейство метрик одного имени с разными метками"""
+
+    def __init__(self, name: str, help_text: str, kind: str, buckets: Sequence[float] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.buckets = buckets
+        self.values: Dict[Tuple[Tuple[str, str], ...], object] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Увеличить счетчик"""
+        key = tuple(labels.items())
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, value: float, **labels: str) -> None:
+        """Установить значение показателя"""
+        self.values[tuple(labels.items())] = value
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Добавить наблюдение в гистограмму"""
+        self.labels(**labels).observe(value)
+
+    def labels(self, **labels: str) -> Histogram:
+        """Получить гистограмму для набора меток (можно сохранить и обновлять напрямую)"""
+        key = tuple(labels.items())
+        histogram = self.values.get(key)
+        if histogram is None:
+            histogram = self.values[key] = Histogram(self.buckets)
+        return histogram
+
+    def render(self) -> List[str]:
+        """Строки в текстовом формате Prometheus"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.values.items():
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets, value.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {value.count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {value.sum}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {value.count}")
+        return lines
+
+
+_metrics: List[Metric] = []
+
+# Показатели, которые вычисляются только при запросе: имя -> (описание, функция)
+_gauge_callbacks: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def counter(name: str, help_text: str) -> Metric:
+    """Зарегистрировать счетчик"""
+    metric = Metric(name, help_text, "counter")
+    _metrics.append(metric)
+    return metric
+
+
+def gauge(name: str, help_text: str) -> Metric:
+    """Зарегистрировать показатель"""
+    metric = Metric(name, help_text, "gauge")
+    _metrics.append(metric)
+    return metric
+
+
+def histogram(name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Metric:
+    """Зарегистрировать гистограмму"""
+    metric = Metric(name, help_text, "histogram", buckets)
+    _metrics.append(metric)
+    return metric
+
+
+def register_gauge_callback(name: str, help_text: str, callback: Callable[[], float]) -> None:
+    """Зарегистрировать показатель, который вычисляется в момент запроса метрик"""
+    _gauge_callbacks[name] = (help_text, callback)
+
+
+# Метрики бота
+HANDLER_LATENCY = histogram("timebot_handler_latency_seconds", "Время обработки обновления по обработчикам")
+HANDLER_ERRORS = counter("timebot_handler_errors_total", "Исключения в обработчиках")
+SCHEDULER_LAG = histogram("timebot_scheduler_fire_lag_seconds", "Задержка срабатывания минутной рассылки", LAG_BUCKETS)
+NOTIFICATION_BATCH = histogram("timebot_notification_batch_size", "Размер пачки уведомлений за минуту", DEPTH_BUCKETS)
+MESSAGES_TOTAL = counter("timebot_outbound_messages_total", "Итоги доставки исходящих сообщений")
+SEND_QUEUE_DEPTH = histogram("timebot_send_queue_depth", "Глубина очереди исходящих сообщений при постановке", DEPTH_BUCKETS)
+
+
+def timed(handler: Callable) -> Callable:
+    """Обернуть асинхронный обработчик замером времени выполнения"""
+    name = handler.__name__
+    # Гистограмма получается один раз, на каждом вызове остается только observe
+    latency = HANDLER_LATENCY.labels(handler=name)
+    perf_counter = time.perf_counter
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name)
+            raise
+        finally:
+            latency.observe(perf_counter() - start)
+
+    return wrapper
+
+
+def render_metrics() -> str:
+    """Сформировать ответ эндпоинта /metrics"""
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for name, (help_text, callback) in _gauge_callbacks.items():
+        try:
+            value = callback()
+        except Exception as e:
+            logger.warning(f"Не удалось вычислить метрику {name}: {e}")
+            continue
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"])
+    return "\n".join(lines) + "\n"
+
+
+async def _handle_request(method: str, path: str, headers: Dict[str, str], body: bytes):
+    """Обработать запрос к эндпоинту метрик"""
+    if path.split("?", 1)[0] != "/metrics":
+        return 404, {}, b""
+    return 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}, render_metrics().encode()
+
+
+_server: Optional[HTTPServer] = None
+
+
+async def start_metrics_server(host: str, port: int) -> None:
+    """Запустить HTTP эндпоинт /metrics"""
+    global _server
+    _server = HTTPServer(_handle_request, host=host, port=port)
+    await _server.start()
+    logger.info(f"Метрики доступны на http://{host}:{_server.port}/metrics")
+
+
+async def stop_metrics_server() -> None:
+    """Остановить HTTP эндпоинт /metrics"""
+    global _server
+    if _server is not None:
+        await _server.stop()
+        _server = None
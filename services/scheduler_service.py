@@ -1,18 +1,63 @@
 """
 Сервис для работы с планировщиком уведомлений
+
+Время уведомлений пользователи задают в своем часовом поясе, а диспетчер
+хранит его как минуту суток по UTC, поэтому рассылка - одна выборка корзины
+в минуту. При переводе часов в каком-либо поясе пересчитываются корзины
+только пользователей этого пояса.
 """
+import heapq
 import logging
+import time
+from functools import lru_cache, partial
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from utils.storage import has_user_date, get_user_date, has_user_notification
-from utils.time_utils import calculate_time_left, format_time_left, is_date_passed
+from utils.log import hot_path_log
+from utils.messages import get_user_locale, text
+from utils.storage import (
+    has_user_date, get_user_date, has_user_notification, iter_notification_settings,
+    get_delivery_day, get_user_timezone, notification_minutes_in_timezone, get_user_notification,
+    get_countdown, get_countdowns, get_countdown_delivery_day, iter_countdown_notifications,
+    countdown_notifications_in_timezone, mark_user_inactive, reactivate_user
+)
+from utils.time_utils import (
+    render_time_left, is_date_passed, countdown_cache, get_zone, utc_offset_minutes, next_transition
+)
+from services.delivery_journal import DeliveryJournal
+from services.dispatcher import MinuteDispatcher, MINUTES_PER_DAY
+from services.sender import get_sender, OutboundMessage, OUTCOME_SENT
+from services.metrics import SCHEDULER_LAG, NOTIFICATION_BATCH, SEND_QUEUE_DEPTH
 
 logger = logging.getLogger(__name__)
+# События отдельных уведомлений: в лог попадает выборка, остальное - в периодической сводке
+hot_log = hot_path_log(__name__)
 
 # Глобальная переменная для хранения планировщика
-scheduler = AsyncIOScheduler(timezone="Europe/Moscow")  # Используем московское время
+scheduler = AsyncIOScheduler(timezone="UTC")
 application = None
+dispatcher = MinuteDispatcher()
+# Уведомления именованных отсчетов: отдельный диспетчер, ключ - ID отсчета
+countdown_dispatcher = MinuteDispatcher()
+
+# Ближайшие переводы часов: куча (минута UTC от 1970-01-01, пояс) и текущие смещения
+# поясов, за которыми следим (в минутах, обновляются при переводе часов)
+_transitions: List[Tuple[int, str]] = []
+_zone_offsets: Dict[str, int] = {}
+
+# Журнал доставок и окно, в котором пропущенные уведомления еще досылаются (в минутах)
+journal: Optional[DeliveryJournal] = None
+catchup_grace_minutes = 180
+
+# Пользователи и отсчеты, уведомление которых уже в очереди и еще не получило итог доставки
+_in_flight: Set[int] = set()
+_countdowns_in_flight: Set[int] = set()
+
+# Недоступные чаты: сколько отключено и сколько пользователей вернулось с запуска
+prune_stats: Dict[str, int] = {"pruned": 0, "reactivated": 0}
 
 
 def set_application(app):
@@ -21,10 +66,115 @@ def set_application(app):
     application = app
 
 
+def set_journal(delivery_journal: DeliveryJournal, grace_minutes: int = 180) -> None:
+    """
+    Подключить журнал доставок
+    
+    Args:
+        delivery_journal: открытый журнал доставок
+        grace_minutes: сколько минут после пропущенного времени уведомление еще досылается
+    """
+    global journal, catchup_grace_minutes
+    journal = delivery_journal
+    # Больше суток окно быть не может: за сутки уведомление пользователя сработало бы повторно
+    catchup_grace_minutes = min(grace_minutes, MINUTES_PER_DAY - 1)
+
+
+def utc_minute(now: Optional[datetime] = None) -> int:
+    """Номер минуты от 1970-01-01 по UTC (now - aware datetime, по умолчанию сейчас)"""
+    return int(now.timestamp() if now is not None else time.time()) // 60
+
+
+def to_utc_minute_of_day(minute_of_day: int, zone_name: str, now: Optional[datetime] = None) -> int:
+    """
+    Перевести местную минуту суток в минуту суток по UTC по текущему смещению пояса
+    
+    Args:
+        minute_of_day: минута суток в поясе пользователя
+        zone_name: часовой пояс
+        now: момент, для которого берется смещение (по умолчанию сейчас)
+    """
+    if now is not None:
+        offset = utc_offset_minutes(get_zone(zone_name), now)
+    else:
+        offset = watch_timezone(zone_name)
+    return (minute_of_day - offset) % MINUTES_PER_DAY
+
+
+def watch_timezone(zone_name: str, now: Optional[datetime] = None) -> int:
+    """
+    Начать следить за поясом: запомнить смещение и запланировать пересчет корзин
+    при ближайшем переводе часов
+    
+    Returns:
+        int: текущее смещение пояса от UTC (в минутах)
+    """
+    offset = _zone_offsets.get(zone_name)
+    if offset is not None:
+        return offset
+    now = now or datetime.now(timezone.utc)
+    zone = get_zone(zone_name)
+    offset = _zone_offsets[zone_name] = utc_offset_minutes(zone, now)
+    transition = next_transition(zone, now)
+    if transition is not None:
+        heapq.heappush(_transitions, (utc_minute(transition), zone_name))
+    return offset
+
+
+def rebucket_timezone(zone_name: str, now: Optional[datetime] = None) -> int:
+    """
+    Пересчитать минуты UTC для всех пользователей пояса (после перевода часов)
+    
+    Returns:
+        int: количество перемещенных пользователей
+    """
+    offset = _zone_offsets[zone_name] = utc_offset_minutes(get_zone(zone_name), now or datetime.now(timezone.utc))
+    moved = 0
+    for user_id, minute_of_day in notification_minutes_in_timezone(zone_name):
+        if user_id in dispatcher:
+            dispatcher.add(user_id, (minute_of_day - offset) % MINUTES_PER_DAY)
+            moved += 1
+    for countdown_id, minute_of_day in countdown_notifications_in_timezone(zone_name):
+        if countdown_id in countdown_dispatcher:
+            countdown_dispatcher.add(countdown_id, (minute_of_day - offset) % MINUTES_PER_DAY)
+            moved += 1
+    return moved
+
+
+def process_transitions(now: Optional[datetime] = None) -> int:
+    """
+    Пересчитать корзины поясов, в которых к текущей минуте перевели часы
+    
+    Returns:
+        int: количество поясов, которые были пересчитаны
+    """
+    now = now or datetime.now(timezone.utc)
+    current = utc_minute(now)
+    processed = 0
+    while _transitions and _transitions[0][0] <= current:
+        _, zone_name = heapq.heappop(_transitions)
+        moved = rebucket_timezone(zone_name, now)
+        logger.info(f"Перевод часов в поясе {zone_name}: пересчитано уведомлений {moved}")
+        processed += 1
+        
+        transition = next_transition(get_zone(zone_name), now)
+        if transition is not None:
+            heapq.heappush(_transitions, (utc_minute(transition), zone_name))
+    return processed
+
+
 def start_scheduler():
     """Запустить планировщик"""
+    # Одна задача раз в минуту рассылает уведомления всей корзине этой минуты
+    scheduler.add_job(
+        notification_tick,
+        CronTrigger(minute="*", timezone="UTC"),
+        id="notification_tick",
+        replace_existing=True,
+        misfire_grace_time=30
+    )
     scheduler.start()
-    logger.info("Планировщик уведомлений запущен (Europe/Moscow)")
+    logger.info("Планировщик уведомлений запущен (UTC)")
 
 
 def stop_scheduler():
@@ -35,108 +185,374 @@ def stop_scheduler():
 
 def setup_notification_job(user_id: int, hour: int, minute: int) -> None:
     """
-    Настроить задачу уведомлений для пользователя
+    Настроить уведомления для пользователя
     
     Args:
         user_id: ID пользователя
-        hour: час уведомления (в московском времени)
-        minute: минута уведомления (в московском времени)
+        hour: час уведомления (в часовом поясе пользователя)
+        minute: минута уведомления (в часовом поясе пользователя)
     """
-    job_id = f"notification_{user_id}"
+    zone_name = get_user_timezone(user_id)
     
-    # Удаляем старую задачу если есть
-    try:
-        scheduler.remove_job(job_id)
-    except:
-        pass
+    # Добавляем пользователя в корзину минуты UTC (старая запись заменяется)
+    dispatcher.add(user_id, to_utc_minute_of_day(hour * 60 + minute, zone_name))
     
-    # Добавляем новую задачу с московским временем
-    scheduler.add_job(
-        send_notification,
-        CronTrigger(hour=hour, minute=minute, timezone="Europe/Moscow"),
-        id=job_id,
-        args=[user_id],
-        replace_existing=True
-    )
+    logger.info(f"Уведомления настроены для пользователя {user_id} на время {hour:02d}:{minute:02d} ({zone_name})")
+
+
+def setup_countdown_notification(countdown_id: int, hour: int, minute: int) -> None:
+    """
+    Настроить уведомления именованного отсчета
+    
+    Args:
+        countdown_id: ID отсчета
+        hour: час уведомления (в часовом поясе владельца)
+        minute: минута уведомления (в часовом поясе владельца)
+    """
+    countdown = get_countdown(countdown_id)
+    if countdown is None:
+        return
+    zone_name = get_user_timezone(countdown[0])
+    countdown_dispatcher.add(countdown_id, to_utc_minute_of_day(hour * 60 + minute, zone_name))
+    logger.info(f"Уведомления отсчета '{countdown[1]}' пользователя {countdown[0]} настроены "
+                f"на время {hour:02d}:{minute:02d} ({zone_name})")
+
+
+def remove_countdown_notification(countdown_id: int) -> None:
+    """Удалить уведомления именованного отсчета из диспетчера"""
+    if countdown_dispatcher.remove(countdown_id):
+        hot_log.event("countdown_job_removed", "Уведомления отсчета %d удалены", countdown_id, countdown_id=countdown_id)
+
+
+def restore_notification_jobs() -> int:
+    """
+    Восстановить уведомления для всех пользователей из хранилища за один проход
+    
+    Returns:
+        int: количество восстановленных уведомлений
+    """
+    now = datetime.now(timezone.utc)
+    now_minutes = utc_minute(now)
+    
+    # Смещение считается один раз на пояс, а не на пользователя
+    offsets: Dict[str, int] = {}
+    
+    def entries():
+        for user_id, epoch_minutes, minute_of_day, zone_name in iter_notification_settings():
+            offset = offsets.get(zone_name)
+            if offset is None:
+                offset = offsets[zone_name] = watch_timezone(zone_name, now)
+            # Дата хранится в местном времени: сравниваем ее с текущим моментом в UTC
+            if epoch_minutes - offset > now_minutes:
+                yield user_id, (minute_of_day - offset) % MINUTES_PER_DAY
+    
+    restored = dispatcher.add_many(entries())
+    
+    def countdown_entries():
+        # В iter_countdown_notifications только отсчеты, дата которых еще не наступила
+        for countdown_id, _, minute_of_day, zone_name in iter_countdown_notifications():
+            offset = offsets.get(zone_name)
+            if offset is None:
+                offset = offsets[zone_name] = watch_timezone(zone_name, now)
+            yield countdown_id, (minute_of_day - offset) % MINUTES_PER_DAY
+    
+    countdowns = countdown_dispatcher.add_many(countdown_entries())
     
-    logger.info(f"Уведомления настроены для пользователя {user_id} на время {hour:02d}:{minute:02d} (MSK)")
+    logger.info(f"Восстановлено уведомлений: {restored} (корзин: {dispatcher.bucket_count()}), "
+                f"именованных отсчетов: {countdowns}")
+    return restored + countdowns
 
 
 def remove_notification_job(user_id: int) -> None:
     """
-    Удалить задачу уведомлений для пользователя
+    Удалить уведомления пользователя из диспетчера
     
     Args:
         user_id: ID пользователя
     """
-    job_id = f"notification_{user_id}"
-    try:
-        scheduler.remove_job(job_id)
-        logger.info(f"Уведомления удалены для пользователя {user_id}")
-    except:
-        pass
+    if dispatcher.remove(user_id):
+        hot_log.event("job_removed", "Уведомления удалены для пользователя %d", user_id, user_id=user_id)
+
+
+def prune_unreachable_chat(user_id: int) -> bool:
+    """
+    Отключить уведомления пользователя, до которого не доходят сообщения
+    
+    Вызывается очередью отправки, когда доставка не удалась из-за постоянной
+    ошибки или нескольких временных подряд. Пользователь помечается в хранилище
+    недоступным, его уведомления и уведомления его отсчетов убираются из
+    диспетчеров. Настройки сохраняются и возвращаются, когда он снова напишет боту.
+    
+    Returns:
+        bool: True, если пользователь отключен сейчас (а не был отключен раньше)
+    """
+    if not mark_user_inactive(user_id):
+        return False
+    remove_notification_job(user_id)
+    for countdown_id, _, _, _ in get_countdowns(user_id):
+        remove_countdown_notification(countdown_id)
+    prune_stats["pruned"] += 1
+    hot_log.event("pruned", "Пользователь %d недоступен, уведомления отключены", user_id,
+                  level=logging.WARNING, user_id=user_id)
+    return True
+
+
+def reactivate_user_notifications(user_id: int) -> bool:
+    """
+    Вернуть уведомления пользователю, который снова написал боту
+    
+    Returns:
+        bool: True, если пользователь был помечен недоступным
+    """
+    if not reactivate_user(user_id):
+        return False
+    notification_time = get_user_notification(user_id)
+    target_date = get_user_date(user_id)
+    if notification_time is not None and target_date is not None and not is_date_passed(target_date):
+        hour, minute = map(int, notification_time.split(":"))
+        setup_notification_job(user_id, hour, minute)
+    for countdown_id, _, countdown_date, countdown_time in get_countdowns(user_id):
+        if countdown_time is not None and not is_date_passed(countdown_date):
+            hour, minute = map(int, countdown_time.split(":"))
+            setup_countdown_notification(countdown_id, hour, minute)
+    prune_stats["reactivated"] += 1
+    logger.info(f"Пользователь {user_id} снова доступен, уведомления восстановлены")
+    return True
+
+
+async def notification_tick() -> None:
+    """Разослать уведомления всем пользователям текущей минуты"""
+    now = datetime.now(timezone.utc)
+    SCHEDULER_LAG.observe(now.second + now.microsecond / 1e6)
+    current = utc_minute(now)
+    
+    # Корзины поясов, где перевели часы, пересчитываются до рассылки
+    process_transitions(now)
+    
+    # Если тики были пропущены (остановка цикла событий), досылаем их минуты
+    if journal is not None and journal.last_tick is not None and current - journal.last_tick > 1:
+        await catch_up_missed_notifications(current)
+    
+    await fire_minute(current % MINUTES_PER_DAY, current // MINUTES_PER_DAY)
+    if journal is not None:
+        journal.record_tick(current)
 
 
-async def send_notification(user_id: int) -> None:
+async def catch_up_missed_notifications(now_minute: Optional[int] = None) -> int:
     """
-    Отправить уведомление пользователю
+    Дослать уведомления за минуты, которые бот пропустил
+    
+    Пропущенный интервал берется из журнала (после последней обработанной минуты
+    до текущей) и ограничивается окном catchup_grace_minutes. Пользователи всех
+    пропущенных минут собираются в одну пачку, уже получившие уведомление за
+    день пропускаются, а темп отправки держит очередь исходящих сообщений.
+    
+    Args:
+        now_minute: текущая минута UTC от 1970-01-01 (по умолчанию - сейчас)
+        
+    Returns:
+        int: количество пользователей, которым уведомление поставлено в очередь
+    """
+    if journal is None or journal.last_tick is None:
+        return 0
+    
+    if now_minute is None:
+        now_minute = utc_minute()
+    start = max(journal.last_tick + 1, now_minute - catchup_grace_minutes)
+    if start >= now_minute:
+        return 0
+    
+    batch = []
+    countdown_batch = []
+    for minute in range(start, now_minute):
+        day = minute // MINUTES_PER_DAY
+        batch.extend((user_id, day) for user_id in dispatcher.due(minute % MINUTES_PER_DAY))
+        countdown_batch.extend(
+            (countdown_id, day) for countdown_id in countdown_dispatcher.due(minute % MINUTES_PER_DAY)
+        )
+    
+    sent = 0
+    for user_id, day in batch:
+        if await send_notification(user_id, day, late=True):
+            sent += 1
+    for countdown_id, day in countdown_batch:
+        if await send_countdown_notification(countdown_id, day, late=True):
+            sent += 1
+    
+    journal.record_tick(now_minute - 1)
+    logger.info(f"Досылка пропущенных уведомлений за {now_minute - start} мин: "
+                f"{sent} из {len(batch) + len(countdown_batch)} уведомлений")
+    return sent
+
+
+async def fire_minute(minute_of_day: int, day: Optional[int] = None) -> int:
+    """
+    Разослать уведомления корзине указанной минуты одной пачкой
+    
+    Args:
+        minute_of_day: минута суток по UTC
+        day: день UTC от 1970-01-01, за который рассылаются уведомления (для журнала доставок)
+        
+    Returns:
+        int: количество пользователей в пачке
+    """
+    batch = dispatcher.due(minute_of_day)
+    countdown_batch = countdown_dispatcher.due(minute_of_day)
+    if not batch and not countdown_batch:
+        return 0
+    
+    logger.info(f"Рассылка уведомлений для минуты {minute_of_day // 60:02d}:{minute_of_day % 60:02d} UTC: "
+                f"{len(batch)} пользователей, {len(countdown_batch)} именованных отсчетов")
+    for user_id in batch:
+        await send_notification(user_id, day)
+    for countdown_id in countdown_batch:
+        await send_countdown_notification(countdown_id, day)
+    
+    NOTIFICATION_BATCH.observe(len(batch) + len(countdown_batch))
+    sender = get_sender()
+    if sender is not None:
+        SEND_QUEUE_DEPTH.observe(sender.pending())
+    
+    cache_stats = countdown_cache.stats()
+    logger.info(f"Кэш текстов отсчета: {cache_stats['size']} записей, попаданий {cache_stats['hit_rate']:.1%}")
+    return len(batch) + len(countdown_batch)
+
+
+@lru_cache(maxsize=4)
+def _delivery_callback(day: int):
+    """Обработчик итога доставки: снимает пометку "в очереди" и пишет доставку в журнал"""
+    def on_outcome(message: OutboundMessage) -> None:
+        _in_flight.discard(message.chat_id)
+        if message.outcome == OUTCOME_SENT and journal is not None:
+            journal.record_delivery(message.chat_id, day)
+    return on_outcome
+
+
+def _countdown_delivered(countdown_id: int, day: int, message: OutboundMessage) -> None:
+    """Итог доставки уведомления отсчета: снять пометку "в очереди" и записать доставку в журнал"""
+    _countdowns_in_flight.discard(countdown_id)
+    if message.outcome == OUTCOME_SENT and journal is not None:
+        journal.record_countdown_delivery(countdown_id, day)
+
+
+async def send_notification(user_id: int, day: Optional[int] = None, late: bool = False) -> bool:
+    """
+    Отправить уведомление пользователю (шаг рассылки корзины минуты)
     
     Args:
         user_id: ID пользователя
+        day: день UTC от 1970-01-01, за который отправляется уведомление
+        late: уведомление досылается после простоя бота
+        
+    Returns:
+        bool: True, если уведомление поставлено в очередь
     """
     try:
-        logger.info(f"Попытка отправки уведомления пользователю {user_id}")
-        
         if not has_user_date(user_id) or not has_user_notification(user_id):
-            logger.warning(f"Пользователь {user_id} не найден в данных")
-            return
+            hot_log.event("user_missing", "Пользователь %d не найден в данных", user_id,
+                          level=logging.WARNING, user_id=user_id)
+            return False
+        
+        if day is not None and (user_id in _in_flight or get_delivery_day(user_id) >= day):
+            hot_log.event("duplicate", "Уведомление за этот день уже отправлено пользователю %d", user_id,
+                          user_id=user_id, day=day)
+            return False
         
         target_date = get_user_date(user_id)
         
         if target_date and is_date_passed(target_date):
             # Дата уже наступила, удаляем задачу
-            logger.info(f"Дата для пользователя {user_id} уже наступила, удаляем уведомления")
+            hot_log.event("date_passed", "Дата для пользователя %d уже наступила, удаляем уведомления", user_id,
+                          user_id=user_id)
             remove_notification_job(user_id)
-            return
+            return False
         
         if not target_date:
-            logger.warning(f"Дата не найдена для пользователя {user_id}")
-            return
+            hot_log.event("date_missing", "Дата не найдена для пользователя %d", user_id,
+                          level=logging.WARNING, user_id=user_id)
+            return False
         
-        # Вычисляем разность
-        days, hours, minutes = calculate_time_left(target_date)
+        # Формируем сообщение (текст общий для всех пользователей с той же датой в эту минуту)
+        locale = get_user_locale(user_id)
+        notification_text = text(
+            "notification_late" if late else "notification", locale,
+            countdown=render_time_left(target_date, locale=locale)
+        )
         
-        # Формируем сообщение
-        notification_text = f"🔔 Ежедневное уведомление!\n\n"
-        notification_text += format_time_left(days, hours, minutes, target_date)
+        # Ставим уведомление в очередь исходящих сообщений
+        sender = get_sender()
+        if sender is None:
+            logger.error(f"Очередь исходящих сообщений недоступна для отправки уведомления пользователю {user_id}")
+            return False
         
-        # Отправляем уведомление
-        if application and application.bot:
-            logger.info(f"Отправка уведомления пользователю {user_id}: {notification_text}")
-            await application.bot.send_message(chat_id=user_id, text=notification_text)
-            logger.info(f"Уведомление успешно отправлено пользователю {user_id}")
-        else:
-            logger.error(f"Application или bot недоступен для отправки уведомления пользователю {user_id}")
+        callback = None
+        if day is not None and journal is not None:
+            _in_flight.add(user_id)
+            callback = _delivery_callback(day)
+        sender.submit(user_id, notification_text, callback=callback)
+        hot_log.event("queued", "Уведомление поставлено в очередь для пользователя %d", user_id,
+                      user_id=user_id, late=late)
+        return True
         
     except Exception as e:
         logger.error(f"Ошибка при отправке уведомления пользователю {user_id}: {e}")
+        return False
 
 
-def get_server_timezone_info() -> str:
-    """Получить информацию о часовом поясе сервера"""
-    try:
-        import subprocess
-        result = subprocess.run(['timedatectl', 'show', '--property=Timezone', '--value'], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except:
-        pass
+async def send_countdown_notification(countdown_id: int, day: Optional[int] = None, late: bool = False) -> bool:
+    """
+    Отправить уведомление именованного отсчета его владельцу
     
-    try:
-        import os
-        return os.environ.get('TZ', 'Unknown')
-    except:
-        pass
+    Как и основное уведомление, доставка записывается в журнал только после
+    подтверждения отправки, а повторная отправка за тот же день отсекается по
+    дню доставки (он восстанавливается из журнала после перезапуска).
     
-    return 'Unknown' 
\ No newline at end of file
+    Args:
+        countdown_id: ID отсчета
+        day: день UTC от 1970-01-01, за который отправляется уведомление
+        late: уведомление досылается после простоя бота
+        
+    Returns:
+        bool: True, если уведомление поставлено в очередь
+    """
+    try:
+        countdown = get_countdown(countdown_id)
+        if countdown is None or countdown[3] is None:
+            remove_countdown_notification(countdown_id)
+            return False
+        user_id, name, target_date, _ = countdown
+        
+        if day is not None and (countdown_id in _countdowns_in_flight or get_countdown_delivery_day(countdown_id) >= day):
+            hot_log.event("countdown_duplicate", "Уведомление отсчета '%s' за этот день уже отправлено пользователю %d",
+                          name, user_id, user_id=user_id, countdown_id=countdown_id, day=day)
+            return False
+        
+        if is_date_passed(target_date):
+            hot_log.event("countdown_date_passed", "Дата отсчета '%s' пользователя %d уже наступила, удаляем уведомления",
+                          name, user_id, user_id=user_id, countdown_id=countdown_id)
+            remove_countdown_notification(countdown_id)
+            return False
+        
+        sender = get_sender()
+        if sender is None:
+            logger.error(f"Очередь исходящих сообщений недоступна для отправки уведомления пользователю {user_id}")
+            return False
+        
+        locale = get_user_locale(user_id)
+        notification_text = text(
+            "notification_late" if late else "notification", locale,
+            countdown=text("countdown_named", locale, name=name,
+                           countdown=render_time_left(target_date, locale=locale))
+        )
+        callback = None
+        if day is not None and journal is not None:
+            _countdowns_in_flight.add(countdown_id)
+            callback = partial(_countdown_delivered, countdown_id, day)
+        sender.submit(user_id, notification_text, callback=callback)
+        hot_log.event("countdown_queued", "Уведомление отсчета '%s' поставлено в очередь для пользователя %d",
+                      name, user_id, user_id=user_id, countdown_id=countdown_id, late=late)
+        return True
+        
+    except Exception as e:
+        logger.error(f"Ошибка при отправке уведомления отсчета {countdown_id}: {e}")
+        return False
@@ -0,0 +1,336 @@
+"""
+Очередь исходящих сообщений с ограничением скорости
+
+Все сообщения, которые бот отправляет по своей инициативе, проходят через
+асинхронную очередь: пул воркеров забирает сообщения, глобальный token bucket
+держит общую скорость в пределах лимитов Telegram, а для каждого чата
+соблюдается минимальный интервал между сообщениями. RetryAfter приостанавливает
+отправку и возвращает сообщение в очередь, поэтому при больших всплесках
+сообщения не теряются.
+
+Ошибки доставки делятся на постоянные и временные. Постоянные (бот
+заблокирован, чат не найден, аккаунт удален) сразу дают итог "unreachable".
+Временные (сетевые ошибки после всех попыток) считаются по чату подряд, и
+после transient_threshold таких ошибок чат тоже считается недоступным.
+О недоступном чате сообщает обработчик on_unreachable.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+
+from services.metrics import MESSAGES_TOTAL
+from utils.log import hot_path_log
+
+logger = logging.getLogger(__name__)
+# Ошибки доставки отдельных сообщений: при массовых сбоях их тысячи, поэтому в лог идет выборка
+hot_log = hot_path_log(__name__)
+
+# Итоги доставки
+OUTCOME_SENT = "sent"
+OUTCOME_FAILED = "failed"
+OUTCOME_EXPIRED = "expired"
+OUTCOME_UNREACHABLE = "unreachable"
+
+# Тексты ошибок Telegram, после которых в чат писать бесполезно (в нижнем регистре)
+PERMANENT_ERRORS = ("chat not found", "user is deactivated", "bot was blocked", "bot was kicked")
+
+
+def is_permanent_error(error: TelegramError) -> bool:
+    """Ошибка означает, что чат недоступен навсегда (бот заблокирован, чат или аккаунт удален)"""
+    if isinstance(error, Forbidden):
+        return True
+    message = str(error).lower()
+    return any(permanent in message for permanent in PERMANENT_ERRORS)
+
+
+@dataclass
+class OutboundMessage:
+    """Исходящее сообщение и его статус доставки"""
+    chat_id: int
+    text: str
+    deadline: float
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    attempts: int = 0
+    outcome: Optional[str] = None
+    error: Optional[str] = None
+    delivered_at: Optional[float] = None
+    result: Any = None
+    callback: Optional[Callable[["OutboundMessage"], None]] = None
+
+
+class TokenBucket:
+    """Глобальный ограничитель скорости (token bucket)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Приостановить выдачу токенов (например, после RetryAfter)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    def try_acquire(self) -> bool:
+        """Взять токен без ожидания (False, если токенов нет)"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return False
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Дождаться токена"""
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class OutboundSender:
+    """Пул воркеров, отправляющих сообщения из очереди"""
+
+    def __init__(self, bot, workers: int = 8, global_rate: float = 30.0,
+                 per_chat_interval: float = 1.0, deadline: float = 600.0,
+                 max_attempts: int = 5, transient_threshold: int = 5,
+                 on_unreachable: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            bot: объект telegram.Bot
+            workers: количество воркеров
+            global_rate: общий лимит сообщений в секунду
+            per_chat_interval: минимальный интервал между сообщениями в один чат (в секундах)
+            deadline: время жизни сообщения в очереди (в секундах)
+            max_attempts: максимум попыток при сетевых ошибках
+            transient_threshold: сколько сообщений в чат подряд не доставлено из-за временных
+                ошибок, прежде чем чат считается недоступным
+            on_unreachable: функция, которая вызывается с ID чата, признанного недоступным
+        """
+        self.bot = bot
+        self.workers = workers
+        self.per_chat_interval = per_chat_interval
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.transient_threshold = transient_threshold
+        self.on_unreachable = on_unreachable
+        self.bucket = TokenBucket(global_rate)
+        self.stats: Dict[str, int] = {
+            OUTCOME_SENT: 0, OUTCOME_FAILED: 0, OUTCOME_EXPIRED: 0, OUTCOME_UNREACHABLE: 0, "retried": 0
+        }
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._chat_ready: Dict[int, float] = {}
+        # Временные ошибки доставки подряд по чатам (сбрасываются успешной отправкой)
+        self._transient_failures: Dict[int, int] = {}
+        self._deferred = 0
+        self._in_flight = 0
+
+    def start(self) -> None:
+        """Запустить воркеры в текущем цикле событий"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"sender-{index}")
+            for index in range(self.workers)
+        ]
+        logger.info(f"Очередь исходящих сообщений запущена ({self.workers} воркеров)")
+
+    async def stop(self) -> None:
+        """Остановить воркеры"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, chat_id: int, text: str, deadline: Optional[float] = None,
+               callback: Optional[Callable[[OutboundMessage], None]] = None, **kwargs) -> OutboundMessage:
+        """
+        Поставить сообщение в очередь
+
+        Args:
+            chat_id: ID чата
+            text: текст сообщения
+            deadline: время (unix timestamp), после которого сообщение не отправляется
+            callback: функция, которая вызывается с сообщением после получения итога доставки
+            **kwargs: дополнительные параметры send_message
+
+        Returns:
+            OutboundMessage: запись о сообщении, в которой фиксируется итог доставки
+        """
+        self.start()
+        message = OutboundMessage(
+            chat_id=chat_id,
+            text=text,
+            deadline=deadline if deadline is not None else time.time() + self.deadline,
+            kwargs=kwargs,
+            callback=callback
+        )
+        self._queue.put_nowait(message)
+        return message
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Дождаться итога доставки всех сообщений очереди (при остановке бота)
+
+        Args:
+            timeout: максимальное время ожидания (в секундах)
+
+        Returns:
+            int: количество сообщений, которые остались без итога доставки
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.pending() and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+        return self.pending()
+
+    def pending(self) -> int:
+        """Количество сообщений, которые еще не получили итог доставки"""
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + self._deferred + self._in_flight
+
+    def _defer(self, message: OutboundMessage, delay: float) -> None:
+        """Вернуть сообщение в очередь через delay секунд"""
+        self._deferred += 1
+        self.stats["retried"] += 1
+
+        def requeue():
+            self._deferred -= 1
+            self._queue.put_nowait(message)
+
+        asyncio.get_running_loop().call_later(delay, requeue)
+
+    def _finish(self, message: OutboundMessage, outcome: str, error: Optional[str] = None) -> None:
+        """Зафиксировать итог доставки"""
+        message.outcome = outcome
+        message.error = error
+        self.stats[outcome] += 1
+        MESSAGES_TOTAL.inc(outcome=outcome)
+        if outcome == OUTCOME_SENT:
+            message.delivered_at = time.time()
+        else:
+            hot_log.event(outcome, "Сообщение пользователю %d не доставлено (%s): %s", message.chat_id, outcome, error,
+                          level=logging.ERROR, chat_id=message.chat_id, error=error)
+
+        if message.callback is not None:
+            try:
+                message.callback(message)
+            except Exception as e:
+                logger.error(f"Ошибка в обработчике итога доставки для {message.chat_id}: {e}")
+
+        if outcome == OUTCOME_UNREACHABLE and self.on_unreachable is not None:
+            try:
+                self.on_unreachable(message.chat_id)
+            except Exception as e:
+                logger.error(f"Ошибка в обработчике недоступного чата {message.chat_id}: {e}")
+
+    def _transient_failure(self, message: OutboundMessage, error: str) -> None:
+        """Зафиксировать недоставку из-за временной ошибки (чат недоступен после нескольких подряд)"""
+        failures = self._transient_failures.get(message.chat_id, 0) + 1
+        if failures >= self.transient_threshold:
+            self._transient_failures.pop(message.chat_id, None)
+            self._finish(message, OUTCOME_UNREACHABLE, f"{error} ({failures} раз подряд)")
+        else:
+            self._transient_failures[message.chat_id] = failures
+            self._finish(message, OUTCOME_FAILED, error)
+
+    async def _worker(self) -> None:
+        """Цикл воркера"""
+        while True:
+            message = await self._queue.get()
+            self._in_flight += 1
+            try:
+                await self._process(message)
+            except Exception as e:
+                self._finish(message, OUTCOME_FAILED, str(e))
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    async def _process(self, message: OutboundMessage) -> None:
+        """Отправить одно сообщение с учетом лимитов"""
+        if time.time() > message.deadline:
+            self._finish(message, OUTCOME_EXPIRED, "истек срок доставки")
+            return
+
+        # Лимит на чат: не блокируем воркер, а откладываем сообщение
+        now = time.monotonic()
+        ready_at = self._chat_ready.get(message.chat_id, 0.0)
+        if ready_at > now:
+            self._defer(message, ready_at - now)
+            return
+
+        await self.bucket.acquire()
+        message.attempts += 1
+        try:
+            message.result = await self.bot.send_message(chat_id=message.chat_id, text=message.text, **message.kwargs)
+        except RetryAfter as e:
+            logger.warning(f"Flood control: пауза {e.retry_after} с, сообщение пользователю {message.chat_id} отложено")
+            self.bucket.pause(e.retry_after)
+            self._defer(message, e.retry_after)
+        except BadRequest as e:
+            # Остальные BadRequest - ошибка в самом сообщении, а не в чате
+            self._finish(message, OUTCOME_UNREACHABLE if is_permanent_error(e) else OUTCOME_FAILED, str(e))
+        except NetworkError as e:
+            if message.attempts < self.max_attempts:
+                self._defer(message, min(2 ** message.attempts, 60))
+            else:
+                self._transient_failure(message, str(e))
+        except TelegramError as e:
+            if is_permanent_error(e):
+                self._finish(message, OUTCOME_UNREACHABLE, str(e))
+            else:
+                self._transient_failure(message, str(e))
+        else:
+            self._mark_chat_sent(message.chat_id)
+            if self._transient_failures:
+                self._transient_failures.pop(message.chat_id, None)
+            self._finish(message, OUTCOME_SENT)
+
+    def _mark_chat_sent(self, chat_id: int) -> None:
+        """Запомнить время, после которого в чат можно писать снова"""
+        now = time.monotonic()
+        self._chat_ready[chat_id] = now + self.per_chat_interval
+
+        # Не даем словарю расти бесконечно: убираем чаты с истекшим ограничением
+        if len(self._chat_ready) > 100000:
+            self._chat_ready = {
+                chat: ready_at for chat, ready_at in self._chat_ready.items() if ready_at > now
+            }
+
+
+# Глобальный экземпляр очереди исходящих сообщений
+_sender: Optional[OutboundSender] = None
+
+
+def set_sender(sender: OutboundSender) -> None:
+    """Установить глобальную очередь исходящих сообщений"""
+    global _sender
+    _sender = sender
+
+
+def get_sender() -> Optional[OutboundSender]:
+    """Получить глобальную очередь исходящих сообщений"""
+    return _sender
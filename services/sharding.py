@@ -0,0 +1,459 @@
+"""
+Шардированное развертывание на нескольких процессах
+
+Пространство user_id делится между SHARD_COUNT воркерами (main.py с
+UPDATE_MODE=shard). Каждый воркер владеет своей частью хранилища и сам
+рассылает уведомления своим пользователям. Единый фронт получает обновления
+от Telegram (polling или webhook) и пересылает каждое воркеру-владельцу;
+обновления одного шарда идут по одному соединению строго по порядку, поэтому
+порядок обновлений одного пользователя сохраняется.
+
+Запуск:
+    python -m services.sharding local      # фронт и SHARD_COUNT воркеров на этой машине
+    python -m services.sharding front      # только фронт (воркеры на других узлах, см. SHARD_HOSTS)
+    python -m services.sharding rebalance --old 2 --new 4   # перенос данных при смене числа шардов
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+from utils.http_server import HTTPServer
+from utils.messages import text
+from utils.storage_backends import create_backend
+
+logger = logging.getLogger(__name__)
+
+# Поля обновления, в которых Telegram передает отправителя
+USER_FIELDS = (
+    "message", "edited_message", "callback_query", "inline_query", "chosen_inline_result",
+    "shipping_query", "pre_checkout_query", "my_chat_member", "chat_member", "chat_join_request",
+)
+
+# Команды администратора, которые фронт пересылает всем шардам: каждый выполняет их над своими пользователями
+FAN_OUT_COMMANDS = ("/broadcast", "/stats")
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# Размер пачки записей при перебалансировке
+REBALANCE_BATCH = 10000
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping, Veach)
+
+    При увеличении числа шардов с N до N+1 переезжает только 1/(N+1) ключей.
+    """
+    key &= _MASK64
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & _MASK64
+        jump = int((bucket + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for(user_id: int, shard_count: int) -> int:
+    """Номер шарда, которому принадлежит пользователь"""
+    if shard_count <= 1:
+        return 0
+    return jump_hash(user_id, shard_count)
+
+
+def extract_user_id(data: dict) -> Optional[int]:
+    """Найти ID пользователя в JSON обновления без полного разбора"""
+    for field in USER_FIELDS:
+        payload = data.get(field)
+        if not payload:
+            continue
+        sender = payload.get("from")
+        if sender:
+            return sender.get("id")
+        chat = payload.get("chat")
+        if chat:
+            return chat.get("id")
+    return None
+
+
+def is_fan_out(data: dict) -> bool:
+    """Нужно ли переслать обновление всем шардам (команда из FAN_OUT_COMMANDS)"""
+    message = data.get("message")
+    if not message:
+        return False
+    command = message.get("text", "").split(maxsplit=1)[:1]
+    return bool(command) and command[0].split("@", 1)[0].lower() in FAN_OUT_COMMANDS
+
+
+def local_shard(user_id: int) -> bool:
+    """Принадлежит ли пользователь этому процессу (вне шардированного режима - всегда)"""
+    from config import UPDATE_MODE, SHARD_COUNT, SHARD_INDEX
+    return UPDATE_MODE != 'shard' or shard_for(user_id, SHARD_COUNT) == SHARD_INDEX
+
+
+def shard_label(locale: str) -> str:
+    """Подпись шарда перед ответом воркера ("Шард 1 из 4: "), вне шардированного режима - пустая строка"""
+    from config import UPDATE_MODE, SHARD_COUNT, SHARD_INDEX
+    if UPDATE_MODE != 'shard':
+        return ""
+    return text("shard_label", locale, index=SHARD_INDEX + 1, count=SHARD_COUNT)
+
+
+def require_secret(secret: str) -> None:
+    """
+    Проверить, что задан WEBHOOK_SECRET
+
+    Секретом фронт подписывает пересылку воркерам, а в режиме webhook проверяет
+    запросы Telegram: без него обновления мог бы подсунуть любой, кто достучится до порта.
+
+    Raises:
+        ValueError: если секрет не задан
+    """
+    if not secret:
+        raise ValueError("Для шардированного развертывания укажите WEBHOOK_SECRET")
+
+
+def shard_storage_path(path: str, index: int) -> str:
+    """Путь к файлу данных шарда (как в config.py для UPDATE_MODE=shard)"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.shard{index}{extension}"
+
+
+class ShardClient:
+    """Постоянное HTTP соединение фронта с одним воркером"""
+
+    def __init__(self, address: str, path: str, secret_token: str):
+        self.host, port = address.rsplit(":", 1)
+        self.port = int(port)
+        self.path = path
+        self.secret_token = secret_token
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def post(self, body: bytes) -> int:
+        """
+        Отправить обновление воркеру
+
+        Returns:
+            int: HTTP статус ответа
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        head = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"X-Telegram-Bot-Api-Secret-Token: {self.secret_token}\r\n\r\n"
+        )
+        self._writer.write(head.encode("latin-1") + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("воркер закрыл соединение")
+        status = int(status_line.split()[1])
+
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        if length:
+            await self._reader.readexactly(length)
+        return status
+
+    async def close(self) -> None:
+        """Закрыть соединение"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+
+
+class ShardRouter:
+    """Маршрутизация обновлений по шардам с отдельной упорядоченной очередью на шард"""
+
+    def __init__(self, addresses: List[str], path: str, secret_token: str, queue_size: int = 1000):
+        self.clients = [ShardClient(address, path, secret_token) for address in addresses]
+        self.queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in addresses]
+        self.forwarded = [0] * len(addresses)
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Запустить пересылку во все шарды"""
+        self._tasks = [
+            asyncio.create_task(self._forward(index), name=f"shard-forward-{index}")
+            for index in range(len(self.clients))
+        ]
+
+    async def stop(self) -> None:
+        """Дождаться пересылки накопленных обновлений и остановиться"""
+        for queue in self.queues:
+            await queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for client in self.clients:
+            await client.close()
+
+    async def route(self, data: dict, body: Optional[bytes] = None) -> int:
+        """
+        Поставить обновление в очередь шарда-владельца (ждет, если очередь заполнена)
+
+        Команды из FAN_OUT_COMMANDS ставятся в очереди всех шардов.
+
+        Returns:
+            int: номер шарда-владельца
+        """
+        user_id = extract_user_id(data) or 0
+        shard = shard_for(user_id, len(self.clients))
+        body = body if body is not None else json.dumps(data).encode()
+        if is_fan_out(data):
+            for queue in self.queues:
+                await queue.put(body)
+        else:
+            await self.queues[shard].put(body)
+        return shard
+
+    async def _forward(self, index: int) -> None:
+        """Пересылать обновления одного шарда по порядку, повторяя при сбоях"""
+        queue = self.queues[index]
+        client = self.clients[index]
+        while True:
+            body = await queue.get()
+            delay = 0.1
+            while True:
+                try:
+                    status = await client.post(body)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+                    logger.warning(f"Шард {index} недоступен ({e}), повтор через {delay:.1f} с")
+                    await client.close()
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+                    continue
+
+                if status == 200:
+                    self.forwarded[index] += 1
+                    break
+                if status == 503:
+                    # Воркер перегружен: ждем и повторяем, не теряя обновление
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+                    continue
+                logger.error(f"Шард {index} отклонил обновление со статусом {status}")
+                break
+            queue.task_done()
+
+
+async def run_front() -> None:
+    """Запустить фронт: прием обновлений от Telegram и пересылку по шардам"""
+    from telegram import Bot
+    from telegram.error import NetworkError, RetryAfter
+
+    from config import (
+        BOT_TOKEN, UPDATE_MODE, ALLOWED_UPDATES, SHARD_HOSTS, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT,
+        WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE, WEBHOOK_MAX_CONNECTIONS
+    )
+
+    require_secret(WEBHOOK_SECRET)
+    router = ShardRouter(SHARD_HOSTS, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE)
+    router.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    async def handle_webhook(method: str, path: str, headers: Dict[str, str], body: bytes):
+        """Принять обновление от Telegram и передать его шарду"""
+        if path.split("?", 1)[0] != WEBHOOK_PATH or method != "POST":
+            return 404, {}, b""
+        if not hmac.compare_digest(
+            headers.get("x-telegram-bot-api-secret-token", "").encode(), WEBHOOK_SECRET.encode()
+        ):
+            return 403, {}, b""
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return 400, {}, b""
+        try:
+            await asyncio.wait_for(router.route(data, body), 1.0)
+        except asyncio.TimeoutError:
+            return 503, {"Retry-After": "1"}, b""
+        return 200, {}, b""
+
+    async def poll(bot) -> None:
+        """Получать обновления через getUpdates и передавать их шардам"""
+        offset = None
+        while not stop_event.is_set():
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=ALLOWED_UPDATES)
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except NetworkError as e:
+                logger.warning(f"Ошибка getUpdates: {e}")
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                await router.route(update.to_dict())
+                offset = update.update_id + 1
+
+    async with Bot(BOT_TOKEN) as bot:
+        server = None
+        poller = None
+        if UPDATE_MODE == 'webhook':
+            server = HTTPServer(handle_webhook, host=WEBHOOK_LISTEN, port=WEBHOOK_PORT)
+            await server.start()
+            await bot.set_webhook(
+                url=WEBHOOK_URL,
+                secret_token=WEBHOOK_SECRET or None,
+                allowed_updates=ALLOWED_UPDATES,
+                max_connections=WEBHOOK_MAX_CONNECTIONS
+            )
+        else:
+            await bot.delete_webhook()
+            poller = asyncio.create_task(poll(bot))
+
+        logger.info(f"🤖 Фронт шардирования запущен ({len(SHARD_HOSTS)} шардов, режим {UPDATE_MODE})")
+        await stop_event.wait()
+
+        if poller is not None:
+            poller.cancel()
+            await asyncio.gather(poller, return_exceptions=True)
+        if server is not None:
+            await server.stop()
+        await router.stop()
+
+
+def run_local() -> None:
+    """Запустить фронт и все воркеры на этой машине"""
+    from config import SHARD_COUNT, WEBHOOK_SECRET
+
+    require_secret(WEBHOOK_SECRET)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workers = []
+    for index in range(SHARD_COUNT):
+        env = dict(os.environ, UPDATE_MODE="shard", SHARD_INDEX=str(index))
+        workers.append(subprocess.Popen([sys.executable, "main.py"], cwd=project_root, env=env))
+    logger.info(f"Запущено воркеров: {len(workers)}")
+
+    try:
+        asyncio.run(run_front())
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            try:
+                worker.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+
+
+def rebalance(old_count: int, new_count: int, backend_name: str, path: str) -> int:
+    """
+    Перераспределить данные пользователей при смене числа шардов
+
+    Выполняется при остановленных воркерах. Записи пользователей, у которых
+    сменился владелец, вместе с их именованными отсчетами и пометками
+    недоступности переносятся пачками в файл нового шарда и удаляются из
+    старого. Файл шарда, которого больше нет, удаляется, только если в нем не
+    осталось ни одной записи.
+
+    Returns:
+        int: количество перенесенных пользователей
+    """
+    targets = [create_backend(backend_name, shard_storage_path(path, index)) for index in range(new_count)]
+    moved = 0
+    try:
+        for old_index in range(old_count):
+            source = targets[old_index] if old_index < new_count else create_backend(
+                backend_name, shard_storage_path(path, old_index)
+            )
+            # Пачки для каждого нового шарда: аргументы write_batch
+            pending: Dict[int, Dict[str, list]] = {}
+
+            def stage(target: int, field: str, item) -> None:
+                batch = pending.setdefault(target, {"upserts": [], "countdown_upserts": [], "inactive": []})
+                batch[field].append(item)
+                if len(batch[field]) >= REBALANCE_BATCH:
+                    targets[target].write_batch(deletes=[], **pending.pop(target))
+
+            removed: List[int] = []
+            for row in source.load_all():
+                target = shard_for(row[0], new_count)
+                if target != old_index:
+                    stage(target, "upserts", row)
+                    removed.append(row[0])
+            removed_countdowns = []
+            for row in source.load_countdowns():
+                target = shard_for(row[0], new_count)
+                if target != old_index:
+                    stage(target, "countdown_upserts", row)
+                    removed_countdowns.append(row[:2])
+            removed_inactive: List[int] = []
+            for user_id in source.load_inactive():
+                target = shard_for(user_id, new_count)
+                if target != old_index:
+                    stage(target, "inactive", user_id)
+                    removed_inactive.append(user_id)
+
+            for target, batch in pending.items():
+                targets[target].write_batch(deletes=[], **batch)
+            source.write_batch([], removed, countdown_deletes=removed_countdowns, active=removed_inactive)
+            moved += len(removed)
+            logger.info(f"Шард {old_index}: перенесено {len(removed)} пользователей, "
+                        f"{len(removed_countdowns)} отсчетов, {len(removed_inactive)} пометок недоступности")
+
+            if old_index >= new_count:
+                left = (sum(1 for _ in source.load_all()) + sum(1 for _ in source.load_countdowns())
+                        + sum(1 for _ in source.load_inactive()))
+                source.close()
+                if left:
+                    logger.error(f"В файле шарда {old_index} осталось записей: {left}, файл не удален")
+                    continue
+                for suffix in ("", "-wal", "-shm"):
+                    old_file = shard_storage_path(path, old_index) + suffix
+                    if os.path.exists(old_file):
+                        os.remove(old_file)
+    finally:
+        for backend in targets:
+            backend.close()
+    return moved
+
+
+def main() -> None:
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Шардированное развертывание бота")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("front", help="только фронт (воркеры запускаются отдельно)")
+    subparsers.add_parser("local", help="фронт и все воркеры на этой машине")
+    rebalance_parser = subparsers.add_parser("rebalance", help="перенести данные при смене числа шардов")
+    rebalance_parser.add_argument("--old", type=int, required=True, help="прежнее число шардов")
+    rebalance_parser.add_argument("--new", type=int, required=True, help="новое число шардов")
+    args = parser.parse_args()
+
+    if args.command == "front":
+        asyncio.run(run_front())
+    elif args.command == "local":
+        run_local()
+    else:
+        from config import STORAGE_BACKEND, STORAGE_PATH
+        moved = rebalance(args.old, args.new, STORAGE_BACKEND, STORAGE_PATH)
+        logger.info(f"Перебалансировка завершена: перенесено {moved} пользователей")
+
+
+if __name__ == "__main__":
+    main()
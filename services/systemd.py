@@ -0,0 +1,94 @@
+"""
+Интеграция с systemd: готовность, watchdog и статус (протокол sd_notify)
+
+Сообщения отправляются датаграммой в сокет из NOTIFY_SOCKET, поэтому
+библиотека libsystemd не нужна. Вне systemd (переменная не задана) все
+функции ничего не делают.
+
+Готовность (READY=1) сообщается, когда бот действительно работает: запущен
+планировщик и прошел первый успешный getUpdates (в режиме webhook - после
+регистрации webhook). Сигнал WATCHDOG=1 отправляет задача в цикле событий:
+если цикл завис или перестал работать планировщик либо polling, пинги
+прекращаются и systemd перезапускает сервис по WatchdogSec.
+"""
+import asyncio
+import logging
+import os
+import socket
+from typing import Callable, Optional
+
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+
+def notify(*states: str) -> bool:
+    """
+    Отправить состояния в systemd (например, "READY=1", "STATUS=...")
+
+    Returns:
+        bool: True, если сообщение отправлено (сервис запущен systemd с Type=notify)
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    # Сокет в абстрактном пространстве имен задается с "@" в начале
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall("\n".join(states).encode())
+        return True
+    except OSError as e:
+        logger.warning(f"Не удалось отправить уведомление systemd: {e}")
+        return False
+
+
+def watchdog_interval() -> Optional[float]:
+    """
+    Период пингов watchdog (половина WatchdogSec) или None, если watchdog не включен
+    """
+    usec = os.environ.get("WATCHDOG_USEC")
+    if not usec:
+        return None
+    pid = os.environ.get("WATCHDOG_PID")
+    if pid and int(pid) != os.getpid():
+        return None
+    return int(usec) / 1e6 / 2
+
+
+async def watchdog_loop(interval: float, healthy: Callable[[], bool]) -> None:
+    """
+    Пинговать watchdog, пока цикл событий жив и healthy() возвращает True
+
+    Args:
+        interval: период пингов (в секундах)
+        healthy: проверка, что основные компоненты бота работают
+    """
+    while True:
+        if healthy():
+            notify("WATCHDOG=1")
+        else:
+            logger.error("Проверка живости не пройдена: пинг watchdog пропущен")
+        await asyncio.sleep(interval)
+
+
+class ReadinessRequest(HTTPXRequest):
+    """
+    Запрос для getUpdates, который сообщает о первом успешном ответе Telegram
+
+    Подключается через ApplicationBuilder.get_updates_request: так готовность
+    сообщается только после того, как polling реально получает обновления.
+    """
+
+    def __init__(self, on_first_success: Callable[[], None], **kwargs):
+        super().__init__(**kwargs)
+        self._on_first_success: Optional[Callable[[], None]] = on_first_success
+
+    async def do_request(self, *args, **kwargs):
+        status, payload = await super().do_request(*args, **kwargs)
+        if status == 200 and self._on_first_success is not None:
+            callback, self._on_first_success = self._on_first_success, None
+            callback()
+        return status, payload
@@ -0,0 +1,112 @@
+"""
+Параллельная обработка обновлений с упорядоченными полосами по пользователям
+
+По умолчанию python-telegram-bot обрабатывает обновления по одному, и
+медленный запрос к Telegram у одного пользователя задерживает всех остальных.
+Простая параллельность ломает ConversationHandler: два сообщения одного
+пользователя могли бы обработаться в другом порядке.
+
+UserLaneProcessor раскладывает обновления по полосам (ключ - ID пользователя,
+для обновлений без пользователя - ID чата). Внутри полосы обновления идут
+строго по очереди поступления, разные полосы обрабатываются параллельно, но
+одновременно выполняется не больше max_running обработчиков. Очередь одной
+полосы ограничена max_lane_size: лишние обновления пользователя, который
+присылает их быстрее, чем бот успевает отвечать, отбрасываются и не занимают
+место остальных.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class _Lane:
+    """Полоса одного пользователя: замок очередности и число ожидающих обновлений"""
+    __slots__ = ("lock", "size")
+
+    def __init__(self):
+        # asyncio.Lock пропускает ожидающих в порядке очереди (FIFO)
+        self.lock = asyncio.Lock()
+        self.size = 0
+
+
+def lane_key(update: object) -> Optional[int]:
+    """Ключ полосы обновления: ID пользователя, иначе ID чата (None - без упорядочивания)"""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    return None
+
+
+class UserLaneProcessor(BaseUpdateProcessor):
+    """Обработчик обновлений: параллельно между пользователями, по порядку внутри пользователя"""
+
+    __slots__ = ("max_running", "max_lane_size", "stats", "_running", "_lanes")
+
+    def __init__(self, max_running: int = 16, max_lane_size: int = 20):
+        """
+        Args:
+            max_running: максимум одновременно выполняемых обработчиков
+            max_lane_size: максимум обновлений одного пользователя в обработке и в очереди
+
+        Raises:
+            ValueError: если ограничения не положительные
+        """
+        if max_running < 1 or max_lane_size < 1:
+            raise ValueError("Ограничения обработки обновлений должны быть положительными")
+        # Семафор базового класса ограничивает принятые обновления (выполняемые и ждущие
+        # своей очереди в полосе), собственный - только выполняемые. Иначе обновления,
+        # ждущие в полосе одного пользователя, занимали бы места остальных.
+        super().__init__(max_running * max_lane_size)
+        self.max_running = max_running
+        self.max_lane_size = max_lane_size
+        self.stats: Dict[str, int] = {"processed": 0, "dropped": 0}
+        self._running = asyncio.BoundedSemaphore(max_running)
+        self._lanes: Dict[int, _Lane] = {}
+
+    async def initialize(self) -> None:
+        """Ресурсов для подготовки нет"""
+
+    async def shutdown(self) -> None:
+        """Принятые обновления дожидается Application.stop, освобождать нечего"""
+
+    def lane_count(self) -> int:
+        """Количество полос, в которых есть обновления"""
+        return len(self._lanes)
+
+    async def do_process_update(self, update: object, coroutine: "Awaitable[Any]") -> None:
+        """Обработать обновление в очереди его полосы"""
+        key = lane_key(update)
+        if key is None:
+            async with self._running:
+                await coroutine
+            self.stats["processed"] += 1
+            return
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+        if lane.size >= self.max_lane_size:
+            # Корутина обработки не запускается: закрываем, чтобы не было предупреждения
+            coroutine.close()
+            self.stats["dropped"] += 1
+            logger.warning(f"Очередь обновлений пользователя {key} переполнена, обновление отброшено")
+            return
+
+        lane.size += 1
+        try:
+            async with lane.lock:
+                async with self._running:
+                    await coroutine
+            self.stats["processed"] += 1
+        finally:
+            lane.size -= 1
+            if lane.size == 0:
+                del self._lanes[key]
@@ -0,0 +1,83 @@
+"""
+Прием обновлений через webhook
+
+Telegram присылает обновления POST-запросами на встроенный HTTP сервер.
+Запрос проверяется по секретному токену, обновление кладется в ограниченную
+очередь приложения. Если очередь переполнена, сервер отвечает 503, и Telegram
+повторяет доставку позже (обратное давление вместо неограниченного роста памяти).
+"""
+import asyncio
+import hmac
+import json
+import logging
+from typing import Dict, Tuple
+
+from telegram import Update
+from telegram.ext import Application
+
+from utils.http_server import HTTPServer
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "x-telegram-bot-api-secret-token"
+
+
+class WebhookReceiver:
+    """HTTP эндпоинт для обновлений Telegram"""
+
+    def __init__(self, application: Application, path: str = "/webhook", secret_token: str = "",
+                 host: str = "127.0.0.1", port: int = 8443, enqueue_timeout: float = 1.0):
+        """
+        Args:
+            application: приложение, в очередь которого попадают обновления
+            path: путь эндпоинта
+            secret_token: секретный токен (заголовок X-Telegram-Bot-Api-Secret-Token)
+            host: адрес для прослушивания
+            port: порт для прослушивания
+            enqueue_timeout: сколько ждать места в очереди перед ответом 503 (в секундах)
+        """
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.enqueue_timeout = enqueue_timeout
+        self.accepted = 0
+        self.rejected = 0
+        self.server = HTTPServer(self.handle, host=host, port=port)
+
+    async def start(self) -> None:
+        """Запустить HTTP сервер"""
+        await self.server.start()
+
+    async def stop(self) -> None:
+        """Остановить HTTP сервер"""
+        await self.server.stop()
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str],
+                     body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Обработать запрос от Telegram"""
+        if path.split("?", 1)[0] != self.path:
+            return 404, {}, b""
+        if method != "POST":
+            return 405, {}, b""
+
+        if self.secret_token and not hmac.compare_digest(
+            headers.get(SECRET_TOKEN_HEADER, "").encode(), self.secret_token.encode()
+        ):
+            logger.warning("Webhook запрос с неверным секретным токеном отклонен")
+            return 403, {}, b""
+
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except Exception as e:
+            logger.warning(f"Некорректное обновление в webhook запросе: {e}")
+            return 400, {}, b""
+
+        try:
+            await asyncio.wait_for(self.application.update_queue.put(update), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning("Очередь обновлений переполнена, Telegram повторит доставку")
+            return 503, {"Retry-After": "1"}, b""
+
+        self.accepted += 1
+        return 200, {}, b""
@@ -0,0 +1,69 @@
+"""
+Общие фикстуры тестов
+
+Тесты прогоняют обновления через настоящий путь обработки бота:
+Application из main.setup_handlers без сети (ответы перехватываются).
+"""
+import os
+from datetime import datetime
+
+import pytest
+
+# config требует токен при импорте
+os.environ.setdefault("BOT_TOKEN", "123456:test")
+
+from telegram import Chat, Message, Update, User  # noqa: E402
+from telegram.ext import Application, ExtBot  # noqa: E402
+
+
+class Replies(list):
+    """Тексты ответов бота в порядке отправки"""
+
+
+@pytest.fixture
+def replies(monkeypatch) -> Replies:
+    """Перехватить Message.reply_text: ответы попадают в список вместо Telegram"""
+    sent = Replies()
+
+    async def reply_text(self, text, *args, **kwargs):
+        sent.append(text)
+
+    monkeypatch.setattr(Message, "reply_text", reply_text)
+    return sent
+
+
+@pytest.fixture
+def application(monkeypatch) -> Application:
+    """Приложение с обработчиками бота (как в main), без обращений к Telegram"""
+    import main
+
+    async def initialize(self) -> None:
+        pass
+
+    monkeypatch.setattr(ExtBot, "initialize", initialize)
+    app = Application.builder().token(os.environ["BOT_TOKEN"]).updater(None).build()
+    main.setup_handlers(app)
+    return app
+
+
+@pytest.fixture
+def send(application):
+    """Отправить боту текстовое сообщение от пользователя и дождаться обработки"""
+    counter = iter(range(1, 1000000))
+
+    async def send_text(user_id: int, message_text: str, language_code: str = "en") -> None:
+        user = User(user_id, "test", False, language_code=language_code)
+        message = Message(next(counter), datetime.now(), Chat(user_id, Chat.PRIVATE), from_user=user, text=message_text)
+        message.set_bot(application.bot)
+        await application.initialize()
+        await application.process_update(Update(next(counter), message=message))
+
+    return send_text
+
+
+@pytest.fixture(autouse=True)
+def clean_storage():
+    """Очистить данные пользователей и диспетчеры после теста"""
+    yield
+    from benchmarks.common import reset_state
+    reset_state()
@@ -0,0 +1,164 @@
+"""
+Команды с аргументами через настоящий путь обработки: /live, /countdown, /broadcast
+"""
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from services import live_countdown, scheduler_service
+from services.broadcast import BroadcastService, set_broadcast
+from services.live_countdown import LiveCountdownService
+from utils.storage import find_countdown, get_countdowns, set_user_date, set_user_timezone
+
+
+class FakeBot:
+    """Заглушка telegram.Bot: запоминает вызовы без сети"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls.append(("send_message", chat_id, text))
+        return SimpleNamespace(message_id=len(self.calls))
+
+    async def pin_chat_message(self, chat_id, message_id, **kwargs):
+        self.calls.append(("pin_chat_message", chat_id, message_id))
+
+    async def unpin_chat_message(self, chat_id, message_id, **kwargs):
+        self.calls.append(("unpin_chat_message", chat_id, message_id))
+
+    async def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        self.calls.append(("edit_message_text", chat_id, text))
+
+
+@pytest.fixture
+def live_service(monkeypatch, tmp_path) -> LiveCountdownService:
+    service = LiveCountdownService(FakeBot(), str(tmp_path / "live.txt"))
+    monkeypatch.setattr(live_countdown, "_live_countdowns", service)
+    return service
+
+
+def test_live_enable_and_disable(send, replies, live_service):
+    set_user_date(201, datetime.now() + timedelta(days=30))
+
+    asyncio.run(send(201, "/live hour"))
+    assert live_service.entries[201].granularity == "hour"
+    assert "every hour" in replies[-1]
+
+    asyncio.run(send(201, "/live off"))
+    assert 201 not in live_service.entries
+    assert replies[-1] == "📌 Live countdown is off."
+
+
+def test_live_without_argument_shows_usage(send, replies, live_service):
+    asyncio.run(send(202, "/live"))
+    assert not live_service.entries
+    assert "/live" in replies[-1]
+
+
+def test_countdown_add_notify_remove(send, replies):
+    year = datetime.now().year + 1
+    set_user_timezone(203, "America/New_York")
+
+    asyncio.run(send(203, f"/countdown add 25.12.{year} New Year"))
+    countdown_id = find_countdown(203, "New Year")
+    assert countdown_id >= 0
+    assert replies[-1] == f'✅ Countdown "New Year" to 25.12.{year} saved. See it in /time_left'
+
+    asyncio.run(send(203, "/countdown notify New Year 09:00"))
+    assert get_countdowns(203)[0][3] == "09:00"
+    assert scheduler_service.countdown_dispatcher.get_minute(countdown_id) in (780, 840)
+
+    asyncio.run(send(203, "/countdown remove New Year"))
+    assert get_countdowns(203) == []
+    assert countdown_id not in scheduler_service.countdown_dispatcher
+    assert replies[-1] == '🗑 Countdown "New Year" removed.'
+
+
+def test_countdown_russian_arguments(send, replies):
+    year = datetime.now().year + 1
+    asyncio.run(send(204, f"/countdown добавить 01.01.{year} Отпуск", language_code="ru"))
+    assert find_countdown(204, "Отпуск") >= 0
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    import config
+    monkeypatch.setattr(config, "ADMIN_IDS", frozenset({300}))
+    return 300
+
+
+def test_broadcast_stop_when_idle(send, replies, admin, tmp_path):
+    set_broadcast(BroadcastService(FakeBot(), str(tmp_path / "broadcast.json")))
+    try:
+        asyncio.run(send(admin, "/broadcast stop"))
+    finally:
+        set_broadcast(None)
+    assert replies[-1] == "No broadcast is running."
+
+
+def test_broadcast_stop_cancels_interrupted(send, replies, admin, tmp_path):
+    bot = FakeBot()
+    service = BroadcastService(bot, str(tmp_path / "broadcast.json"))
+    service.state = {"text": "hi", "admin_chat_id": admin, "status_message_id": 1,
+                     "cursor": 10, "total": 20, "done": 10, "sent": 10, "failed": 0}
+    service.save()
+    set_broadcast(service)
+    try:
+        asyncio.run(send(admin, "/broadcast stop"))
+    finally:
+        set_broadcast(None)
+    assert service.state is None
+    assert not (tmp_path / "broadcast.json").exists()
+    assert bot.calls[-1][0] == "edit_message_text"
+
+
+def test_broadcast_ignores_non_admin(send, replies, admin, tmp_path):
+    asyncio.run(send(301, "/broadcast stop"))
+    assert replies == []
+
+
+def test_timezone_change_moves_countdown_notifications(send, replies):
+    year = datetime.now().year + 1
+    asyncio.run(send(205, f"/countdown add 25.12.{year} Trip"))
+    asyncio.run(send(205, "/countdown notify Trip 09:00"))
+    countdown_id = find_countdown(205, "Trip")
+
+    # 09:00 в Москве (UTC+3) - 06:00 UTC
+    assert scheduler_service.countdown_dispatcher.get_minute(countdown_id) == 360
+
+    asyncio.run(send(205, "/timezone Asia/Tokyo"))
+
+    # 09:00 в Токио (UTC+9) - 00:00 UTC
+    assert scheduler_service.countdown_dispatcher.get_minute(countdown_id) == 0
+
+
+def test_broadcast_replies_are_labelled_per_shard(send, replies, admin, tmp_path, monkeypatch):
+    import config
+    from services.sharding import shard_for
+
+    monkeypatch.setattr(config, "UPDATE_MODE", "shard")
+    monkeypatch.setattr(config, "SHARD_COUNT", 2)
+    monkeypatch.setattr(config, "SHARD_INDEX", 1 - shard_for(admin, 2))
+    set_broadcast(BroadcastService(FakeBot(), str(tmp_path / "broadcast.json")))
+    try:
+        # Справку отправляет только шард администратора, а этот шард - чужой
+        asyncio.run(send(admin, "/broadcast"))
+        assert replies == []
+
+        asyncio.run(send(admin, "/broadcast stop"))
+    finally:
+        set_broadcast(None)
+    assert replies[-1] == f"Shard {config.SHARD_INDEX + 1} of 2: No broadcast is running."
+
+
+def test_stats_is_labelled_per_shard(send, replies, admin, monkeypatch):
+    import config
+
+    monkeypatch.setattr(config, "UPDATE_MODE", "shard")
+    monkeypatch.setattr(config, "SHARD_COUNT", 4)
+    monkeypatch.setattr(config, "SHARD_INDEX", 2)
+    asyncio.run(send(admin, "/stats"))
+    assert replies[-1].startswith("Shard 3 of 4: 📊 Statistics")
@@ -0,0 +1,147 @@
+"""
+Даты: разбор ввода, тексты ошибок разбора и колонка дат хранилища
+"""
+from datetime import datetime
+
+import pytest
+
+from utils.storage import add_countdown, aggregates, get_user_date, set_user_date
+from utils.time_utils import MAX_YEAR, ParseError, parse_date, parse_time
+
+
+@pytest.mark.parametrize("date_text", ["25.12.2026", "25/12/2026", "2026-12-25", " 25.12.2026 "])
+def test_parse_date_formats(date_text):
+    assert parse_date(date_text) == datetime(2026, 12, 25)
+
+
+def test_parse_date_single_digit_day_and_month():
+    assert parse_date("1.2.2027") == datetime(2027, 2, 1)
+    assert parse_date("2027-2-1") == datetime(2027, 2, 1)
+
+
+@pytest.mark.parametrize("time_text, expected", [("09:00", (9, 0)), ("9:00", (9, 0)), ("0900", (9, 0)),
+                                                 ("900", (9, 0)), ("23:59", (23, 59)), ("0000", (0, 0))])
+def test_parse_time_formats(time_text, expected):
+    assert (parse_time(time_text).hour, parse_time(time_text).minute) == expected
+
+
+def test_parse_date_leap_years():
+    assert parse_date("29.02.2028") == datetime(2028, 2, 29)
+    assert parse_date("29.02.2000") == datetime(2000, 2, 29)
+    with pytest.raises(ParseError) as error:
+        parse_date("29.02.2100")
+    assert error.value.values == {"days": 28, "month": 2, "year": 2100, "day": 29}
+
+
+@pytest.mark.parametrize("date_text, code", [
+    ("31.04.2027", "day_range"),
+    ("00.01.2027", "day_range"),
+    ("01.13.2027", "month_range"),
+    ("01.01.0000", "year_range"),
+    ("01.01.27", "year_digits"),
+    ("001.01.2027", "day_month_digits"),
+    ("25.12", "date_parts"),
+    ("2026-12", "date_parts_iso"),
+    ("25 12 2026", "date_unrecognized"),
+    ("aa.bb.cccc", "date_not_numbers"),
+    ("²5.12.2026", "date_not_numbers"),
+])
+def test_parse_date_errors(date_text, code):
+    with pytest.raises(ParseError) as error:
+        parse_date(date_text)
+    assert error.value.code == code
+
+
+@pytest.mark.parametrize("time_text, code", [
+    ("24:00", "hour_range"),
+    ("12:60", "minute_range"),
+    ("2400", "hour_range"),
+    ("9:5", "time_format"),
+    ("90", "time_format"),
+    ("ab:cd", "time_not_numbers"),
+])
+def test_parse_time_errors(time_text, code):
+    with pytest.raises(ParseError) as error:
+        parse_time(time_text)
+    assert error.value.code == code
+
+
+def test_cached_parse_error_raised_again():
+    for _ in range(2):
+        with pytest.raises(ParseError):
+            parse_date("31.02.2027")
+
+
+def test_parse_date_rejects_far_future_year():
+    with pytest.raises(ValueError):
+        parse_date("01.01.9999")
+    assert parse_date(f"31.12.{MAX_YEAR}") == datetime(MAX_YEAR, 12, 31)
+
+
+def test_storage_rejects_out_of_range_date_without_writing():
+    set_user_date(5, datetime(2030, 1, 1))
+
+    with pytest.raises(ValueError):
+        set_user_date(5, datetime(9999, 1, 1))
+    with pytest.raises(ValueError):
+        add_countdown(5, "Далеко", datetime(9999, 1, 1))
+
+    assert get_user_date(5).replace(tzinfo=None) == datetime(2030, 1, 1)
+    assert aggregates.users_with_date == 1
+    assert aggregates.countdowns == 0
+
+
+def test_init_storage_skips_out_of_range_dates():
+    from utils.storage import close_storage, find_countdown, init_storage
+    from utils.storage_backends import MemoryBackend
+
+    far = 2 ** 31 * 60
+    backend = MemoryBackend()
+    backend.write_batch(
+        [(1, 0, "09:00", None), (2, far, None, None)], [],
+        countdown_upserts=[(1, "Скоро", 60, None), (1, "Далеко", far, None)]
+    )
+    init_storage(backend)
+    try:
+        assert get_user_date(2) is None
+        assert aggregates.users_with_date == 1
+        assert find_countdown(1, "Далеко") < 0
+        assert aggregates.countdowns == 1
+    finally:
+        close_storage()
+
+
+def test_parse_errors_follow_user_language(send, replies):
+    import asyncio
+    import re
+
+    asyncio.run(send(401, "/countdown add 31.13.2030 Trip"))
+    asyncio.run(send(401, "/countdown add 25.12.2030 Trip"))
+    asyncio.run(send(401, "/countdown notify Trip 25:00"))
+    assert replies[0] == (
+        "❌ Invalid date: the month must be from 1 to 12, got 13\n\n"
+        "Use the DD.MM.YYYY format, for example: 25.12.2026"
+    )
+    assert "hours must be from 0 to 23, got 25" in replies[-1]
+    assert not any(re.search("[а-яА-Я]", reply) for reply in replies)
+
+
+def test_parse_error_keeps_russian_text_for_logs():
+    from utils.time_utils import ParseError
+
+    with pytest.raises(ParseError) as error:
+        parse_date("29.02.2027")
+    assert error.value.code == "day_range"
+    assert str(error.value) == "день должен быть от 1 до 28 для 02.2027, а указан 29"
+
+
+def test_users_with_passed_date_leaves_date_cache_alone():
+    from utils.storage import date_to_minutes, users_with_passed_date
+
+    set_user_date(6, datetime(2020, 1, 1))
+    set_user_date(7, datetime(2090, 1, 1))
+    cached = date_to_minutes.cache_info().currsize
+
+    assert users_with_passed_date(datetime(2030, 1, 1, 12, 30)) == [6]
+    assert users_with_passed_date() == [6]
+    assert date_to_minutes.cache_info().currsize == cached
@@ -0,0 +1,194 @@
+"""
+Журнал доставок: запись только подтвержденных доставок, восстановление после перезапуска, досылка без дублей
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.common import reset_state
+from services import scheduler_service, sender as sender_module
+from services.delivery_journal import DeliveryJournal
+from services.dispatcher import MINUTES_PER_DAY
+from services.sender import OUTCOME_FAILED, OUTCOME_SENT, OutboundMessage
+from utils.storage import (
+    add_countdown, get_countdown_delivery_day, get_delivery_day, set_countdown_notification,
+    set_user_date, set_user_notification
+)
+
+
+class FakeSender:
+    """Заглушка очереди исходящих сообщений: запоминает сообщения, итог доставки задает тест"""
+
+    def __init__(self):
+        self.messages = []
+
+    def submit(self, chat_id, text, deadline=None, callback=None, **kwargs) -> OutboundMessage:
+        message = OutboundMessage(chat_id=chat_id, text=text, deadline=0.0, kwargs=kwargs, callback=callback)
+        self.messages.append(message)
+        return message
+
+    def pending(self) -> int:
+        return 0
+
+    def complete(self, outcome: str) -> None:
+        """Завершить все сообщения очереди с итогом outcome"""
+        for message in self.messages:
+            message.outcome = outcome
+            if message.callback is not None:
+                message.callback(message)
+        self.messages.clear()
+
+
+@pytest.fixture
+def fake_sender(monkeypatch) -> FakeSender:
+    sender = FakeSender()
+    monkeypatch.setattr(sender_module, "_sender", sender)
+    return sender
+
+
+@pytest.fixture
+def today() -> int:
+    return scheduler_service.utc_minute() // MINUTES_PER_DAY
+
+
+def open_journal(path, today: int) -> DeliveryJournal:
+    journal = DeliveryJournal(str(path))
+    journal.open(today)
+    scheduler_service.set_journal(journal)
+    return journal
+
+
+def add_notified_user(user_id: int) -> int:
+    """Добавить пользователя с уведомлением в 09:00 по его часовому поясу; вернуть минуту суток UTC"""
+    set_user_date(user_id, datetime.now() + timedelta(days=365))
+    set_user_notification(user_id, "09:00")
+    scheduler_service.setup_notification_job(user_id, 9, 0)
+    return scheduler_service.dispatcher.get_minute(user_id)
+
+
+def add_notified_countdown(user_id: int, name: str) -> int:
+    """Добавить отсчет с уведомлением в 09:00 по часовому поясу владельца"""
+    countdown_id = add_countdown(user_id, name, datetime.now() + timedelta(days=365))
+    set_countdown_notification(countdown_id, "09:00")
+    scheduler_service.setup_countdown_notification(countdown_id, 9, 0)
+    return countdown_id
+
+
+def test_countdown_delivery_journaled_only_after_send(tmp_path, fake_sender, today):
+    journal = open_journal(tmp_path / "journal.log", today)
+    countdown_id = add_notified_countdown(401, "Trip")
+    minute = scheduler_service.countdown_dispatcher.get_minute(countdown_id)
+
+    asyncio.run(scheduler_service.fire_minute(minute, today))
+    assert len(fake_sender.messages) == 1
+    assert get_countdown_delivery_day(countdown_id) < today
+
+    # Пока итога нет, повторная рассылка той же минуты сообщение не дублирует
+    asyncio.run(scheduler_service.fire_minute(minute, today))
+    assert len(fake_sender.messages) == 1
+
+    fake_sender.complete(OUTCOME_SENT)
+    assert get_countdown_delivery_day(countdown_id) == today
+    journal.close()
+    assert f'C {today} 401 "Trip"' in (tmp_path / "journal.log").read_text(encoding="ascii").splitlines()
+
+
+def test_failed_countdown_delivery_not_journaled(tmp_path, fake_sender, today):
+    journal = open_journal(tmp_path / "journal.log", today)
+    countdown_id = add_notified_countdown(402, "Trip")
+    minute = scheduler_service.countdown_dispatcher.get_minute(countdown_id)
+
+    asyncio.run(scheduler_service.fire_minute(minute, today))
+    fake_sender.complete(OUTCOME_FAILED)
+    assert get_countdown_delivery_day(countdown_id) < today
+
+    asyncio.run(scheduler_service.fire_minute(minute, today))
+    assert len(fake_sender.messages) == 1
+    journal.close()
+
+
+def test_countdown_delivery_survives_restart(tmp_path, fake_sender, today):
+    path = tmp_path / "journal.log"
+    journal = open_journal(path, today)
+    minute = scheduler_service.countdown_dispatcher.get_minute(add_notified_countdown(403, "Годовщина"))
+    asyncio.run(scheduler_service.fire_minute(minute, today))
+    fake_sender.complete(OUTCOME_SENT)
+    journal.record_tick(today * MINUTES_PER_DAY + minute - 1)
+    journal.close()
+
+    # После перезапуска отсчеты загружаются в другом порядке и получают другие ID
+    reset_state()
+    add_notified_countdown(404, "Other")
+    countdown_id = add_notified_countdown(403, "Годовщина")
+    journal = open_journal(path, today)
+    assert get_countdown_delivery_day(countdown_id) == today
+
+    now_minute = today * MINUTES_PER_DAY + minute + 1
+    assert asyncio.run(scheduler_service.catch_up_missed_notifications(now_minute)) == 1
+    assert [message.chat_id for message in fake_sender.messages] == [404]
+    journal.close()
+
+
+def test_open_replays_latest_day_and_compacts(tmp_path, today):
+    for user_id in (411, 412, 413):
+        add_notified_user(user_id)
+    path = tmp_path / "journal.log"
+    path.write_text(
+        f"D {today - 1} 411\nD {today} 411\nD {today - 1} 411\n"
+        f"D {today - 5} 412\n"
+        "garbage line\n"
+        f"T {today * MINUTES_PER_DAY + 10}\nT {today * MINUTES_PER_DAY + 5}\n",
+        encoding="ascii"
+    )
+
+    journal = DeliveryJournal(str(path), retention_days=2)
+    assert journal.open(today) == 2
+    assert get_delivery_day(411) == today
+    assert get_delivery_day(412) == today - 5
+    assert get_delivery_day(413) == 0
+    assert journal.last_tick == today * MINUTES_PER_DAY + 10
+    journal.close()
+
+    # После сжатия остаются только последние дни и последняя минута
+    assert path.read_text(encoding="ascii").splitlines() == [f"D {today} 411", f"T {today * MINUTES_PER_DAY + 10}"]
+
+
+def test_catch_up_skips_users_delivered_before_restart(tmp_path, fake_sender, today):
+    path = tmp_path / "journal.log"
+    journal = open_journal(path, today)
+    minute = add_notified_user(421)
+    add_notified_user(422)
+    journal.record_delivery(421, today)
+    journal.record_tick(today * MINUTES_PER_DAY + minute - 1)
+    journal.close()
+
+    reset_state()
+    add_notified_user(422)
+    add_notified_user(421)
+    journal = open_journal(path, today)
+
+    now_minute = today * MINUTES_PER_DAY + minute + 1
+    assert asyncio.run(scheduler_service.catch_up_missed_notifications(now_minute)) == 1
+    assert [message.chat_id for message in fake_sender.messages] == [422]
+    assert journal.last_tick == now_minute - 1
+
+    # Пропущенные минуты обработаны: повторная досылка ничего не отправляет
+    fake_sender.complete(OUTCOME_SENT)
+    assert get_delivery_day(422) == today
+    assert asyncio.run(scheduler_service.catch_up_missed_notifications(now_minute)) == 0
+    journal.close()
+
+
+def test_catch_up_limited_by_grace_window(tmp_path, fake_sender, today):
+    path = tmp_path / "journal.log"
+    journal = open_journal(path, today)
+    minute = add_notified_user(431)
+    journal.record_tick(today * MINUTES_PER_DAY + minute - 1)
+    scheduler_service.set_journal(journal, grace_minutes=30)
+
+    # Бот простоял дольше окна досылки: время уведомления осталось за окном
+    now_minute = today * MINUTES_PER_DAY + minute + 31
+    assert asyncio.run(scheduler_service.catch_up_missed_notifications(now_minute)) == 0
+    assert fake_sender.messages == []
+    journal.close()
@@ -0,0 +1,63 @@
+"""
+HTTP сервер: проверка заголовков запроса
+"""
+import asyncio
+
+import pytest
+
+from utils.http_server import HTTPServer, MAX_HEADERS
+
+
+async def _ok(method, path, headers, body):
+    return 200, {}, body
+
+
+async def _request(raw: bytes, max_body_size: int = 1024) -> bytes:
+    server = HTTPServer(_ok, port=0, max_body_size=max_body_size)
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(raw)
+        await writer.drain()
+        status_line = await reader.readline()
+        writer.close()
+        return status_line
+    finally:
+        await server.stop()
+
+
+def test_body_is_echoed():
+    status = asyncio.run(_request(b"POST / HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\nhi"))
+    assert status.startswith(b"HTTP/1.1 200")
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-1", b"1_0", b"+5"])
+def test_invalid_content_length_is_rejected(length):
+    status = asyncio.run(_request(b"POST / HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n"))
+    assert status.startswith(b"HTTP/1.1 400")
+
+
+def test_body_size_is_capped():
+    status = asyncio.run(_request(b"POST / HTTP/1.1\r\nContent-Length: 4096\r\n\r\n", max_body_size=1024))
+    assert status.startswith(b"HTTP/1.1 413")
+
+
+def test_header_count_is_capped():
+    headers = b"".join(b"X-Header-%d: 1\r\n" % number for number in range(MAX_HEADERS + 1))
+    status = asyncio.run(_request(b"GET / HTTP/1.1\r\n" + headers + b"\r\n"))
+    assert status.startswith(b"HTTP/1.1 431")
+
+
+def test_webhook_mode_requires_secret(monkeypatch):
+    import importlib
+    import config
+
+    monkeypatch.setenv("UPDATE_MODE", "webhook")
+    monkeypatch.setenv("WEBHOOK_URL", "https://example.com/webhook")
+    monkeypatch.setenv("WEBHOOK_SECRET", "")
+    try:
+        with pytest.raises(ValueError, match="WEBHOOK_SECRET"):
+            importlib.reload(config)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
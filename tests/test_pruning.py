@@ -0,0 +1,117 @@
+"""
+Недоступные чаты: отключение уведомлений по итогам доставки и возврат, когда пользователь снова пишет
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from telegram.error import Forbidden
+
+from benchmarks.common import reset_state
+from services import scheduler_service
+from services.sender import OUTCOME_UNREACHABLE, OutboundSender
+from utils.storage import (
+    add_countdown, close_storage, find_countdown, flush_storage, get_user_notification, init_storage,
+    is_user_inactive, set_countdown_notification, set_user_date, set_user_notification
+)
+from utils.storage_backends import MemoryBackend
+
+
+def add_notified_user(user_id: int) -> int:
+    """Добавить пользователя с уведомлением и отсчетом с уведомлением; вернуть ID отсчета"""
+    set_user_date(user_id, datetime.now() + timedelta(days=365))
+    set_user_notification(user_id, "09:00")
+    scheduler_service.setup_notification_job(user_id, 9, 0)
+    countdown_id = add_countdown(user_id, "Trip", datetime.now() + timedelta(days=100))
+    set_countdown_notification(countdown_id, "18:30")
+    scheduler_service.setup_countdown_notification(countdown_id, 18, 30)
+    return countdown_id
+
+
+def test_prune_removes_notifications_and_keeps_settings():
+    countdown_id = add_notified_user(701)
+    pruned = scheduler_service.prune_stats["pruned"]
+
+    assert scheduler_service.prune_unreachable_chat(701)
+    assert is_user_inactive(701)
+    assert 701 not in scheduler_service.dispatcher
+    assert countdown_id not in scheduler_service.countdown_dispatcher
+    assert get_user_notification(701) == "09:00"
+    assert scheduler_service.prune_stats["pruned"] == pruned + 1
+
+    # Повторный итог "недоступен" ничего не меняет
+    assert not scheduler_service.prune_unreachable_chat(701)
+    assert scheduler_service.prune_stats["pruned"] == pruned + 1
+
+
+def test_prune_ignores_unknown_user():
+    assert not scheduler_service.prune_unreachable_chat(702)
+    assert not is_user_inactive(702)
+
+
+def test_unreachable_delivery_outcome_prunes_user():
+    class BlockedBot:
+        async def send_message(self, chat_id, text, **kwargs):
+            raise Forbidden("Forbidden: bot was blocked by the user")
+
+    add_notified_user(703)
+    sender = OutboundSender(BlockedBot(), workers=1, global_rate=1000.0, per_chat_interval=0.0,
+                            on_unreachable=scheduler_service.prune_unreachable_chat)
+
+    async def scenario():
+        message = sender.submit(703, "text")
+        await sender.drain(5.0)
+        await sender.stop()
+        return message
+
+    assert asyncio.run(scenario()).outcome == OUTCOME_UNREACHABLE
+    assert is_user_inactive(703)
+    assert 703 not in scheduler_service.dispatcher
+
+
+def test_message_from_user_reactivates_notifications(send, replies):
+    countdown_id = add_notified_user(704)
+    minute = scheduler_service.dispatcher.get_minute(704)
+    countdown_minute = scheduler_service.countdown_dispatcher.get_minute(countdown_id)
+    scheduler_service.prune_unreachable_chat(704)
+    reactivated = scheduler_service.prune_stats["reactivated"]
+
+    asyncio.run(send(704, "/help"))
+    assert not is_user_inactive(704)
+    assert scheduler_service.dispatcher.get_minute(704) == minute
+    assert scheduler_service.countdown_dispatcher.get_minute(countdown_id) == countdown_minute
+    assert scheduler_service.prune_stats["reactivated"] == reactivated + 1
+    assert replies
+
+
+def test_inactive_mark_survives_restart():
+    backend = MemoryBackend()
+    init_storage(backend)
+    try:
+        add_notified_user(705)
+        add_notified_user(706)
+        scheduler_service.prune_unreachable_chat(705)
+        flush_storage()
+    finally:
+        close_storage()
+
+    reset_state()
+    init_storage(backend)
+    try:
+        assert is_user_inactive(705)
+        assert not is_user_inactive(706)
+        scheduler_service.restore_notification_jobs()
+        assert 705 not in scheduler_service.dispatcher
+        assert find_countdown(705, "Trip") not in scheduler_service.countdown_dispatcher
+        assert 706 in scheduler_service.dispatcher
+
+        assert scheduler_service.reactivate_user_notifications(705)
+        flush_storage()
+    finally:
+        close_storage()
+
+    reset_state()
+    init_storage(backend)
+    try:
+        assert not is_user_inactive(705)
+    finally:
+        close_storage()
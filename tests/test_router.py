@@ -0,0 +1,34 @@
+"""
+Маршрутизация обновлений: команды с аргументами через main.setup_handlers
+"""
+import asyncio
+
+from utils.storage import get_user_timezone
+
+
+def test_command_arguments_reach_handler(send, replies):
+    asyncio.run(send(101, "/timezone Europe/Berlin"))
+
+    assert get_user_timezone(101) == "Europe/Berlin"
+    assert replies and "Europe/Berlin" in replies[-1]
+
+
+def test_command_without_arguments(send, replies):
+    asyncio.run(send(102, "/timezone"))
+
+    assert get_user_timezone(102) == "Europe/Moscow"
+    assert "Europe/Moscow" in replies[-1]
+
+
+def test_router_passes_split_arguments(application):
+    from datetime import datetime
+    from telegram import Chat, Message, Update, User
+    from handlers.router import UpdateRouter
+
+    router = next(handler for handler in application.handlers[0] if isinstance(handler, UpdateRouter))
+    user = User(103, "test", False)
+    message = Message(1, datetime.now(), Chat(103, Chat.PRIVATE), from_user=user, text="/countdown add  25.12.2030 X")
+    check = router.check_update(Update(1, message=message))
+
+    assert check is not None
+    assert check[2] == ["add", "25.12.2030", "X"]
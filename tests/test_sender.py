@@ -0,0 +1,113 @@
+"""
+Очередь исходящих сообщений: пауза по RetryAfter и разделение ошибок на постоянные и временные
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from services.sender import (
+    OUTCOME_FAILED, OUTCOME_SENT, OUTCOME_UNREACHABLE, OutboundSender, is_permanent_error
+)
+
+
+class ScriptedBot:
+    """Заглушка telegram.Bot: send_message по очереди выбрасывает ошибки из сценария, потом отправляет"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors:
+            error = self.errors.pop(0)
+            if error is not None:
+                raise error
+        self.sent.append((chat_id, text, time.monotonic()))
+        return SimpleNamespace(message_id=len(self.sent))
+
+
+def make_sender(bot, unreachable=None, **kwargs) -> OutboundSender:
+    options = dict(workers=1, global_rate=1000.0, per_chat_interval=0.0, max_attempts=1, transient_threshold=2)
+    options.update(kwargs)
+    return OutboundSender(bot, on_unreachable=unreachable.append if unreachable is not None else None, **options)
+
+
+async def deliver(sender: OutboundSender, *chat_ids: int):
+    """Поставить по сообщению в каждый чат и дождаться итогов доставки"""
+    messages = [sender.submit(chat_id, "text") for chat_id in chat_ids]
+    await sender.drain(5.0)
+    await sender.stop()
+    return messages
+
+
+def test_retry_after_defers_message_and_pauses_sending():
+    bot = ScriptedBot(RetryAfter(0.2))
+    sender = make_sender(bot)
+
+    async def scenario():
+        started = time.monotonic()
+        messages = await deliver(sender, 501)
+        return started, messages
+
+    started, (message,) = asyncio.run(scenario())
+    assert message.outcome == OUTCOME_SENT
+    assert message.attempts == 2
+    assert sender.stats["retried"] == 1
+    assert bot.sent[0][2] - started >= 0.2
+
+
+def test_forbidden_is_permanent_without_retry():
+    unreachable = []
+    bot = ScriptedBot(Forbidden("Forbidden: bot was blocked by the user"))
+    sender = make_sender(bot, unreachable, max_attempts=5)
+
+    (message,) = asyncio.run(deliver(sender, 502))
+    assert message.outcome == OUTCOME_UNREACHABLE
+    assert message.attempts == 1
+    assert unreachable == [502]
+
+
+def test_bad_request_permanent_only_for_missing_chat():
+    unreachable = []
+    bot = ScriptedBot(BadRequest("Chat not found"), BadRequest("Message is too long"))
+    sender = make_sender(bot, unreachable)
+
+    missing, too_long = asyncio.run(deliver(sender, 503, 504))
+    assert missing.outcome == OUTCOME_UNREACHABLE
+    assert too_long.outcome == OUTCOME_FAILED
+    assert unreachable == [503]
+
+
+def test_transient_errors_make_chat_unreachable_only_in_a_row():
+    unreachable = []
+    bot = ScriptedBot(NetworkError("timed out"), None, NetworkError("timed out"), NetworkError("timed out"))
+    sender = make_sender(bot, unreachable)
+
+    async def scenario():
+        outcomes = []
+        for _ in range(4):
+            (message,) = await deliver(sender, 505)
+            outcomes.append(message.outcome)
+        return outcomes
+
+    # Успешная отправка между ошибками сбрасывает счетчик
+    assert asyncio.run(scenario()) == [OUTCOME_FAILED, OUTCOME_SENT, OUTCOME_FAILED, OUTCOME_UNREACHABLE]
+    assert unreachable == [505]
+
+
+def test_network_error_retried_before_counting_as_failure():
+    bot = ScriptedBot(NetworkError("timed out"))
+    sender = make_sender(bot, max_attempts=2)
+
+    (message,) = asyncio.run(deliver(sender, 506))
+    assert message.outcome == OUTCOME_SENT
+    assert message.attempts == 2
+
+
+def test_is_permanent_error():
+    assert is_permanent_error(Forbidden("bot was kicked from the group chat"))
+    assert is_permanent_error(BadRequest("Bad Request: user is deactivated"))
+    assert not is_permanent_error(BadRequest("Message text is empty"))
+    assert not is_permanent_error(NetworkError("Bad Gateway"))
@@ -0,0 +1,100 @@
+"""
+Шардирование: перебалансировка данных и обязательный WEBHOOK_SECRET
+"""
+import os
+
+import pytest
+
+from services.sharding import rebalance, shard_for, shard_storage_path
+from utils.storage_backends import SQLiteBackend
+
+
+def _contents(path: str, count: int):
+    users, countdowns, inactive = {}, {}, {}
+    for index in range(count):
+        backend = SQLiteBackend(shard_storage_path(path, index))
+        users.update((row[0], index) for row in backend.load_all())
+        countdowns.update((row[:2], index) for row in backend.load_countdowns())
+        inactive.update((user_id, index) for user_id in backend.load_inactive())
+        backend.close()
+    return users, countdowns, inactive
+
+
+def _fill(path: str, count: int, user_ids) -> None:
+    for index in range(count):
+        owned = [user_id for user_id in user_ids if shard_for(user_id, count) == index]
+        backend = SQLiteBackend(shard_storage_path(path, index))
+        backend.write_batch(
+            [(user_id, 60, "09:00", None) for user_id in owned], [],
+            countdown_upserts=[(user_id, "Отпуск", 120, None) for user_id in owned],
+            inactive=[user_id for user_id in owned if user_id % 3 == 0]
+        )
+        backend.close()
+
+
+def test_rebalance_moves_all_tables(tmp_path):
+    path = str(tmp_path / "users.db")
+    user_ids = range(1, 301)
+    _fill(path, 2, user_ids)
+
+    moved = rebalance(2, 4, "sqlite", path)
+    users, countdowns, inactive = _contents(path, 4)
+
+    assert moved > 0
+    assert users == {user_id: shard_for(user_id, 4) for user_id in user_ids}
+    assert countdowns == {(user_id, "Отпуск"): shard_for(user_id, 4) for user_id in user_ids}
+    assert inactive == {user_id: shard_for(user_id, 4) for user_id in user_ids if user_id % 3 == 0}
+
+
+def test_rebalance_shrink_removes_emptied_files(tmp_path):
+    path = str(tmp_path / "users.db")
+    user_ids = range(1, 301)
+    _fill(path, 3, user_ids)
+
+    rebalance(3, 2, "sqlite", path)
+    users, countdowns, inactive = _contents(path, 2)
+
+    assert not os.path.exists(shard_storage_path(path, 2))
+    assert set(users) == set(user_ids)
+    assert len(countdowns) == 300
+    assert set(inactive) == {user_id for user_id in user_ids if user_id % 3 == 0}
+
+
+def test_front_requires_secret(monkeypatch):
+    import asyncio
+    import config
+    from services.sharding import run_front
+
+    monkeypatch.setattr(config, "WEBHOOK_SECRET", "")
+    with pytest.raises(ValueError, match="WEBHOOK_SECRET"):
+        asyncio.run(run_front())
+
+
+def test_shard_mode_requires_secret(monkeypatch):
+    import importlib
+    import config
+
+    monkeypatch.setenv("UPDATE_MODE", "shard")
+    monkeypatch.setenv("WEBHOOK_SECRET", "")
+    try:
+        with pytest.raises(ValueError, match="WEBHOOK_SECRET"):
+            importlib.reload(config)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
+
+def test_router_fans_out_broadcast():
+    import asyncio
+    from services.sharding import ShardRouter
+
+    async def route_all():
+        router = ShardRouter(["127.0.0.1:1", "127.0.0.1:2", "127.0.0.1:3"], "/webhook", "secret")
+        admin = {"id": 7, "is_bot": False, "first_name": "a"}
+        await router.route({"update_id": 1, "message": {"from": admin, "text": "/start"}})
+        await router.route({"update_id": 2, "message": {"from": admin, "text": "/broadcast@time_bot hi"}})
+        return [queue.qsize() for queue in router.queues]
+
+    sizes = asyncio.run(route_all())
+    owner = shard_for(7, 3)
+    assert sizes == [2 if index == owner else 1 for index in range(3)]
@@ -0,0 +1,18 @@
+"""
+Импорт: проверка записей
+"""
+from utils.transfer import RecordError, decode_jsonl
+
+
+def test_far_future_date_is_a_record_error():
+    lines = [
+        '{"user_id": 1, "target_date": "2030-01-01T00:00"}\n',
+        '{"user_id": 2, "target_date": "9999-01-01T00:00"}\n',
+    ]
+    records = list(decode_jsonl(lines))
+
+    assert records[0] == (1, (1, 1893456000, None, None))
+    line_number, error = records[1]
+    assert line_number == 2
+    assert isinstance(error, RecordError)
+    assert "строка 2" in str(error)
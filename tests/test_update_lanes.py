@@ -0,0 +1,116 @@
+"""
+Полосы обновлений: порядок внутри пользователя, параллельность между пользователями, переполнение полосы
+"""
+import asyncio
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User
+
+from services.update_lanes import UserLaneProcessor, lane_key
+
+
+def make_update(update_id: int, user_id: int) -> Update:
+    user = User(user_id, "test", False)
+    message = Message(update_id, datetime.now(), Chat(user_id, Chat.PRIVATE), from_user=user, text=str(update_id))
+    return Update(update_id, message=message)
+
+
+def test_lane_key_uses_user_then_chat():
+    assert lane_key(make_update(1, 601)) == 601
+    channel_post = Message(2, datetime.now(), Chat(-100, Chat.CHANNEL), text="post")
+    assert lane_key(Update(2, channel_post=channel_post)) == -100
+    assert lane_key("not an update") is None
+
+
+def test_updates_of_one_user_keep_order():
+    processor = UserLaneProcessor(max_running=4)
+    handled = []
+
+    async def handle(update_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        handled.append(update_id)
+
+    async def scenario():
+        # Первое обновление обрабатывается дольше остальных, но все равно завершается первым
+        delays = [0.05, 0.0, 0.02, 0.0]
+        await asyncio.gather(*(
+            processor.process_update(make_update(index, 602), handle(index, delay))
+            for index, delay in enumerate(delays)
+        ))
+
+    asyncio.run(scenario())
+    assert handled == [0, 1, 2, 3]
+    assert processor.lane_count() == 0
+    assert processor.stats["processed"] == 4
+
+
+def test_different_users_processed_concurrently():
+    processor = UserLaneProcessor(max_running=2)
+
+    async def scenario():
+        released = asyncio.Event()
+
+        async def wait_for_other_user():
+            await released.wait()
+
+        async def release():
+            released.set()
+
+        # Обработчик первого пользователя ждет второго: при последовательной обработке - зависание
+        await asyncio.wait_for(asyncio.gather(
+            processor.process_update(make_update(1, 603), wait_for_other_user()),
+            processor.process_update(make_update(2, 604), release()),
+        ), timeout=1.0)
+
+    asyncio.run(scenario())
+    assert processor.stats["processed"] == 2
+
+
+def test_running_handlers_limited():
+    processor = UserLaneProcessor(max_running=2)
+    running = []
+    peak = []
+
+    async def handle():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    async def scenario():
+        await asyncio.gather(*(
+            processor.process_update(make_update(user_id, user_id), handle()) for user_id in range(610, 620)
+        ))
+
+    asyncio.run(scenario())
+    assert max(peak) == 2
+    assert processor.stats["processed"] == 10
+
+
+def test_overflowing_lane_drops_only_that_user():
+    processor = UserLaneProcessor(max_running=4, max_lane_size=2)
+    handled = []
+
+    async def scenario():
+        blocker = asyncio.Event()
+
+        async def handle(update_id: int, wait: bool = False) -> None:
+            if wait:
+                await blocker.wait()
+            handled.append(update_id)
+
+        tasks = [asyncio.create_task(processor.process_update(make_update(1, 621), handle(1, wait=True)))]
+        await asyncio.sleep(0)
+        tasks += [
+            asyncio.create_task(processor.process_update(make_update(update_id, 621), handle(update_id)))
+            for update_id in (2, 3, 4)
+        ]
+        tasks.append(asyncio.create_task(processor.process_update(make_update(5, 622), handle(5))))
+        await asyncio.sleep(0.01)
+        blocker.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert handled == [5, 1, 2]
+    assert processor.stats["dropped"] == 2
+    assert processor.lane_count() == 0
@@ -0,0 +1,95 @@
+"""
+Агрегаты по пользователям для статистики администратора
+
+Счетчики обновляются за O(1) в каждой функции хранилища, которая меняет
+дату, уведомления или отсчеты, поэтому статистика не перебирает
+пользователей и отвечает за одно и то же время при любом их количестве:
+    users_with_date        - пользователей с основной датой
+    users_with_notification - пользователей с уведомлениями
+    countdowns             - именованных отсчетов
+    notification_minutes   - гистограмма уведомлений по местной минуте суток (1440 значений)
+    date_days, countdown_days - гистограммы целевых дат по местному дню от 1970-01-01
+
+Гистограммы дат хранят и прошедшие дни: запрос ближайших дат смотрит только
+нужный диапазон дней, поэтому старые ключи ему не мешают.
+"""
+from array import array
+from typing import Dict, List, Tuple
+
+MINUTES_PER_DAY = 1440
+
+
+class UserAggregates:
+    """Счетчики и гистограммы, которые поддерживают функции хранилища"""
+
+    def __init__(self):
+        self.users_with_date = 0
+        self.users_with_notification = 0
+        self.countdowns = 0
+        self.notification_minutes = array('i', [0]) * MINUTES_PER_DAY
+        self.date_days: Dict[int, int] = {}
+        self.countdown_days: Dict[int, int] = {}
+
+    @staticmethod
+    def _add_day(days: Dict[int, int], epoch_minutes: int, delta: int) -> None:
+        """Изменить счетчик дня даты (пустые дни удаляются)"""
+        day = epoch_minutes // MINUTES_PER_DAY
+        count = days.get(day, 0) + delta
+        if count:
+            days[day] = count
+        else:
+            days.pop(day, None)
+
+    def add_date(self, epoch_minutes: int) -> None:
+        """Учесть основную дату пользователя"""
+        self.users_with_date += 1
+        self._add_day(self.date_days, epoch_minutes, 1)
+
+    def remove_date(self, epoch_minutes: int) -> None:
+        """Убрать основную дату пользователя"""
+        self.users_with_date -= 1
+        self._add_day(self.date_days, epoch_minutes, -1)
+
+    def add_notification(self, minute_of_day: int) -> None:
+        """Учесть уведомления пользователя на местную минуту суток"""
+        self.users_with_notification += 1
+        self.notification_minutes[minute_of_day] += 1
+
+    def remove_notification(self, minute_of_day: int) -> None:
+        """Убрать уведомления пользователя"""
+        self.users_with_notification -= 1
+        self.notification_minutes[minute_of_day] -= 1
+
+    def add_countdown(self, epoch_minutes: int) -> None:
+        """Учесть именованный отсчет"""
+        self.countdowns += 1
+        self._add_day(self.countdown_days, epoch_minutes, 1)
+
+    def remove_countdown(self, epoch_minutes: int) -> None:
+        """Убрать именованный отсчет"""
+        self.countdowns -= 1
+        self._add_day(self.countdown_days, epoch_minutes, -1)
+
+    def dates_between(self, first_day: int, days: int) -> int:
+        """Основных дат в днях [first_day, first_day + days)"""
+        date_days = self.date_days
+        return sum(date_days.get(day, 0) for day in range(first_day, first_day + days))
+
+    def countdowns_between(self, first_day: int, days: int) -> int:
+        """Именованных отсчетов в днях [first_day, first_day + days)"""
+        countdown_days = self.countdown_days
+        return sum(countdown_days.get(day, 0) for day in range(first_day, first_day + days))
+
+    def busiest_minutes(self, limit: int = 5) -> List[Tuple[int, int]]:
+        """Минуты суток с наибольшим числом уведомлений: (минута, пользователей)"""
+        minutes = sorted(enumerate(self.notification_minutes), key=lambda item: item[1], reverse=True)
+        return [(minute, count) for minute, count in minutes[:limit] if count]
+
+    def hourly(self) -> List[int]:
+        """Уведомлений по часам местного времени (24 значения)"""
+        minutes = self.notification_minutes
+        return [sum(minutes[hour * 60:hour * 60 + 60]) for hour in range(24)]
+
+    def clear(self) -> None:
+        """Обнулить все счетчики"""
+        self.__init__()
@@ -0,0 +1,232 @@
+"""
+Компактное колоночное хранилище пользователей в памяти
+
+Вместо словарей с объектами datetime и строками "ЧЧ:ММ" данные лежат в
+типизированных массивах (модуль array):
+    ids      - ID пользователя (int64)
+    dates    - целевая дата в минутах от 1970-01-01 (int32)
+    minutes  - минута суток уведомления 0-1439 (int16), -1 если не настроено
+    delivered - день последнего доставленного уведомления от 1970-01-01 (int32), 0 если не было
+    zones    - номер часового пояса в таблице поясов хранилища (uint16), 0 - пояс по умолчанию
+
+Номер строки (слот) ищется по ID через хэш-таблицу с открытой адресацией,
+которая тоже хранится в массиве. Освобожденные слоты переиспользуются через
+free-list. В сумме выходит около 27 байт на пользователя.
+"""
+from array import array
+from itertools import compress
+from typing import Iterator, List, Optional, Tuple
+
+# Значения-пометки для пустых полей
+NO_DATE = 2 ** 31 - 1
+NO_NOTIFICATION = -1
+FREE_ID = 0
+
+# Даты, которые помещаются в колонку int32 (NO_DATE занят пометкой)
+MIN_EPOCH_MINUTES = -2 ** 31
+MAX_EPOCH_MINUTES = NO_DATE - 1
+
+# Пометки в хэш-индексе
+_EMPTY = -1
+_DELETED = -2
+
+# Множитель для хэширования Фибоначчи
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK64 = 2 ** 64 - 1
+
+
+class ColumnarUserStore:
+    """Колоночное хранилище: ID пользователя -> (дата в минутах, минута уведомлений, часовой пояс)"""
+
+    def __init__(self, capacity: int = 1024):
+        self.ids = array('q')
+        self.dates = array('i')
+        self.minutes = array('h')
+        self.delivered = array('i')
+        self.zones = array('H')
+        self._free = array('i')
+        self._count = 0
+        self._init_index(max(capacity, 8))
+
+    def _init_index(self, capacity: int) -> None:
+        """Создать пустой хэш-индекс (емкость - степень двойки)"""
+        size = 8
+        while size < capacity:
+            size *= 2
+        self._index = array('i', [_EMPTY]) * size
+        self._mask = size - 1
+        self._shift = 64 - size.bit_length() + 1
+        self._used = 0
+
+    def _hash(self, user_id: int) -> int:
+        return ((user_id * _HASH_MULTIPLIER) & _MASK64) >> self._shift
+
+    def find(self, user_id: int) -> int:
+        """
+        Найти слот пользователя
+
+        Returns:
+            int: номер слота или -1, если пользователя нет
+        """
+        index = self._index
+        ids = self.ids
+        mask = self._mask
+        # Хэш считается на месте: вызов метода заметен на самом горячем пути
+        position = ((user_id * _HASH_MULTIPLIER) & _MASK64) >> self._shift
+        while True:
+            slot = index[position]
+            if slot == _EMPTY:
+                return -1
+            if slot >= 0 and ids[slot] == user_id:
+                return slot
+            position = (position + 1) & mask
+
+    def _reserve_index(self) -> None:
+        """Перестроить индекс заранее, если после вставки он заполнится больше чем на 2/3"""
+        if (self._used + 1) * 3 > len(self._index) * 2:
+            self._rebuild_index(max(len(self._index), (self._count + 1) * 2))
+
+    def _insert_index(self, user_id: int, slot: int) -> None:
+        """Добавить слот в хэш-индекс"""
+        index = self._index
+        mask = self._mask
+        position = self._hash(user_id)
+        while index[position] >= 0:
+            position = (position + 1) & mask
+        if index[position] == _EMPTY:
+            self._used += 1
+        index[position] = slot
+
+    def _rebuild_index(self, capacity: int) -> None:
+        """Перестроить хэш-индекс (рост и очистка удаленных записей)"""
+        self._init_index(capacity)
+        index = self._index
+        mask = self._mask
+        for slot, user_id in enumerate(self.ids):
+            if user_id == FREE_ID:
+                continue
+            position = self._hash(user_id)
+            while index[position] != _EMPTY:
+                position = (position + 1) & mask
+            index[position] = slot
+            self._used += 1
+
+    def _allocate(self, user_id: int) -> int:
+        """Выделить слот для нового пользователя"""
+        self._reserve_index()
+        if self._free:
+            slot = self._free.pop()
+            self.ids[slot] = user_id
+        else:
+            slot = len(self.ids)
+            self.ids.append(user_id)
+            self.dates.append(NO_DATE)
+            self.minutes.append(NO_NOTIFICATION)
+            self.delivered.append(0)
+            self.zones.append(0)
+        self._count += 1
+        self._insert_index(user_id, slot)
+        return slot
+
+    def slot_for(self, user_id: int) -> int:
+        """Получить слот пользователя, создав его при необходимости"""
+        slot = self.find(user_id)
+        if slot < 0:
+            slot = self._allocate(user_id)
+        return slot
+
+    def remove(self, user_id: int) -> bool:
+        """
+        Удалить пользователя и вернуть слот в free-list
+
+        Returns:
+            bool: True если пользователь был в хранилище
+        """
+        index = self._index
+        ids = self.ids
+        mask = self._mask
+        position = self._hash(user_id)
+        while True:
+            slot = index[position]
+            if slot == _EMPTY:
+                return False
+            if slot >= 0 and ids[slot] == user_id:
+                break
+            position = (position + 1) & mask
+
+        index[position] = _DELETED
+        ids[slot] = FREE_ID
+        self.dates[slot] = NO_DATE
+        self.minutes[slot] = NO_NOTIFICATION
+        self.delivered[slot] = 0
+        self.zones[slot] = 0
+        self._free.append(slot)
+        self._count -= 1
+        return True
+
+    def release_if_empty(self, user_id: int) -> None:
+        """Удалить пользователя, если у него не осталось ни даты, ни уведомлений, ни своего часового пояса"""
+        slot = self.find(user_id)
+        if (slot >= 0 and self.dates[slot] == NO_DATE and self.minutes[slot] == NO_NOTIFICATION
+                and self.zones[slot] == 0):
+            self.remove(user_id)
+
+    def get(self, user_id: int) -> Optional[Tuple[int, int, int]]:
+        """
+        Получить (дата в минутах, минута уведомлений, номер часового пояса) пользователя
+
+        Returns:
+            Optional[Tuple[int, int, int]]: значения колонок или None
+        """
+        slot = self.find(user_id)
+        if slot < 0:
+            return None
+        return self.dates[slot], self.minutes[slot], self.zones[slot]
+
+    def users_due_at(self, minute_of_day: int) -> List[int]:
+        """Все пользователи с уведомлением на указанную минуту суток (сравнение выполняется в C)"""
+        return list(compress(self.ids, map(minute_of_day.__eq__, self.minutes)))
+
+    def users_with_date_before(self, epoch_minutes: int) -> List[int]:
+        """Все пользователи, чья дата наступила к указанной минуте (сравнение выполняется в C)"""
+        return list(compress(self.ids, map(epoch_minutes.__ge__, self.dates)))
+
+    def users_in_zone(self, zone: int) -> List[int]:
+        """Все пользователи часового пояса (сравнение выполняется в C, свободные слоты отбрасываются)"""
+        return list(filter(None, compress(self.ids, map(zone.__eq__, self.zones))))
+
+    def notification_minutes_in_zone(self, zone: int) -> Iterator[Tuple[int, int]]:
+        """Пользователи пояса с уведомлениями: (ID, минута суток)"""
+        for user_id, minute in compress(zip(self.ids, self.minutes), map(zone.__eq__, self.zones)):
+            if minute != NO_NOTIFICATION and user_id != FREE_ID:
+                yield user_id, minute
+
+    def rows(self) -> Iterator[Tuple[int, int, int, int]]:
+        """Перебрать занятые слоты: (ID, дата в минутах, минута уведомлений, номер часового пояса)"""
+        for user_id, date, minute, zone in zip(self.ids, self.dates, self.minutes, self.zones):
+            if user_id != FREE_ID:
+                yield user_id, date, minute, zone
+
+    def delivery_days(self, min_day: int) -> Iterator[Tuple[int, int]]:
+        """Перебрать пользователей с доставкой не раньше min_day: (ID, день)"""
+        for user_id, day in zip(self.ids, self.delivered):
+            if day >= min_day and user_id != FREE_ID:
+                yield user_id, day
+
+    def memory_bytes(self) -> int:
+        """Объем памяти, занятый массивами"""
+        return sum(
+            column.buffer_info()[1] * column.itemsize
+            for column in (self.ids, self.dates, self.minutes, self.delivered, self.zones,
+                           self._free, self._index)
+        )
+
+    def clear(self) -> None:
+        """Удалить всех пользователей"""
+        self.__init__()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.find(user_id) >= 0
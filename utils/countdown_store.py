@@ -0,0 +1,123 @@
+"""
+Колоночное хранилище именованных отсчетов
+
+У пользователя кроме основной даты может быть несколько именованных отсчетов,
+у каждого свое время уведомлений. Отсчет - строка в типизированных массивах,
+номер строки служит его ID (стабилен, пока отсчет существует):
+    owners    - ID пользователя (int64), 0 - свободная строка
+    dates     - целевая дата в минутах от 1970-01-01 по местному времени (int32)
+    minutes   - минута суток уведомления 0-1439 (int16), -1 если не настроено
+    delivered - день последнего доставленного уведомления (int32), 0 если не было
+Названия лежат в списке строк, а словарь "пользователь -> {название: ID}"
+позволяет найти отсчеты пользователя без перебора.
+"""
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.columnar_store import FREE_ID, NO_NOTIFICATION
+
+
+class CountdownStore:
+    """Именованные отсчеты: ID отсчета -> (пользователь, название, дата в минутах, минута уведомлений)"""
+
+    def __init__(self):
+        self.owners = array('q')
+        self.dates = array('i')
+        self.minutes = array('h')
+        self.delivered = array('i')
+        self.names: List[Optional[str]] = []
+        self._free = array('i')
+        self._by_user: Dict[int, Dict[str, int]] = {}
+
+    def find(self, user_id: int, name: str) -> int:
+        """
+        Найти отсчет пользователя по названию
+
+        Returns:
+            int: ID отсчета или -1
+        """
+        countdowns = self._by_user.get(user_id)
+        if countdowns is None:
+            return -1
+        return countdowns.get(name, -1)
+
+    def add(self, user_id: int, name: str, epoch_minutes: int) -> int:
+        """
+        Добавить отсчет (если отсчет с таким названием есть, меняется его дата)
+
+        Returns:
+            int: ID отсчета
+        """
+        countdown_id = self.find(user_id, name)
+        if countdown_id >= 0:
+            self.dates[countdown_id] = epoch_minutes
+            return countdown_id
+
+        if self._free:
+            countdown_id = self._free.pop()
+            self.owners[countdown_id] = user_id
+            self.dates[countdown_id] = epoch_minutes
+            self.names[countdown_id] = name
+        else:
+            countdown_id = len(self.owners)
+            self.owners.append(user_id)
+            self.dates.append(epoch_minutes)
+            self.minutes.append(NO_NOTIFICATION)
+            self.delivered.append(0)
+            self.names.append(name)
+        self._by_user.setdefault(user_id, {})[name] = countdown_id
+        return countdown_id
+
+    def remove(self, countdown_id: int) -> bool:
+        """
+        Удалить отсчет и вернуть строку в free-list
+
+        Returns:
+            bool: True если отсчет существовал
+        """
+        if not 0 <= countdown_id < len(self.owners) or self.owners[countdown_id] == FREE_ID:
+            return False
+        user_id = self.owners[countdown_id]
+        countdowns = self._by_user[user_id]
+        del countdowns[self.names[countdown_id]]
+        if not countdowns:
+            del self._by_user[user_id]
+
+        self.owners[countdown_id] = FREE_ID
+        self.minutes[countdown_id] = NO_NOTIFICATION
+        self.delivered[countdown_id] = 0
+        self.names[countdown_id] = None
+        self._free.append(countdown_id)
+        return True
+
+    def get(self, countdown_id: int) -> Optional[Tuple[int, str, int, int]]:
+        """Получить (пользователь, название, дата в минутах, минута уведомлений) или None"""
+        if not 0 <= countdown_id < len(self.owners) or self.owners[countdown_id] == FREE_ID:
+            return None
+        return (self.owners[countdown_id], self.names[countdown_id],
+                self.dates[countdown_id], self.minutes[countdown_id])
+
+    def of_user(self, user_id: int) -> List[int]:
+        """ID отсчетов пользователя в порядке приближения даты"""
+        countdowns = self._by_user.get(user_id)
+        if not countdowns:
+            return []
+        return sorted(countdowns.values(), key=self.dates.__getitem__)
+
+    def count_of_user(self, user_id: int) -> int:
+        """Количество отсчетов пользователя"""
+        countdowns = self._by_user.get(user_id)
+        return len(countdowns) if countdowns else 0
+
+    def rows(self) -> Iterator[Tuple[int, int, str, int, int]]:
+        """Перебрать отсчеты: (ID, пользователь, название, дата в минутах, минута уведомлений)"""
+        for countdown_id, (user_id, date, minute) in enumerate(zip(self.owners, self.dates, self.minutes)):
+            if user_id != FREE_ID:
+                yield countdown_id, user_id, self.names[countdown_id], date, minute
+
+    def clear(self) -> None:
+        """Удалить все отсчеты"""
+        self.__init__()
+
+    def __len__(self) -> int:
+        return len(self.owners) - len(self._free)
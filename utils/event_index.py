@@ -0,0 +1,164 @@
+"""
+Индексированная min-куча событий
+
+Обычная куча heapq не умеет удалять и переносить элементы, поэтому к куче
+добавлена таблица "ключ -> позиция в куче". Вставка, перенос и удаление
+стоят O(log n), ближайшее событие берется за O(1).
+
+Ключи - небольшие неотрицательные целые (номер слота хранилища, ID отсчета),
+поэтому таблица позиций - тоже массив, индексируемый ключом. Ключ, приоритет
+и позиция лежат в типизированных массивах (модуль array), без объекта и
+записи словаря на событие: около 12 байт на ключ.
+"""
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+# Пометка "ключа нет в куче" в таблице позиций
+_ABSENT = -1
+
+
+class IndexedHeap:
+    """Min-куча "ключ -> приоритет" с удалением и переносом по ключу"""
+
+    def __init__(self):
+        self._keys = array('i')
+        self._priorities = array('i')
+        self._positions = array('i')
+
+    def _position(self, key: int) -> int:
+        """Позиция ключа в куче (_ABSENT, если ключа нет)"""
+        return self._positions[key] if key < len(self._positions) else _ABSENT
+
+    def _append(self, key: int, priority: int) -> int:
+        """Добавить ключ в конец кучи (без просеивания) и вернуть его позицию"""
+        positions = self._positions
+        if key >= len(positions):
+            # Таблица растет с запасом, чтобы не расширяться на каждый новый ключ
+            positions.extend([_ABSENT] * max(key + 1 - len(positions), len(positions) // 2, 16))
+        position = len(self._keys)
+        self._keys.append(key)
+        self._priorities.append(priority)
+        positions[key] = position
+        return position
+
+    def push(self, key: int, priority: int) -> None:
+        """Добавить ключ или перенести его на новый приоритет"""
+        position = self._position(key)
+        if position == _ABSENT:
+            self._sift_up(self._append(key, priority))
+            return
+
+        previous = self._priorities[position]
+        self._priorities[position] = priority
+        if priority < previous:
+            self._sift_up(position)
+        elif priority > previous:
+            self._sift_down(position)
+
+    def extend(self, items: Iterable[Tuple[int, int]]) -> int:
+        """
+        Добавить много новых ключей сразу (перестройка кучи за O(n) вместо n вставок)
+
+        Returns:
+            int: количество добавленных ключей
+        """
+        added = 0
+        for key, priority in items:
+            if self._position(key) != _ABSENT:
+                self.push(key, priority)
+                continue
+            self._append(key, priority)
+            added += 1
+        for position in reversed(range(len(self._keys) // 2)):
+            self._sift_down(position)
+        return added
+
+    def remove(self, key: int) -> bool:
+        """
+        Удалить ключ
+
+        Returns:
+            bool: True если ключ был в куче
+        """
+        position = self._position(key)
+        if position == _ABSENT:
+            return False
+        self._positions[key] = _ABSENT
+
+        last_key = self._keys.pop()
+        last_priority = self._priorities.pop()
+        if position == len(self._keys):
+            return True
+
+        # На место удаленного ставится последний элемент и просеивается в нужную сторону
+        previous = self._priorities[position]
+        self._keys[position] = last_key
+        self._priorities[position] = last_priority
+        self._positions[last_key] = position
+        if last_priority < previous:
+            self._sift_up(position)
+        else:
+            self._sift_down(position)
+        return True
+
+    def peek(self) -> Optional[Tuple[int, int]]:
+        """Ближайшее событие: (приоритет, ключ) или None, если куча пуста"""
+        if not self._keys:
+            return None
+        return self._priorities[0], self._keys[0]
+
+    def pop_due(self, priority: int) -> List[int]:
+        """Забрать все ключи с приоритетом не больше указанного (в порядке приоритета)"""
+        due = []
+        while self._keys and self._priorities[0] <= priority:
+            key = self._keys[0]
+            due.append(key)
+            self.remove(key)
+        return due
+
+    def priority(self, key: int) -> Optional[int]:
+        """Приоритет ключа или None"""
+        position = self._position(key)
+        return None if position == _ABSENT else self._priorities[position]
+
+    def _swap(self, first: int, second: int) -> None:
+        keys = self._keys
+        priorities = self._priorities
+        keys[first], keys[second] = keys[second], keys[first]
+        priorities[first], priorities[second] = priorities[second], priorities[first]
+        self._positions[keys[first]] = first
+        self._positions[keys[second]] = second
+
+    def _sift_up(self, position: int) -> None:
+        priorities = self._priorities
+        while position > 0:
+            parent = (position - 1) >> 1
+            if priorities[parent] <= priorities[position]:
+                break
+            self._swap(position, parent)
+            position = parent
+
+    def _sift_down(self, position: int) -> None:
+        priorities = self._priorities
+        size = len(priorities)
+        while True:
+            smallest = position
+            left = 2 * position + 1
+            if left < size and priorities[left] < priorities[smallest]:
+                smallest = left
+            if left + 1 < size and priorities[left + 1] < priorities[smallest]:
+                smallest = left + 1
+            if smallest == position:
+                return
+            self._swap(position, smallest)
+            position = smallest
+
+    def clear(self) -> None:
+        """Удалить все события"""
+        self.__init__()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: int) -> bool:
+        return self._position(key) != _ABSENT
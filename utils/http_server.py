@@ -0,0 +1,131 @@
+"""
+Минимальный асинхронный HTTP/1.1 сервер на asyncio
+
+Используется для приема webhook-запросов от Telegram и служебных эндпоинтов,
+чтобы не тянуть в зависимости отдельный веб-фреймворк.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Обработчик запроса: (метод, путь, заголовки, тело) -> (статус, заголовки, тело)
+RequestHandler = Callable[[str, str, Dict[str, str], bytes], Awaitable[Tuple[int, Dict[str, str], bytes]]]
+
+# Больше заголовков в одном запросе сервер не принимает (тело ограничено max_body_size)
+MAX_HEADERS = 100
+
+STATUS_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPServer:
+    """HTTP сервер с поддержкой keep-alive"""
+
+    def __init__(self, handler: RequestHandler, host: str = "127.0.0.1", port: int = 8080,
+                 max_body_size: int = 1024 * 1024):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.max_body_size = max_body_size
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        """Начать прием соединений"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # При port=0 порт выбирает система
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"HTTP сервер слушает {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Прекратить прием соединений"""
+        if self._server is None:
+            return
+        self._server.close()
+        # Закрываем простаивающие keep-alive соединения, иначе wait_closed будет ждать их
+        tasks = list(self._connections.values())
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обработать запросы одного соединения"""
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {}, b"", close=True)
+                    break
+
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    if len(headers) >= MAX_HEADERS:
+                        await self._respond(writer, 431, {}, b"", close=True)
+                        return
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                # Длина тела - только десятичные цифры: int() принял бы и "-1", и " 1_0 "
+                length_text = headers.get("content-length", "") or "0"
+                if not (length_text.isascii() and length_text.isdigit()):
+                    await self._respond(writer, 400, {}, b"", close=True)
+                    break
+                length = int(length_text)
+                if length > self.max_body_size:
+                    await self._respond(writer, 413, {}, b"", close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, response_headers, response_body = await self.handler(method, path, headers, body)
+                except Exception as e:
+                    logger.error(f"Ошибка при обработке HTTP запроса {method} {path}: {e}")
+                    status, response_headers, response_body = 500, {}, b""
+
+                close = headers.get("connection", "").lower() == "close"
+                await self._respond(writer, status, response_headers, response_body, close=close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError:
+            # Строка заголовка длиннее буфера StreamReader
+            await self._respond(writer, 431, {}, b"", close=True)
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, headers: Dict[str, str],
+                       body: bytes, close: bool = False) -> None:
+        """Записать HTTP ответ"""
+        lines = [f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}"]
+        headers = dict(headers)
+        headers["Content-Length"] = str(len(body))
+        if close:
+            headers["Connection"] = "close"
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
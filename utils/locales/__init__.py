@@ -0,0 +1 @@
+# Тексты сообщений и кнопок на разных языках (собираются в utils/messages.py)
@@ -0,0 +1,216 @@
+"""
+Тексты на английском языке
+"""
+
+TEXTS = {
+    # Кнопки
+    "button_settings": "⚙️ Settings",
+    "button_time_left": "⏰ Time left",
+    "button_back": "🔙 Back",
+    "button_set_date": "📅 Set date",
+    "button_notifications": "🔔 Notifications",
+    "button_cancel": "❌ Cancel",
+    "button_setup_notifications": "⏰ Set up notifications",
+    "button_show_time": "⏰ Show time left",
+
+    # Команды
+    "start": (
+        "🤖 Hi! I count down the time to your important dates.\n\n"
+        "📅 Available commands:\n"
+        "/set_date - Set the date to count down to\n"
+        "/time_left - Show the time left\n"
+        "/notifications - Set up notifications\n"
+        "/timezone - Choose your time zone\n"
+        "/live - Pin a live countdown\n"
+        "/countdown - Named countdowns\n"
+        "/help - Show help\n\n"
+        "Choose an action:"
+    ),
+    "help": (
+        "📋 How to use the bot:\n\n"
+        "1️⃣ /set_date - Set the date to count down to\n"
+        "   The bot will ask for a date in the DD.MM.YYYY format\n"
+        "   For example: 25.12.2024\n\n"
+        "2️⃣ /time_left - Show the time left\n"
+        "   Shows how many days and hours are left until your date and all countdowns\n\n"
+        "3️⃣ /notifications - Set up notifications\n"
+        "   Choose the time of daily notifications (for example: 09:00)\n"
+        "   Or turn notifications off\n\n"
+        "4️⃣ /timezone - Choose your time zone\n"
+        "   For example: /timezone Europe/Berlin or /timezone UTC+5\n"
+        "   The date and the notification time use your time zone (default Europe/Moscow)\n\n"
+        "5️⃣ /live - Pin a live countdown\n"
+        "   The bot pins a message with the time left and keeps it up to date\n"
+        "   For example: /live hour (also minute, day; /live off to turn it off)\n\n"
+        "6️⃣ /countdown - Named countdowns\n"
+        "   Several named dates, each with its own notifications\n"
+        "   For example: /countdown add 25.12.2026 New Year\n\n"
+        "7️⃣ /help - Show this help\n\n"
+        "💡 Tip: set a date with /set_date, then set up notifications!"
+    ),
+    "date_not_set_command": "❌ No date set!\n\nSet a date first with the /set_date command",
+    "date_passed_command": "🎉 Your date has already arrived!\n\nSet a new date with /set_date",
+    "notifications_on": "\n\n🔔 Notifications are set for {time}",
+    "notifications_off_command": "\n\n🔕 Notifications are off. Use /notifications to set them up.",
+    "timezone_current": (
+        "🌍 Your time zone: {zone} (now {now})\n\n"
+        "To change it, send /timezone followed by a zone name or a UTC offset.\n"
+        "For example: /timezone Europe/Berlin or /timezone UTC+5"
+    ),
+    "timezone_unknown": (
+        "❌ Unknown time zone!\n\n"
+        "Use a name from the IANA database (for example, America/New_York) or an offset (UTC+5)."
+    ),
+    "timezone_set": "✅ Time zone set: {zone} (now {now})",
+
+    # Клавиатура
+    "main_menu": "🤖 Main menu\n\nChoose an action:",
+    "settings_keyboard": "⚙️ Settings\n\nChoose an action:",
+    "settings_menu": (
+        "⚙️ Settings\n\n"
+        "📅 Date: {date}\n"
+        "🔔 Notifications: {notification}\n"
+        "🌍 Time zone: {zone}\n\n"
+        "Use the keyboard buttons:\n"
+        "• 📅 Set date - change the date\n"
+        "• 🔔 Notifications - set up notifications"
+    ),
+    "not_configured": "Not set",
+    "date_not_set_button": "❌ No date set!\n\nSet a date first with the '📅 Set date' button",
+    "date_passed_button": "🎉 Your date has already arrived!\n\nSet a new date with the '📅 Set date' button",
+    "notifications_off_button": "\n\n🔕 Notifications are off. Use the '🔔 Notifications' button to set them up.",
+
+    # Диалоги
+    "ask_date": "📅 Enter a date in the DD.MM.YYYY format\nFor example: 25.12.2024\n\nOr press the button to cancel:",
+    "date_required": "❌ Set a date first with the /set_date command!",
+    "date_in_past": "❌ The date must be in the future! Try again or press cancel:",
+    "date_saved": (
+        "✅ Date set: {date}\n\n"
+        "Now use the /time_left command to see the time left!\n"
+        "Or set up daily reminder notifications."
+    ),
+    "date_invalid": (
+        "❌ Invalid date: {error}\n\n"
+        "Use the DD.MM.YYYY format (25/12/2024 and 2024-12-25 also work)\n"
+        "For example: 25.12.2024\n\n"
+        "Try again or press cancel:"
+    ),
+    "ask_notification_time": (
+        "🔔 Notification settings\n\n"
+        "Current notification time: {current}\n\n"
+        "Enter the time of daily notifications in the HH:MM format (time zone: {zone})\n"
+        "For example: 09:00 or 18:30\n\n"
+        "Or type 'off' to turn notifications off:"
+    ),
+    "disable_word": "off",
+    "notifications_disabled": "🔕 Notifications are off!",
+    "notifications_saved": (
+        "✅ Notifications are set for {time} every day ({zone})!\n\n"
+        "At this time the bot will send you the time left until {date}."
+    ),
+    "time_invalid": (
+        "❌ Invalid time: {error}\n\n"
+        "Use the HH:MM format (9:00 and 0900 also work)\n"
+        "For example: 09:00 or 18:30\n\n"
+        "Try again or press cancel:"
+    ),
+    # Причины ошибок разбора даты и времени (utils.time_utils.ParseError)
+    "parse_date_parts_iso": "the date must have three parts: YYYY-MM-DD",
+    "parse_date_unrecognized": "the date could not be recognized",
+    "parse_date_parts": "the date must have three parts: DD{separator}MM{separator}YYYY",
+    "parse_date_not_numbers": "the day, month and year must be numbers",
+    "parse_year_digits": "the year must have four digits",
+    "parse_day_month_digits": "the day and month must have one or two digits",
+    "parse_year_range": "the year must be from 1 to {max_year}",
+    "parse_month_range": "the month must be from 1 to 12, got {month}",
+    "parse_day_range": "the day must be from 1 to {days} for {month:02d}.{year}, got {day}",
+    "parse_time_format": "the time must be in the HH:MM format",
+    "parse_time_not_numbers": "hours and minutes must be numbers",
+    "parse_hour_range": "hours must be from 0 to 23, got {hour}",
+    "parse_minute_range": "minutes must be from 0 to 59, got {minute}",
+    "cancelled": "❌ Cancelled.",
+    "show_time_hint": "⏰ Use the /time_left command to see the time left!",
+    "setup_notifications_hint": "🔔 Use the /notifications command to set up notifications!",
+
+    # Уведомления и отсчет
+    "notification": "🔔 Daily notification!\n\n{countdown}",
+    "notification_late": "🔔 Daily notification (delayed)!\n\n{countdown}",
+    "countdown_days": "📅 Time left until {date}:\n\n🕐 {days} days, {hours} hours, {minutes} minutes",
+    "countdown_hours": "📅 Time left until {date}:\n\n🕐 {hours} hours, {minutes} minutes",
+    "countdown_days_only": "📅 Time left until {date}:\n\n🕐 {days} days",
+    "countdown_days_hours": "📅 Time left until {date}:\n\n🕐 {days} days, {hours} hours",
+    "countdown_hours_only": "📅 Time left until {date}:\n\n🕐 {hours} hours",
+    "date_arrived": "🎉 {date} is here!\n\nSet a new date with /set_date",
+    "countdown_arrived": "🎉 {name}: {date} is here!",
+
+    # Живой отсчет (/live)
+    "live_usage": (
+        "📌 Live countdown: the bot pins a message with the time left and keeps it up to date\n\n"
+        "/live minute - update every minute\n"
+        "/live hour - every hour\n"
+        "/live day - every day\n"
+        "/live off - turn it off"
+    ),
+    "live_started": "📌 Live countdown is on: the message above is updated {every}.\nTurn it off: /live off",
+    "live_stopped": "📌 Live countdown is off.",
+    "live_not_active": "📌 Live countdown was not on.",
+    "live_arg_minute": "minute",
+    "live_arg_hour": "hour",
+    "live_arg_day": "day",
+    "live_arg_off": "off",
+    "live_every_minute": "every minute",
+    "live_every_hour": "every hour",
+    "live_every_day": "every day",
+
+    # Именованные отсчеты (/countdown)
+    "countdown_usage": (
+        "🏷 Named countdowns: besides the main date you can keep up to {limit} named countdowns\n\n"
+        "/countdown add 25.12.2026 New Year - add a countdown (or change its date)\n"
+        "/countdown remove New Year - remove a countdown\n"
+        "/countdown notify New Year 09:00 - daily notifications (off to turn them off)\n\n"
+        "All countdowns are shown in /time_left"
+    ),
+    "countdowns_title": "🏷 Named countdowns:\n\n",
+    "countdown_named": "🏷 {name}\n{countdown}",
+    "inline_title": "⏳ Countdown to {date}",
+    "countdown_named_reached": "🏷 {name}\n🎉 The date has arrived!",
+    "countdown_arg_add": "add",
+    "countdown_arg_remove": "remove",
+    "countdown_arg_notify": "notify",
+    "countdown_arg_off": "off",
+    "countdown_added": "✅ Countdown \"{name}\" to {date} saved. See it in /time_left",
+    "countdown_removed": "🗑 Countdown \"{name}\" removed.",
+    "countdown_not_found": "❌ Countdown \"{name}\" not found. Your countdowns: /countdown",
+    "countdown_rejected": "❌ Can't add the countdown: at most {limit} countdowns, names up to {length} characters.",
+    "countdown_date_invalid": "❌ Invalid date: {error}\n\nUse the DD.MM.YYYY format, for example: 25.12.2026",
+    "countdown_date_in_past": "❌ The date must be in the future!",
+    "countdown_time_invalid": "❌ Invalid time: {error}\n\nUse the HH:MM format, for example: 09:00",
+    "countdown_notify_on": "🔔 Notifications for \"{name}\" are set for {time} every day ({zone})",
+    "countdown_notify_off": "🔕 Notifications for \"{name}\" are off.",
+    "stats": (
+        "📊 Statistics\n\n"
+        "👥 Users: {users} (unreachable: {inactive})\n"
+        "📅 With a date: {with_date}\n"
+        "🔔 With notifications: {with_notification}\n"
+        "🏷 Named countdowns: {countdowns}\n\n"
+        "Dates arriving (main / countdowns):\n"
+        "   today: {dates_today} / {countdowns_today}\n"
+        "   within 7 days: {dates_week} / {countdowns_week}\n"
+        "   within 30 days: {dates_month} / {countdowns_month}\n\n"
+        "⏰ Busiest notification minutes: {busiest}\n"
+        "🕐 Notifications per hour: {hourly}"
+    ),
+    "stats_empty": "none",
+    "broadcast_usage": (
+        "📣 Broadcast to all users\n\n"
+        "/broadcast text - start a broadcast (progress is shown in a single message)\n"
+        "/broadcast stop - stop the broadcast"
+    ),
+    "shard_label": "Shard {index} of {count}: ",
+    "broadcast_arg_stop": "stop",
+    "broadcast_busy": "❌ A broadcast is already running. To stop it: /broadcast stop",
+    "broadcast_not_running": "No broadcast is running.",
+    "broadcast_progress": "📣 Broadcast: {done} of {total} ({percent}%)\n⏳ About {eta} left",
+    "broadcast_done": "✅ Broadcast finished: delivered {sent}, failed {failed}, total {total}.",
+    "broadcast_stopped": "⏹ Broadcast stopped: {done} of {total}.",
+}
@@ -0,0 +1,216 @@
+"""
+Тексты на русском языке (язык по умолчанию: в нем должны быть все ключи)
+"""
+
+TEXTS = {
+    # Кнопки
+    "button_settings": "⚙️ Настройки",
+    "button_time_left": "⏰ Оставшееся время",
+    "button_back": "🔙 Назад",
+    "button_set_date": "📅 Установить дату",
+    "button_notifications": "🔔 Уведомления",
+    "button_cancel": "❌ Отмена",
+    "button_setup_notifications": "⏰ Настроить уведомления",
+    "button_show_time": "⏰ Показать время",
+
+    # Команды
+    "start": (
+        "🤖 Привет! Я бот для отсчета времени до важных дат.\n\n"
+        "📅 Доступные команды:\n"
+        "/set_date - Установить дату для отсчета\n"
+        "/time_left - Показать оставшееся время\n"
+        "/notifications - Настроить уведомления\n"
+        "/timezone - Выбрать часовой пояс\n"
+        "/live - Закрепить живой отсчет\n"
+        "/countdown - Именованные отсчеты\n"
+        "/help - Показать справку\n\n"
+        "Выберите действие:"
+    ),
+    "help": (
+        "📋 Справка по использованию бота:\n\n"
+        "1️⃣ /set_date - Установить дату для отсчета\n"
+        "   Бот попросит ввести дату в формате ДД.ММ.ГГГГ\n"
+        "   Например: 25.12.2024\n\n"
+        "2️⃣ /time_left - Показать оставшееся время\n"
+        "   Показывает сколько дней и часов осталось до установленной даты и всех отсчетов\n\n"
+        "3️⃣ /notifications - Настроить уведомления\n"
+        "   Установить время ежедневных уведомлений (например: 09:00)\n"
+        "   Или отключить уведомления\n\n"
+        "4️⃣ /timezone - Выбрать часовой пояс\n"
+        "   Например: /timezone Europe/Berlin или /timezone UTC+5\n"
+        "   Дата и время уведомлений считаются в вашем поясе (по умолчанию Europe/Moscow)\n\n"
+        "5️⃣ /live - Закрепить живой отсчет\n"
+        "   Бот закрепит сообщение с оставшимся временем и будет обновлять его сам\n"
+        "   Например: /live час (также минута, день; /live выкл - отключить)\n\n"
+        "6️⃣ /countdown - Именованные отсчеты\n"
+        "   Несколько дат с названиями, у каждой свои уведомления\n"
+        "   Например: /countdown добавить 25.12.2026 Новый год\n\n"
+        "7️⃣ /help - Показать эту справку\n\n"
+        "💡 Совет: Установите дату с помощью /set_date, а затем настройте уведомления!"
+    ),
+    "date_not_set_command": "❌ Дата не установлена!\n\nСначала установите дату с помощью команды /set_date",
+    "date_passed_command": "🎉 Установленная дата уже наступила!\n\nУстановите новую дату с помощью /set_date",
+    "notifications_on": "\n\n🔔 Уведомления настроены на {time}",
+    "notifications_off_command": "\n\n🔕 Уведомления не настроены. Используйте /notifications для настройки.",
+    "timezone_current": (
+        "🌍 Ваш часовой пояс: {zone} (сейчас {now})\n\n"
+        "Чтобы изменить, отправьте /timezone и название пояса или смещение от UTC.\n"
+        "Например: /timezone Europe/Berlin или /timezone UTC+5"
+    ),
+    "timezone_unknown": (
+        "❌ Неизвестный часовой пояс!\n\n"
+        "Используйте название из базы IANA (например, Asia/Yekaterinburg) или смещение (UTC+5)."
+    ),
+    "timezone_set": "✅ Часовой пояс установлен: {zone} (сейчас {now})",
+
+    # Клавиатура
+    "main_menu": "🤖 Главное меню\n\nВыберите действие:",
+    "settings_keyboard": "⚙️ Настройки\n\nВыберите действие:",
+    "settings_menu": (
+        "⚙️ Настройки\n\n"
+        "📅 Установленная дата: {date}\n"
+        "🔔 Уведомления: {notification}\n"
+        "🌍 Часовой пояс: {zone}\n\n"
+        "Используйте кнопки клавиатуры для управления:\n"
+        "• 📅 Установить дату - изменить дату\n"
+        "• 🔔 Уведомления - настроить уведомления"
+    ),
+    "not_configured": "Не настроено",
+    "date_not_set_button": "❌ Дата не установлена!\n\nСначала установите дату с помощью кнопки '📅 Установить дату'",
+    "date_passed_button": "🎉 Установленная дата уже наступила!\n\nУстановите новую дату с помощью кнопки '📅 Установить дату'",
+    "notifications_off_button": "\n\n🔕 Уведомления не настроены. Используйте кнопку '🔔 Уведомления' для настройки.",
+
+    # Диалоги
+    "ask_date": "📅 Введите дату в формате ДД.ММ.ГГГГ\nНапример: 25.12.2024\n\nИли нажмите кнопку для отмены:",
+    "date_required": "❌ Сначала установите дату с помощью команды /set_date!",
+    "date_in_past": "❌ Дата должна быть в будущем! Попробуйте еще раз или нажмите отмену:",
+    "date_saved": (
+        "✅ Дата успешно установлена: {date}\n\n"
+        "Теперь используйте команду /time_left чтобы узнать оставшееся время!\n"
+        "Или настройте уведомления для ежедневных напоминаний."
+    ),
+    "date_invalid": (
+        "❌ Неверная дата: {error}\n\n"
+        "Используйте формат ДД.ММ.ГГГГ (также подойдут 25/12/2024 и 2024-12-25)\n"
+        "Например: 25.12.2024\n\n"
+        "Попробуйте еще раз или нажмите отмену:"
+    ),
+    "ask_notification_time": (
+        "🔔 Настройка уведомлений\n\n"
+        "Текущее время уведомлений: {current}\n\n"
+        "Введите время для ежедневных уведомлений в формате ЧЧ:ММ (часовой пояс: {zone})\n"
+        "Например: 09:00 или 18:30\n\n"
+        "Или введите 'отключить' чтобы отключить уведомления:"
+    ),
+    "disable_word": "отключить",
+    "notifications_disabled": "🔕 Уведомления отключены!",
+    "notifications_saved": (
+        "✅ Уведомления настроены на {time} каждый день ({zone})!\n\n"
+        "Бот будет присылать вам оставшееся время до {date} в это время."
+    ),
+    "time_invalid": (
+        "❌ Неверное время: {error}\n\n"
+        "Используйте формат ЧЧ:ММ (также подойдут 9:00 и 0900)\n"
+        "Например: 09:00 или 18:30\n\n"
+        "Попробуйте еще раз или нажмите отмену:"
+    ),
+    # Причины ошибок разбора даты и времени (utils.time_utils.ParseError)
+    "parse_date_parts_iso": "дата должна состоять из трех частей: ГГГГ-ММ-ДД",
+    "parse_date_unrecognized": "не удалось распознать дату",
+    "parse_date_parts": "дата должна состоять из трех частей: ДД{separator}ММ{separator}ГГГГ",
+    "parse_date_not_numbers": "день, месяц и год должны быть числами",
+    "parse_year_digits": "год должен состоять из четырех цифр",
+    "parse_day_month_digits": "день и месяц должны состоять из одной или двух цифр",
+    "parse_year_range": "год должен быть от 1 до {max_year}",
+    "parse_month_range": "месяц должен быть от 1 до 12, а указан {month}",
+    "parse_day_range": "день должен быть от 1 до {days} для {month:02d}.{year}, а указан {day}",
+    "parse_time_format": "время должно быть в формате ЧЧ:ММ",
+    "parse_time_not_numbers": "часы и минуты должны быть числами",
+    "parse_hour_range": "часы должны быть от 0 до 23, а указано {hour}",
+    "parse_minute_range": "минуты должны быть от 0 до 59, а указано {minute}",
+    "cancelled": "❌ Операция отменена.",
+    "show_time_hint": "⏰ Используйте команду /time_left для просмотра оставшегося времени!",
+    "setup_notifications_hint": "🔔 Используйте команду /notifications для настройки уведомлений!",
+
+    # Уведомления и отсчет
+    "notification": "🔔 Ежедневное уведомление!\n\n{countdown}",
+    "notification_late": "🔔 Ежедневное уведомление (с опозданием)!\n\n{countdown}",
+    "countdown_days": "📅 До {date} осталось:\n\n🕐 {days} дней, {hours} часов, {minutes} минут",
+    "countdown_hours": "📅 До {date} осталось:\n\n🕐 {hours} часов, {minutes} минут",
+    "countdown_days_only": "📅 До {date} осталось:\n\n🕐 {days} дней",
+    "countdown_days_hours": "📅 До {date} осталось:\n\n🕐 {days} дней, {hours} часов",
+    "countdown_hours_only": "📅 До {date} осталось:\n\n🕐 {hours} часов",
+    "date_arrived": "🎉 Наступила дата {date}!\n\nУстановите новую дату с помощью /set_date",
+    "countdown_arrived": "🎉 {name}: наступила дата {date}!",
+
+    # Живой отсчет (/live)
+    "live_usage": (
+        "📌 Живой отсчет: бот закрепит сообщение с оставшимся временем и будет сам его обновлять\n\n"
+        "/live минута - обновлять каждую минуту\n"
+        "/live час - каждый час\n"
+        "/live день - каждый день\n"
+        "/live выкл - отключить"
+    ),
+    "live_started": "📌 Живой отсчет включен: сообщение выше обновляется {every}.\nОтключить: /live выкл",
+    "live_stopped": "📌 Живой отсчет отключен.",
+    "live_not_active": "📌 Живой отсчет не был включен.",
+    "live_arg_minute": "минута",
+    "live_arg_hour": "час",
+    "live_arg_day": "день",
+    "live_arg_off": "выкл",
+    "live_every_minute": "каждую минуту",
+    "live_every_hour": "каждый час",
+    "live_every_day": "каждый день",
+
+    # Именованные отсчеты (/countdown)
+    "countdown_usage": (
+        "🏷 Именованные отсчеты: кроме основной даты можно вести до {limit} отсчетов с названиями\n\n"
+        "/countdown добавить 25.12.2026 Новый год - добавить отсчет (или изменить дату)\n"
+        "/countdown удалить Новый год - удалить отсчет\n"
+        "/countdown уведомления Новый год 09:00 - ежедневные уведомления (выкл - отключить)\n\n"
+        "Все отсчеты показываются в /time_left"
+    ),
+    "countdowns_title": "🏷 Именованные отсчеты:\n\n",
+    "countdown_named": "🏷 {name}\n{countdown}",
+    "inline_title": "⏳ Отсчет до {date}",
+    "countdown_named_reached": "🏷 {name}\n🎉 Дата наступила!",
+    "countdown_arg_add": "добавить",
+    "countdown_arg_remove": "удалить",
+    "countdown_arg_notify": "уведомления",
+    "countdown_arg_off": "выкл",
+    "countdown_added": "✅ Отсчет «{name}» до {date} сохранен. Смотрите его в /time_left",
+    "countdown_removed": "🗑 Отсчет «{name}» удален.",
+    "countdown_not_found": "❌ Отсчет «{name}» не найден. Список отсчетов: /countdown",
+    "countdown_rejected": "❌ Нельзя добавить отсчет: не больше {limit} отсчетов, название до {length} символов.",
+    "countdown_date_invalid": "❌ Неверная дата: {error}\n\nИспользуйте формат ДД.ММ.ГГГГ, например: 25.12.2026",
+    "countdown_date_in_past": "❌ Дата должна быть в будущем!",
+    "countdown_time_invalid": "❌ Неверное время: {error}\n\nИспользуйте формат ЧЧ:ММ, например: 09:00",
+    "countdown_notify_on": "🔔 Уведомления отсчета «{name}» настроены на {time} каждый день ({zone})",
+    "countdown_notify_off": "🔕 Уведомления отсчета «{name}» отключены.",
+    "stats": (
+        "📊 Статистика\n\n"
+        "👥 Пользователей: {users} (недоступных: {inactive})\n"
+        "📅 С датой: {with_date}\n"
+        "🔔 С уведомлениями: {with_notification}\n"
+        "🏷 Именованных отсчетов: {countdowns}\n\n"
+        "Наступает дат (основных / отсчетов):\n"
+        "   сегодня: {dates_today} / {countdowns_today}\n"
+        "   за 7 дней: {dates_week} / {countdowns_week}\n"
+        "   за 30 дней: {dates_month} / {countdowns_month}\n\n"
+        "⏰ Самые частые минуты уведомлений: {busiest}\n"
+        "🕐 Уведомлений по часам: {hourly}"
+    ),
+    "stats_empty": "нет",
+    "broadcast_usage": (
+        "📣 Рассылка всем пользователям\n\n"
+        "/broadcast текст - начать рассылку (ход рассылки будет в одном сообщении)\n"
+        "/broadcast стоп - остановить рассылку"
+    ),
+    "shard_label": "Шард {index} из {count}: ",
+    "broadcast_arg_stop": "стоп",
+    "broadcast_busy": "❌ Рассылка уже идет. Остановить: /broadcast стоп",
+    "broadcast_not_running": "Рассылка не идет.",
+    "broadcast_progress": "📣 Рассылка: {done} из {total} ({percent}%)\n⏳ Осталось примерно {eta}",
+    "broadcast_done": "✅ Рассылка завершена: доставлено {sent}, не доставлено {failed}, всего {total}.",
+    "broadcast_stopped": "⏹ Рассылка остановлена: {done} из {total}.",
+}
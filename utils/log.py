@@ -0,0 +1,184 @@
+"""
+Неблокирующее логирование
+
+Обработчики логов не пишут в поток вывода из цикла событий: корневой логгер
+только кладет запись в очередь (QueueHandler), а форматирует и пишет ее
+фоновый поток QueueListener. Запись попадает в очередь без форматирования:
+строка сообщения и JSON собираются уже в фоновом потоке, поэтому в логи
+передаются шаблон и аргументы ("... %s", value), а не готовые f-строки.
+
+Формат вывода - JSON по строке на запись (LOG_FORMAT=json) или прежний текст.
+Поля, переданные через extra, попадают в JSON как есть.
+
+События горячих путей (каждое обновление, каждое уведомление) пишутся через
+HotPathLog: в лог попадает только каждое N-е событие (LOG_SAMPLE_RATE), а все
+события считаются и раз в LOG_SUMMARY_INTERVAL секунд выводятся одной сводкой.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Атрибуты, которые есть у любой записи: все остальные пришли через extra
+_STANDARD_ATTRIBUTES = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
+# Каждое какое событие горячего пути пишется в лог (0 - ни одного) и реестр счетчиков
+_sample_every = 100
+_hot_paths: List["HotPathLog"] = []
+_hot_paths_lock = threading.Lock()
+
+_listener: Optional[QueueListener] = None
+_summary_stop = threading.Event()
+_last_summary = time.monotonic()
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler, который не форматирует запись в вызывающем потоке"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Стандартный prepare форматирует сообщение сразу; очередь живет в том же
+        # процессе, поэтому запись можно передать как есть
+        return record
+
+
+class HotPathLog:
+    """Выборочный лог событий горячего пути со сводкой по всем событиям"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.counts: Dict[str, int] = {}
+        with _hot_paths_lock:
+            _hot_paths.append(self)
+
+    def event(self, event: str, message: str, *args, level: int = logging.INFO, **fields) -> None:
+        """
+        Засчитать событие и записать его в лог, если оно попало в выборку
+
+        Args:
+            event: короткое имя события для сводки
+            message: шаблон сообщения (аргументы подставляются при записи, в фоновом потоке)
+            *args: аргументы шаблона
+            level: уровень записи
+            **fields: структурные поля записи
+        """
+        count = self.counts.get(event, 0) + 1
+        self.counts[event] = count
+        if _sample_every and count % _sample_every == 1 % _sample_every and self.logger.isEnabledFor(level):
+            fields["event"] = event
+            fields["sampled"] = _sample_every
+            self.logger.log(level, message, *args, extra=fields)
+
+    def take_counts(self) -> Dict[str, int]:
+        """Забрать счетчики с последней сводки (обнуляются заменой словаря)"""
+        counts, self.counts = self.counts, {}
+        return counts
+
+
+def hot_path_log(name: str) -> HotPathLog:
+    """Выборочный лог для модуля (создается при импорте, до настройки логирования)"""
+    return HotPathLog(logging.getLogger(name))
+
+
+def emit_summaries() -> int:
+    """
+    Вывести сводку событий горячих путей с прошлой сводки
+
+    Счетчики увеличиваются в цикле событий без блокировок, поэтому событие,
+    засчитанное в момент сбора сводки, может не попасть ни в одну сводку.
+
+    Returns:
+        int: общее количество событий в сводках
+    """
+    global _last_summary
+    now = time.monotonic()
+    interval, _last_summary = now - _last_summary, now
+    total = 0
+    with _hot_paths_lock:
+        hot_paths = list(_hot_paths)
+    for hot_path in hot_paths:
+        counts = hot_path.take_counts()
+        if counts:
+            events = sum(counts.values())
+            total += events
+            hot_path.logger.info("Сводка за %.0f с: %d событий", interval, events,
+                                 extra={"event": "summary", "counts": counts})
+    return total
+
+
+def _summary_loop(interval: float) -> None:
+    """Фоновый цикл сводок"""
+    while not _summary_stop.wait(interval):
+        emit_summaries()
+
+
+def setup_logging(level: int = logging.INFO, fmt: str = "json", sample_rate: float = 0.01,
+                  summary_interval: float = 60.0) -> QueueListener:
+    """
+    Настроить неблокирующее логирование для всего процесса
+
+    Args:
+        level: уровень корневого логгера
+        fmt: "json" или "text"
+        sample_rate: доля событий горячих путей, которые пишутся в лог (0 - только сводки)
+        summary_interval: период сводок (в секундах, 0 - без сводок)
+
+    Returns:
+        QueueListener: запущенный фоновый обработчик (останавливается при выходе)
+    """
+    global _listener, _sample_every
+
+    _sample_every = round(1 / sample_rate) if sample_rate > 0 else 0
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(LazyQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    if summary_interval > 0:
+        _summary_stop.clear()
+        threading.Thread(target=_summary_loop, args=(summary_interval,), name="log-summaries", daemon=True).start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Вывести последнюю сводку и дописать все записи из очереди"""
+    global _listener
+    if _listener is None:
+        return
+    _summary_stop.set()
+    emit_summaries()
+    _listener.stop()
+    _listener = None
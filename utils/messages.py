@@ -0,0 +1,183 @@
+"""
+Каталог текстов сообщений и клавиатур
+
+Тексты всех языков собираются один раз при старте: шаблоны без подстановок
+хранятся готовыми строками, у остальных заранее проверяется набор полей и
+сохраняется связанный метод format. Клавиатуры строятся заранее (объекты
+разметки PTB неизменяемы) и сразу сериализуются в JSON: строка в reply_markup
+передается в запрос к Telegram без повторного преобразования, поэтому на
+каждый ответ не создается ни текст, ни дерево объектов клавиатуры.
+
+Язык выбирается по language_code пользователя ("en-US" -> "en"), для
+неизвестных языков используется DEFAULT_LOCALE. Чтобы добавить язык, достаточно
+положить модуль с TEXTS в utils/locales и добавить его в LOCALES.
+"""
+import json
+import logging
+from functools import lru_cache
+from string import Formatter
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+
+from utils.locales import en, ru
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCALE = "ru"
+
+# Исходные тексты по языкам (в языке по умолчанию должны быть все ключи)
+LOCALES: Dict[str, Dict[str, str]] = {
+    "ru": ru.TEXTS,
+    "en": en.TEXTS,
+}
+
+# Раскладки клавиатур: постоянные (ключи текстов кнопок) и inline (ключ текста, callback_data)
+REPLY_KEYBOARDS: Dict[str, List[List[str]]] = {
+    "main": [["button_settings", "button_time_left"]],
+    "settings": [["button_set_date", "button_notifications"], ["button_back"]],
+}
+INLINE_KEYBOARDS: Dict[str, List[List[Tuple[str, str]]]] = {
+    "cancel": [[("button_cancel", "cancel")]],
+    "date_saved": [
+        [("button_setup_notifications", "setup_notifications")],
+        [("button_show_time", "show_time")],
+    ],
+}
+
+# Скомпилированный каталог: язык -> ключ -> строка или функция подстановки
+Template = Union[str, Callable[..., str]]
+_texts: Dict[str, Dict[str, Template]] = {}
+_keyboards: Dict[str, Dict[str, str]] = {}
+_variants: Dict[str, FrozenSet[str]] = {}
+
+# Язык пользователей, которые писали боту (только отличный от языка по умолчанию)
+_user_locales: Dict[int, str] = {}
+
+
+def _fields(template: str) -> FrozenSet[str]:
+    """Имена полей подстановки в шаблоне"""
+    return frozenset(name for _, name, _, _ in Formatter().parse(template) if name is not None)
+
+
+def load_catalog() -> int:
+    """
+    Скомпилировать тексты и клавиатуры всех языков
+
+    Raises:
+        ValueError: если поля подстановки в переводе не совпадают с языком по умолчанию
+
+    Returns:
+        int: количество скомпилированных шаблонов
+    """
+    default = LOCALES[DEFAULT_LOCALE]
+    texts: Dict[str, Dict[str, Template]] = {}
+    keyboards: Dict[str, Dict[str, str]] = {}
+
+    for locale, source in LOCALES.items():
+        unknown = source.keys() - default.keys()
+        if unknown:
+            raise ValueError(f"Лишние ключи в языке {locale}: {', '.join(sorted(unknown))}")
+
+        compiled: Dict[str, Template] = {}
+        for key, default_template in default.items():
+            template = source.get(key)
+            if template is None:
+                logger.warning(f"Нет перевода '{key}' для языка {locale}, используется {DEFAULT_LOCALE}")
+                template = default_template
+            fields = _fields(template)
+            if fields != _fields(default_template):
+                raise ValueError(f"Поля шаблона '{key}' в языке {locale} не совпадают с {DEFAULT_LOCALE}")
+            compiled[key] = template.format if fields else template
+        texts[locale] = compiled
+
+        markups = {}
+        for name, rows in REPLY_KEYBOARDS.items():
+            markups[name] = ReplyKeyboardMarkup(
+                [[KeyboardButton(compiled[key]) for key in row] for row in rows],
+                resize_keyboard=True, one_time_keyboard=False
+            )
+        for name, rows in INLINE_KEYBOARDS.items():
+            markups[name] = InlineKeyboardMarkup(
+                [[InlineKeyboardButton(compiled[key], callback_data=data) for key, data in row] for row in rows]
+            )
+        keyboards[locale] = {name: json.dumps(markup.to_dict()) for name, markup in markups.items()}
+
+    global _texts, _keyboards, _variants
+    _texts, _keyboards = texts, keyboards
+    _variants = {
+        key: frozenset(texts[locale][key] for locale in texts)
+        for key in default if not _fields(default[key])
+    }
+    resolve_locale.cache_clear()
+
+    logger.info(f"Каталог сообщений загружен: {len(texts)} языков, {len(default)} шаблонов")
+    return len(texts) * len(default)
+
+
+def _catalog() -> Dict[str, Dict[str, Template]]:
+    """Скомпилированные тексты (каталог загружается при первом обращении, если не был загружен)"""
+    if not _texts:
+        load_catalog()
+    return _texts
+
+
+@lru_cache(maxsize=256)
+def resolve_locale(language_code: Optional[str]) -> str:
+    """Выбрать язык каталога по language_code Telegram ("en-US" -> "en")"""
+    if language_code:
+        locale = language_code.split("-", 1)[0].lower()
+        if locale in _catalog():
+            return locale
+    return DEFAULT_LOCALE
+
+
+def text(key: str, locale: str = DEFAULT_LOCALE, **values) -> str:
+    """
+    Получить текст сообщения
+
+    Args:
+        key: ключ шаблона
+        locale: язык
+        **values: значения полей подстановки
+
+    Returns:
+        str: готовый текст (для шаблонов без полей - одна и та же строка)
+    """
+    template = _catalog()[locale][key]
+    return template(**values) if values else template
+
+
+def keyboard(name: str, locale: str = DEFAULT_LOCALE) -> str:
+    """Получить клавиатуру, сериализованную в JSON (передается как reply_markup)"""
+    _catalog()
+    return _keyboards[locale][name]
+
+
+def variants(key: str) -> FrozenSet[str]:
+    """Текст без подстановок на всех языках (например, все варианты надписи кнопки)"""
+    _catalog()
+    return _variants[key]
+
+
+def user_locale(user) -> str:
+    """
+    Язык пользователя Telegram
+
+    Язык запоминается, чтобы уведомления, которые бот отправляет сам, приходили
+    на том же языке. Запоминание живет в памяти процесса: после перезапуска
+    уведомления идут на языке по умолчанию до первого сообщения пользователя.
+    """
+    if user is None:
+        return DEFAULT_LOCALE
+    locale = resolve_locale(user.language_code)
+    if locale != DEFAULT_LOCALE:
+        _user_locales[user.id] = locale
+    elif _user_locales:
+        _user_locales.pop(user.id, None)
+    return locale
+
+
+def get_user_locale(user_id: int) -> str:
+    """Запомненный язык пользователя (DEFAULT_LOCALE, если пользователь не писал боту)"""
+    return _user_locales.get(user_id, DEFAULT_LOCALE)
@@ -1,53 +1,783 @@
 """
 Хранение данных пользователей
+
+Данные держатся в памяти в компактном колоночном хранилище (кэш для чтения),
+а изменения пачками сбрасываются в бэкенд постоянного хранения фоновым потоком.
 """
-from datetime import datetime
-from typing import Dict, Optional
+import logging
+import threading
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from utils.aggregates import UserAggregates
+from utils.columnar_store import (
+    ColumnarUserStore, FREE_ID, MAX_EPOCH_MINUTES, MIN_EPOCH_MINUTES, NO_DATE, NO_NOTIFICATION
+)
+from utils.countdown_store import CountdownStore
+from utils.event_index import IndexedHeap
+from utils.storage_backends import EPOCH, StorageBackend
+from utils.time_utils import DEFAULT_TIMEZONE, get_zone
+
+logger = logging.getLogger(__name__)
+
+MINUTE = timedelta(minutes=1)
+
+# Колоночное хранилище данных пользователей
+user_store = ColumnarUserStore()
+
+# Индексы наступления дат: ключ -> минута наступления по UTC от 1970-01-01 (в индексах
+# только даты, которые еще не обработаны как наступившие). Основные даты - по слоту
+# пользователя в user_store (слот не меняется, пока пользователь в хранилище)
+date_index = IndexedHeap()
+
+# Именованные отсчеты и индекс их дат по ID отсчета
+countdown_store = CountdownStore()
+countdown_index = IndexedHeap()
+
+# Счетчики и гистограммы для статистики (обновляются вместе с данными, под _dirty_lock)
+aggregates = UserAggregates()
+
+# Ограничения на именованные отсчеты одного пользователя
+MAX_COUNTDOWNS_PER_USER = 20
+MAX_COUNTDOWN_NAME_LENGTH = 40
+
+# Пользователи, до которых не доходят сообщения (заблокировали бота, удалили аккаунт).
+# Их уведомления не восстанавливаются при запуске, пока пользователь снова не напишет боту
+_inactive: Set[int] = set()
+
+# Таблица часовых поясов: в колонке хранилища лежит номер пояса, 0 - пояс по умолчанию
+_zone_names: List[str] = [DEFAULT_TIMEZONE]
+_zone_numbers: Dict[str, int] = {DEFAULT_TIMEZONE: 0}
+
+# Отложенная запись: пользователи, изменения которых еще не сброшены в бэкенд
+_backend: Optional[StorageBackend] = None
+_dirty: Set[int] = set()
+_dirty_countdowns: Set[Tuple[int, str]] = set()
+_dirty_inactive: Set[int] = set()
+_dirty_lock = threading.Lock()
+_flush_event = threading.Event()
+_stop_event = threading.Event()
+_flusher: Optional[threading.Thread] = None
+
+
+@lru_cache(maxsize=4096)
+def date_to_minutes(date: datetime) -> int:
+    """
+    Перевести дату в минуты от 1970-01-01
+    
+    Raises:
+        ValueError: если дата не помещается в колонку дат хранилища (int32)
+    """
+    epoch_minutes = (date - EPOCH) // MINUTE
+    if not MIN_EPOCH_MINUTES <= epoch_minutes <= MAX_EPOCH_MINUTES:
+        raise ValueError(f"Дата {date:%d.%m.%Y} вне допустимого диапазона")
+    return epoch_minutes
+
+
+@lru_cache(maxsize=4096)
+def minutes_to_date(epoch_minutes: int) -> datetime:
+    """Перевести минуты от 1970-01-01 в дату (у большинства пользователей даты совпадают, поэтому кэшируется)"""
+    return EPOCH + timedelta(minutes=epoch_minutes)
 
-# Словари для хранения данных пользователей
-user_dates: Dict[int, datetime] = {}
-user_notifications: Dict[int, str] = {}
+
+@lru_cache(maxsize=4096)
+def _local_date(epoch_minutes: int, zone_number: int) -> datetime:
+    """Дата в минутах от 1970-01-01 как aware datetime в поясе пользователя"""
+    return minutes_to_date(epoch_minutes).replace(tzinfo=get_zone(_zone_names[zone_number]))
+
+
+def _utc_minutes(epoch_minutes: int, zone_number: int) -> int:
+    """Перевести местную дату в минутах в минуту от 1970-01-01 по UTC"""
+    return int(_local_date(epoch_minutes, zone_number).timestamp()) // 60
+
+
+def _user_zone_number(user_id: int) -> int:
+    """Номер часового пояса пользователя (0, если пользователя нет в хранилище)"""
+    slot = user_store.find(user_id)
+    return user_store.zones[slot] if slot >= 0 else 0
+
+
+def _zone_number(name: str) -> int:
+    """Получить номер пояса в таблице, добавив его при необходимости"""
+    number = _zone_numbers.get(name)
+    if number is None:
+        get_zone(name)
+        number = _zone_numbers[name] = len(_zone_names)
+        _zone_names.append(name)
+    return number
+
+
+def parse_minute_of_day(notification_time: str) -> int:
+    """
+    Перевести время "ЧЧ:ММ" в минуту суток
+    
+    Raises:
+        ValueError: если формат времени неверный
+    """
+    hour, minute = notification_time.split(":")
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Некорректное время: {notification_time}")
+    return hour * 60 + minute
+
+
+def format_minute_of_day(minute_of_day: int) -> str:
+    """Перевести минуту суток в строку формата ЧЧ:ММ"""
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+
+def _mark_dirty(user_id: int) -> None:
+    """Пометить пользователя для записи в бэкенд (вызывается под _dirty_lock)"""
+    if _backend is not None:
+        _dirty.add(user_id)
 
 
 def set_user_date(user_id: int, date: datetime) -> None:
-    """Установить дату для пользователя"""
-    user_dates[user_id] = date
+    """
+    Установить дату для пользователя
+    
+    Хранится местное время даты: у aware datetime пояс отбрасывается, дата
+    считается заданной в часовом поясе пользователя.
+    """
+    if date.tzinfo is not None:
+        date = date.replace(tzinfo=None)
+    epoch_minutes = date_to_minutes(date)
+    with _dirty_lock:
+        slot = user_store.slot_for(user_id)
+        previous = user_store.dates[slot]
+        user_store.dates[slot] = epoch_minutes
+        # Агрегаты меняются только после записи в хранилище
+        if previous != NO_DATE:
+            aggregates.remove_date(previous)
+        aggregates.add_date(epoch_minutes)
+        date_index.push(slot, _utc_minutes(epoch_minutes, user_store.zones[slot]))
+        _mark_dirty(user_id)
 
 
 def get_user_date(user_id: int) -> Optional[datetime]:
-    """Получить дату пользователя"""
-    return user_dates.get(user_id)
+    """Получить дату пользователя (aware datetime в его часовом поясе)"""
+    slot = user_store.find(user_id)
+    if slot < 0:
+        return None
+    epoch_minutes = user_store.dates[slot]
+    return None if epoch_minutes == NO_DATE else _local_date(epoch_minutes, user_store.zones[slot])
 
 
 def has_user_date(user_id: int) -> bool:
     """Проверить, есть ли дата у пользователя"""
-    return user_id in user_dates
+    slot = user_store.find(user_id)
+    return slot >= 0 and user_store.dates[slot] != NO_DATE
 
 
 def set_user_notification(user_id: int, notification_time: str) -> None:
     """Установить время уведомлений для пользователя"""
-    user_notifications[user_id] = notification_time
+    minute_of_day = parse_minute_of_day(notification_time)
+    with _dirty_lock:
+        slot = user_store.slot_for(user_id)
+        previous = user_store.minutes[slot]
+        user_store.minutes[slot] = minute_of_day
+        if previous != NO_NOTIFICATION:
+            aggregates.remove_notification(previous)
+        aggregates.add_notification(minute_of_day)
+        _mark_dirty(user_id)
 
 
 def get_user_notification(user_id: int) -> Optional[str]:
     """Получить время уведомлений пользователя"""
-    return user_notifications.get(user_id)
+    slot = user_store.find(user_id)
+    if slot < 0:
+        return None
+    minute_of_day = user_store.minutes[slot]
+    return None if minute_of_day == NO_NOTIFICATION else format_minute_of_day(minute_of_day)
 
 
 def has_user_notification(user_id: int) -> bool:
     """Проверить, есть ли уведомления у пользователя"""
-    return user_id in user_notifications
+    slot = user_store.find(user_id)
+    return slot >= 0 and user_store.minutes[slot] != NO_NOTIFICATION
 
 
 def remove_user_notification(user_id: int) -> None:
     """Удалить уведомления пользователя"""
-    if user_id in user_notifications:
-        del user_notifications[user_id]
+    with _dirty_lock:
+        slot = user_store.find(user_id)
+        if slot >= 0 and user_store.minutes[slot] != NO_NOTIFICATION:
+            aggregates.remove_notification(user_store.minutes[slot])
+            user_store.minutes[slot] = NO_NOTIFICATION
+            user_store.release_if_empty(user_id)
+            _mark_dirty(user_id)
+
+
+def set_user_timezone(user_id: int, name: str) -> None:
+    """
+    Установить часовой пояс пользователя
+    
+    Raises:
+        ValueError: если пояс неизвестен
+    """
+    with _dirty_lock:
+        zone_number = _zone_number(name)
+        slot = user_store.slot_for(user_id)
+        user_store.zones[slot] = zone_number
+        
+        # Даты заданы по местному времени: их момент в UTC меняется вместе с поясом
+        if slot in date_index:
+            date_index.push(slot, _utc_minutes(user_store.dates[slot], zone_number))
+        for countdown_id in countdown_store.of_user(user_id):
+            if countdown_id in countdown_index:
+                countdown_index.push(countdown_id, _utc_minutes(countdown_store.dates[countdown_id], zone_number))
+        
+        if zone_number == 0:
+            user_store.release_if_empty(user_id)
+        _mark_dirty(user_id)
+
+
+def get_user_timezone(user_id: int) -> str:
+    """Получить имя часового пояса пользователя (по умолчанию DEFAULT_TIMEZONE)"""
+    slot = user_store.find(user_id)
+    return _zone_names[user_store.zones[slot]] if slot >= 0 else DEFAULT_TIMEZONE
+
+
+def get_user_zone(user_id: int):
+    """Получить часовой пояс пользователя (объект tzinfo)"""
+    return get_zone(get_user_timezone(user_id))
+
+
+def used_timezones() -> List[str]:
+    """Часовые пояса, которые встречаются у пользователей"""
+    return [_zone_names[number] for number in set(user_store.zones)]
+
+
+def notification_minutes_in_timezone(name: str) -> List[Tuple[int, int]]:
+    """Все пользователи пояса с уведомлениями: (ID, местная минута суток)"""
+    zone_number = _zone_numbers.get(name)
+    if zone_number is None:
+        return []
+    return list(user_store.notification_minutes_in_zone(zone_number))
+
+
+def clear_user_data(user_id: int) -> List[int]:
+    """
+    Очистить все данные пользователя
+    
+    Returns:
+        List[int]: ID удаленных именованных отсчетов
+    """
+    with _dirty_lock:
+        slot = user_store.find(user_id)
+        if slot >= 0:
+            date_index.remove(slot)
+            if user_store.dates[slot] != NO_DATE:
+                aggregates.remove_date(user_store.dates[slot])
+            if user_store.minutes[slot] != NO_NOTIFICATION:
+                aggregates.remove_notification(user_store.minutes[slot])
+        user_store.remove(user_id)
+        _mark_dirty(user_id)
+        if user_id in _inactive:
+            _inactive.discard(user_id)
+            _mark_inactive_dirty(user_id)
+        removed = countdown_store.of_user(user_id)
+        for countdown_id in removed:
+            _mark_countdown_dirty(user_id, countdown_store.names[countdown_id])
+            countdown_index.remove(countdown_id)
+            aggregates.remove_countdown(countdown_store.dates[countdown_id])
+            countdown_store.remove(countdown_id)
+    return removed
+
+
+def _mark_inactive_dirty(user_id: int) -> None:
+    """Пометить изменение активности пользователя для записи в бэкенд (вызывается под _dirty_lock)"""
+    if _backend is not None:
+        _dirty_inactive.add(user_id)
+
+
+def mark_user_inactive(user_id: int) -> bool:
+    """
+    Пометить пользователя недоступным (сообщения ему не доставляются)
+    
+    Returns:
+        bool: True, если пометка поставлена сейчас (у пользователя есть данные и он был активен)
+    """
+    with _dirty_lock:
+        if user_id in _inactive or (user_id not in user_store and not countdown_store.of_user(user_id)):
+            return False
+        _inactive.add(user_id)
+        _mark_inactive_dirty(user_id)
+    return True
+
+
+def reactivate_user(user_id: int) -> bool:
+    """
+    Снять пометку недоступности
+    
+    Returns:
+        bool: True, если пользователь был помечен недоступным
+    """
+    with _dirty_lock:
+        if user_id not in _inactive:
+            return False
+        _inactive.discard(user_id)
+        _mark_inactive_dirty(user_id)
+    return True
+
+
+def is_user_inactive(user_id: int) -> bool:
+    """Проверить, помечен ли пользователь недоступным"""
+    return user_id in _inactive
+
+
+def count_inactive_users() -> int:
+    """Количество пользователей, помеченных недоступными"""
+    return len(_inactive)
+
+
+def get_statistics(now: Optional[datetime] = None) -> Dict[str, object]:
+    """
+    Статистика пользователей из агрегатов (без перебора пользователей)
+    
+    Дни наступления дат считаются по местному времени пользователей от
+    сегодняшнего дня сервера.
+    
+    Returns:
+        Dict[str, object]: счетчики, количество дат на сегодня/7/30 дней,
+            самые частые минуты уведомлений и уведомления по часам
+    """
+    today = ((now or datetime.now()) - EPOCH).days
+    with _dirty_lock:
+        stats: Dict[str, object] = {
+            "users": len(user_store),
+            "inactive": len(_inactive),
+            "with_date": aggregates.users_with_date,
+            "with_notification": aggregates.users_with_notification,
+            "countdowns": aggregates.countdowns,
+            "busiest": aggregates.busiest_minutes(),
+            "hourly": aggregates.hourly(),
+        }
+        for period, days in (("today", 1), ("week", 7), ("month", 30)):
+            stats[f"dates_{period}"] = aggregates.dates_between(today, days)
+            stats[f"countdowns_{period}"] = aggregates.countdowns_between(today, days)
+    return stats
+
+
+def _mark_countdown_dirty(user_id: int, name: str) -> None:
+    """Пометить отсчет для записи в бэкенд (вызывается под _dirty_lock)"""
+    if _backend is not None:
+        _dirty_countdowns.add((user_id, name))
+
+
+def normalize_countdown_name(name: str) -> str:
+    """
+    Привести название отсчета к каноническому виду (одиночные пробелы)
+    
+    Raises:
+        ValueError: если название пустое или длиннее MAX_COUNTDOWN_NAME_LENGTH
+    """
+    name = " ".join(name.split())
+    if not 0 < len(name) <= MAX_COUNTDOWN_NAME_LENGTH:
+        raise ValueError(f"Название должно быть от 1 до {MAX_COUNTDOWN_NAME_LENGTH} символов")
+    return name
+
+
+def add_countdown(user_id: int, name: str, date: datetime) -> int:
+    """
+    Добавить именованный отсчет (дата существующего отсчета с тем же названием заменяется)
+    
+    Дата, как и основная, хранится по местному времени пользователя.
+    
+    Returns:
+        int: ID отсчета
+        
+    Raises:
+        ValueError: если название некорректно или у пользователя уже MAX_COUNTDOWNS_PER_USER отсчетов
+    """
+    name = normalize_countdown_name(name)
+    if date.tzinfo is not None:
+        date = date.replace(tzinfo=None)
+    epoch_minutes = date_to_minutes(date)
+    with _dirty_lock:
+        existing = countdown_store.find(user_id, name)
+        if existing < 0 and countdown_store.count_of_user(user_id) >= MAX_COUNTDOWNS_PER_USER:
+            raise ValueError(f"Не больше {MAX_COUNTDOWNS_PER_USER} отсчетов на пользователя")
+        previous = countdown_store.dates[existing] if existing >= 0 else None
+        countdown_id = countdown_store.add(user_id, name, epoch_minutes)
+        if previous is not None:
+            aggregates.remove_countdown(previous)
+        aggregates.add_countdown(epoch_minutes)
+        countdown_index.push(countdown_id, _utc_minutes(epoch_minutes, _user_zone_number(user_id)))
+        _mark_countdown_dirty(user_id, name)
+    return countdown_id
+
+
+def remove_countdown(user_id: int, name: str) -> Optional[int]:
+    """
+    Удалить именованный отсчет
+    
+    Returns:
+        Optional[int]: ID удаленного отсчета или None, если такого нет
+    """
+    name = " ".join(name.split())
+    with _dirty_lock:
+        countdown_id = countdown_store.find(user_id, name)
+        if countdown_id < 0:
+            return None
+        countdown_index.remove(countdown_id)
+        aggregates.remove_countdown(countdown_store.dates[countdown_id])
+        countdown_store.remove(countdown_id)
+        _mark_countdown_dirty(user_id, name)
+    return countdown_id
+
+
+def find_countdown(user_id: int, name: str) -> int:
+    """Найти ID отсчета пользователя по названию (-1, если такого нет)"""
+    return countdown_store.find(user_id, " ".join(name.split()))
+
+
+def get_countdown(countdown_id: int) -> Optional[Tuple[int, str, datetime, Optional[str]]]:
+    """Получить (пользователь, название, дата в поясе пользователя, время уведомлений) отсчета"""
+    values = countdown_store.get(countdown_id)
+    if values is None:
+        return None
+    user_id, name, epoch_minutes, minute_of_day = values
+    return (user_id, name, _local_date(epoch_minutes, _user_zone_number(user_id)),
+            None if minute_of_day == NO_NOTIFICATION else format_minute_of_day(minute_of_day))
+
+
+def get_countdowns(user_id: int) -> List[Tuple[int, str, datetime, Optional[str]]]:
+    """Все именованные отсчеты пользователя в порядке приближения даты: (ID, название, дата, время уведомлений)"""
+    zone_number = _user_zone_number(user_id)
+    result = []
+    for countdown_id in countdown_store.of_user(user_id):
+        minute_of_day = countdown_store.minutes[countdown_id]
+        result.append((
+            countdown_id,
+            countdown_store.names[countdown_id],
+            _local_date(countdown_store.dates[countdown_id], zone_number),
+            None if minute_of_day == NO_NOTIFICATION else format_minute_of_day(minute_of_day)
+        ))
+    return result
+
+
+def set_countdown_notification(countdown_id: int, notification_time: Optional[str]) -> None:
+    """Установить время уведомлений отсчета ("ЧЧ:ММ" или None, чтобы отключить)"""
+    minute_of_day = NO_NOTIFICATION if notification_time is None else parse_minute_of_day(notification_time)
+    with _dirty_lock:
+        values = countdown_store.get(countdown_id)
+        if values is None:
+            return
+        countdown_store.minutes[countdown_id] = minute_of_day
+        _mark_countdown_dirty(values[0], values[1])
+
+
+def get_countdown_delivery_day(countdown_id: int) -> int:
+    """День последнего доставленного уведомления отсчета (0, если не было)"""
+    return countdown_store.delivered[countdown_id] if countdown_id < len(countdown_store.delivered) else 0
+
+
+def set_countdown_delivery_day(countdown_id: int, day: int) -> None:
+    """Запомнить день доставленного уведомления отсчета (в бэкенд не пишется, источник - журнал доставок)"""
+    if countdown_store.get(countdown_id) is not None and countdown_store.delivered[countdown_id] < day:
+        countdown_store.delivered[countdown_id] = day
+
+
+def iter_countdown_delivery_days(min_day: int) -> Iterator[Tuple[int, str, int]]:
+    """Перебрать отсчеты с доставкой не раньше min_day: (ID пользователя, название, день)"""
+    delivered = countdown_store.delivered
+    for countdown_id, user_id, name, _, _ in countdown_store.rows():
+        if delivered[countdown_id] >= min_day:
+            yield user_id, name, delivered[countdown_id]
+
+
+def next_countdown() -> Optional[Tuple[int, int]]:
+    """Ближайший отсчет: (минута наступления по UTC от 1970-01-01, ID) или None"""
+    return countdown_index.peek()
+
+
+def next_date() -> Optional[Tuple[int, int]]:
+    """Ближайшая основная дата: (минута наступления по UTC от 1970-01-01, ID пользователя) или None"""
+    head = date_index.peek()
+    return None if head is None else (head[0], user_store.ids[head[1]])
+
+
+def pop_reached_dates(utc_minutes: int) -> List[int]:
+    """Забрать из индекса пользователей, основная дата которых наступила к указанной минуте UTC"""
+    with _dirty_lock:
+        return [user_store.ids[slot] for slot in date_index.pop_due(utc_minutes)]
+
+
+def pop_reached_countdowns(utc_minutes: int) -> List[int]:
+    """Забрать из индекса отсчеты, дата которых наступила к указанной минуте UTC"""
+    with _dirty_lock:
+        return countdown_index.pop_due(utc_minutes)
+
+
+def iter_countdown_notifications() -> Iterator[Tuple[int, int, int, str]]:
+    """
+    Перебрать еще не наступившие отсчеты с уведомлениями (кроме отсчетов недоступных пользователей)
+    
+    Yields:
+        (ID отсчета, минута наступления по UTC, местная минута суток, часовой пояс владельца)
+    """
+    for countdown_id, user_id, _, _, minute_of_day in countdown_store.rows():
+        utc_minutes = countdown_index.priority(countdown_id)
+        if minute_of_day != NO_NOTIFICATION and utc_minutes is not None and user_id not in _inactive:
+            yield countdown_id, utc_minutes, minute_of_day, _zone_names[_user_zone_number(user_id)]
+
+
+def countdown_notifications_in_timezone(name: str) -> List[Tuple[int, int]]:
+    """Отсчеты с уведомлениями у пользователей пояса: (ID отсчета, местная минута суток)"""
+    zone_number = _zone_numbers.get(name)
+    if zone_number is None:
+        return []
+    return [
+        (countdown_id, minute_of_day)
+        for countdown_id, user_id, _, _, minute_of_day in countdown_store.rows()
+        if minute_of_day != NO_NOTIFICATION and _user_zone_number(user_id) == zone_number
+    ]
+
+
+def get_delivery_day(user_id: int) -> int:
+    """Получить день (от 1970-01-01) последнего доставленного уведомления, 0 если не было"""
+    slot = user_store.find(user_id)
+    return user_store.delivered[slot] if slot >= 0 else 0
+
+
+def set_delivery_day(user_id: int, day: int) -> None:
+    """
+    Запомнить день последнего доставленного уведомления
+    
+    Значение не пишется в бэкенд: его источник - журнал доставок.
+    """
+    slot = user_store.find(user_id)
+    if slot >= 0 and user_store.delivered[slot] < day:
+        user_store.delivered[slot] = day
+
+
+def iter_delivery_days(min_day: int) -> Iterator[Tuple[int, int]]:
+    """Перебрать пользователей с доставкой не раньше min_day: (ID, день)"""
+    return user_store.delivery_days(min_day)
+
+
+def user_ids_after(after: int = 0) -> List[int]:
+    """
+    ID всех пользователей бота (с данными или отсчетами) больше after по возрастанию,
+    кроме недоступных: стабильный порядок для обхода с продолжением после остановки
+    """
+    with _dirty_lock:
+        user_ids = set(user_store.ids)
+        user_ids.update(countdown_store.owners)
+    user_ids.discard(FREE_ID)
+    user_ids -= _inactive
+    return sorted(user_id for user_id in user_ids if user_id > after)
+
+
+def count_users() -> int:
+    """Количество пользователей в хранилище"""
+    return len(user_store)
+
+
+def users_due_at(minute_of_day: int) -> List[int]:
+    """Все пользователи с уведомлением на указанную минуту суток"""
+    return user_store.users_due_at(minute_of_day)
+
+
+def users_with_passed_date(now: Optional[datetime] = None) -> List[int]:
+    """Все пользователи, чья дата уже наступила"""
+    # Текущая минута считается напрямую: через кэш date_to_minutes каждый вызов вытеснял бы даты пользователей
+    return user_store.users_with_date_before(((now or datetime.now()) - EPOCH) // MINUTE)
+
+
+def iter_notification_settings() -> Iterator[Tuple[int, int, int, str]]:
+    """
+    Перебрать пользователей с уведомлениями (кроме недоступных)
+    
+    Yields:
+        (ID, дата в минутах по местному времени, местная минута суток, часовой пояс)
+    """
+    for user_id, epoch_minutes, minute_of_day, zone_number in user_store.rows():
+        if minute_of_day != NO_NOTIFICATION and epoch_minutes != NO_DATE and user_id not in _inactive:
+            yield user_id, epoch_minutes, minute_of_day, _zone_names[zone_number]
+
+
+def _stored_minutes(target_seconds: int) -> int:
+    """
+    Дата из бэкенда (секунды от 1970-01-01) в минутах для колонки дат
+    
+    Raises:
+        ValueError: если дата не помещается в колонку дат (int32)
+    """
+    epoch_minutes = target_seconds // 60
+    if not MIN_EPOCH_MINUTES <= epoch_minutes <= MAX_EPOCH_MINUTES:
+        raise ValueError(target_seconds)
+    return epoch_minutes
+
+
+def init_storage(backend: StorageBackend, flush_interval: float = 1.0) -> int:
+    """
+    Подключить бэкенд, загрузить из него всех пользователей и запустить фоновую запись
+
+    Args:
+        backend: бэкенд постоянного хранения
+        flush_interval: период сброса изменений в бэкенд (в секундах)
+
+    Returns:
+        int: количество загруженных пользователей
+    """
+    global _backend, _flusher
+
+    loaded = 0
+    store = user_store
+    for user_id, target_seconds, notification_time, timezone_name in backend.load_all():
+        slot = store.slot_for(user_id)
+        if target_seconds is not None:
+            try:
+                store.dates[slot] = _stored_minutes(target_seconds)
+                aggregates.add_date(store.dates[slot])
+            except ValueError:
+                logger.warning(f"Дата вне допустимого диапазона у пользователя {user_id}: {target_seconds}")
+        if notification_time is not None:
+            try:
+                store.minutes[slot] = parse_minute_of_day(notification_time)
+                aggregates.add_notification(store.minutes[slot])
+            except ValueError:
+                logger.warning(f"Некорректное время уведомлений у пользователя {user_id}: {notification_time}")
+        if timezone_name is not None:
+            try:
+                store.zones[slot] = _zone_number(timezone_name)
+            except ValueError:
+                logger.warning(f"Неизвестный часовой пояс у пользователя {user_id}: {timezone_name}")
+        loaded += 1
+
+    # Индекс строится одним проходом: перестройка кучи за O(n) вместо вставки по одному
+    date_index.extend(
+        (slot, _utc_minutes(epoch_minutes, zone_number))
+        for slot, (user_id, epoch_minutes, zone_number) in enumerate(zip(store.ids, store.dates, store.zones))
+        if user_id != FREE_ID and epoch_minutes != NO_DATE
+    )
+
+    countdowns = 0
+    for user_id, name, target_seconds, notification_time in backend.load_countdowns():
+        try:
+            countdown_id = countdown_store.add(user_id, name, _stored_minutes(target_seconds))
+        except ValueError:
+            logger.warning(f"Дата вне допустимого диапазона у отсчета '{name}' пользователя {user_id}")
+            continue
+        aggregates.add_countdown(countdown_store.dates[countdown_id])
+        if notification_time is not None:
+            try:
+                countdown_store.minutes[countdown_id] = parse_minute_of_day(notification_time)
+            except ValueError:
+                logger.warning(f"Некорректное время уведомлений отсчета '{name}' у пользователя {user_id}")
+        countdowns += 1
+    countdown_index.extend(
+        (countdown_id, _utc_minutes(epoch_minutes, _user_zone_number(user_id)))
+        for countdown_id, user_id, _, epoch_minutes, _ in countdown_store.rows()
+    )
+
+    _inactive.update(backend.load_inactive())
+
+    _backend = backend
+    _stop_event.clear()
+    _flusher = threading.Thread(
+        target=_flush_loop, args=(flush_interval,), name="storage-flusher", daemon=True
+    )
+    _flusher.start()
+
+    logger.info(f"Хранилище загружено: {loaded} пользователей, {countdowns} именованных отсчетов, "
+                f"недоступных пользователей: {len(_inactive)}")
+    return loaded
+
+
+def _flush_loop(flush_interval: float) -> None:
+    """Фоновый цикл сброса изменений в бэкенд"""
+    while not _stop_event.is_set():
+        _flush_event.wait(flush_interval)
+        _flush_event.clear()
+        try:
+            flush_storage()
+        except Exception as e:
+            logger.error(f"Ошибка при записи данных в хранилище: {e}")
+
+
+def flush_storage() -> int:
+    """
+    Записать накопленные изменения в бэкенд одной транзакцией
+
+    Returns:
+        int: количество записанных пользователей
+    """
+    global _dirty, _dirty_countdowns, _dirty_inactive
+
+    if _backend is None:
+        return 0
+
+    upserts = []
+    deletes = []
+    countdown_upserts = []
+    countdown_deletes = []
+    with _dirty_lock:
+        if not _dirty and not _dirty_countdowns and not _dirty_inactive:
+            return 0
+        dirty, _dirty = _dirty, set()
+        dirty_countdowns, _dirty_countdowns = _dirty_countdowns, set()
+        dirty_inactive, _dirty_inactive = _dirty_inactive, set()
+        inactive = [user_id for user_id in dirty_inactive if user_id in _inactive]
+        active = [user_id for user_id in dirty_inactive if user_id not in _inactive]
+        
+        # Снимок строк собирается под блокировкой, чтобы не прочитать слот во время изменения
+        for user_id in dirty:
+            values = user_store.get(user_id)
+            if values is None:
+                deletes.append(user_id)
+                continue
+            epoch_minutes, minute_of_day, zone_number = values
+            upserts.append((
+                user_id,
+                epoch_minutes * 60 if epoch_minutes != NO_DATE else None,
+                format_minute_of_day(minute_of_day) if minute_of_day != NO_NOTIFICATION else None,
+                _zone_names[zone_number] if zone_number else None
+            ))
+        
+        for user_id, name in dirty_countdowns:
+            countdown_id = countdown_store.find(user_id, name)
+            if countdown_id < 0:
+                countdown_deletes.append((user_id, name))
+                continue
+            minute_of_day = countdown_store.minutes[countdown_id]
+            countdown_upserts.append((
+                user_id,
+                name,
+                countdown_store.dates[countdown_id] * 60,
+                format_minute_of_day(minute_of_day) if minute_of_day != NO_NOTIFICATION else None
+            ))
+
+    try:
+        _backend.write_batch(upserts, deletes, countdown_upserts, countdown_deletes, inactive, active)
+    except Exception:
+        # Возвращаем изменения в очередь, чтобы не потерять их
+        with _dirty_lock:
+            _dirty |= dirty
+            _dirty_countdowns |= dirty_countdowns
+            _dirty_inactive |= dirty_inactive
+        raise
+
+    return len(dirty) + len(dirty_countdowns) + len(dirty_inactive)
+
+
+def close_storage() -> None:
+    """Остановить фоновую запись, сбросить оставшиеся изменения и закрыть бэкенд"""
+    global _backend, _flusher
+
+    if _backend is None:
+        return
 
+    _stop_event.set()
+    _flush_event.set()
+    if _flusher is not None:
+        _flusher.join()
+        _flusher = None
 
-def clear_user_data(user_id: int) -> None:
-    """Очистить все данные пользователя"""
-    if user_id in user_dates:
-        del user_dates[user_id]
-    if user_id in user_notifications:
-        del user_notifications[user_id] 
\ No newline at end of file
+    flush_storage()
+    _backend.close()
+    _backend = None
+    logger.info("Хранилище закрыто")
@@ -0,0 +1,248 @@
+"""
+Бэкенды постоянного хранения данных пользователей
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple, Type
+
+# Точка отсчета для хранения дат в виде целых секунд
+EPOCH = datetime(1970, 1, 1)
+
+# Строка хранилища: (user_id, дата в секундах от EPOCH или None, время уведомлений или None,
+# часовой пояс или None для пояса по умолчанию)
+UserRow = Tuple[int, Optional[int], Optional[str], Optional[str]]
+
+# Именованный отсчет: (user_id, название, дата в секундах от EPOCH, время уведомлений или None)
+CountdownRow = Tuple[int, str, int, Optional[str]]
+# Ключ отсчета для удаления: (user_id, название)
+CountdownKey = Tuple[int, str]
+
+
+def datetime_to_seconds(date: datetime) -> int:
+    """Перевести дату в целое число секунд от EPOCH"""
+    return int((date - EPOCH).total_seconds())
+
+
+def seconds_to_datetime(seconds: int) -> datetime:
+    """Перевести число секунд от EPOCH обратно в дату"""
+    return EPOCH + timedelta(seconds=seconds)
+
+
+class StorageBackend:
+    """Базовый класс бэкенда хранения"""
+
+    def load_all(self) -> Iterator[UserRow]:
+        """Прочитать все записи пользователей"""
+        raise NotImplementedError
+
+    def load_countdowns(self) -> Iterator[CountdownRow]:
+        """Прочитать все именованные отсчеты"""
+        raise NotImplementedError
+
+    def load_inactive(self) -> Iterator[int]:
+        """Прочитать ID пользователей, помеченных недоступными"""
+        raise NotImplementedError
+
+    def write_batch(self, upserts: Iterable[UserRow], deletes: Iterable[int],
+                    countdown_upserts: Iterable[CountdownRow] = (),
+                    countdown_deletes: Iterable[CountdownKey] = (),
+                    inactive: Iterable[int] = (), active: Iterable[int] = ()) -> None:
+        """Записать пачку изменений пользователей, отсчетов и пометок недоступности одной транзакцией"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Закрыть бэкенд"""
+
+
+class MemoryBackend(StorageBackend):
+    """Бэкенд без постоянного хранения (данные живут до перезапуска)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.rows: Dict[int, UserRow] = {}
+        self.countdowns: Dict[CountdownKey, CountdownRow] = {}
+        self.inactive: Set[int] = set()
+
+    def load_all(self) -> Iterator[UserRow]:
+        return iter(list(self.rows.values()))
+
+    def load_countdowns(self) -> Iterator[CountdownRow]:
+        return iter(list(self.countdowns.values()))
+
+    def load_inactive(self) -> Iterator[int]:
+        return iter(list(self.inactive))
+
+    def write_batch(self, upserts: Iterable[UserRow], deletes: Iterable[int],
+                    countdown_upserts: Iterable[CountdownRow] = (),
+                    countdown_deletes: Iterable[CountdownKey] = (),
+                    inactive: Iterable[int] = (), active: Iterable[int] = ()) -> None:
+        for row in upserts:
+            self.rows[row[0]] = row
+        for user_id in deletes:
+            self.rows.pop(user_id, None)
+        for row in countdown_upserts:
+            self.countdowns[row[:2]] = row
+        for key in countdown_deletes:
+            self.countdowns.pop(key, None)
+        self.inactive.update(inactive)
+        self.inactive.difference_update(active)
+
+
+class SQLiteBackend(StorageBackend):
+    """Бэкенд на SQLite в режиме WAL"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "user_id INTEGER PRIMARY KEY, "
+            "target_date INTEGER, "
+            "notification_time TEXT, "
+            "timezone TEXT)"
+        )
+        # Файлы, созданные до появления часовых поясов, дополняются колонкой
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(users)")}
+        if "timezone" not in columns:
+            self._conn.execute("ALTER TABLE users ADD COLUMN timezone TEXT")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS countdowns ("
+            "user_id INTEGER NOT NULL, "
+            "name TEXT NOT NULL, "
+            "target_date INTEGER NOT NULL, "
+            "notification_time TEXT, "
+            "PRIMARY KEY (user_id, name))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS inactive_users (user_id INTEGER PRIMARY KEY)")
+
+    def load_all(self) -> Iterator[UserRow]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT user_id, target_date, notification_time, timezone FROM users")
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                yield from rows
+
+    def load_countdowns(self) -> Iterator[CountdownRow]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT user_id, name, target_date, notification_time FROM countdowns")
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                yield from rows
+
+    def load_inactive(self) -> Iterator[int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id FROM inactive_users").fetchall()
+        return (user_id for user_id, in rows)
+
+    def write_batch(self, upserts: Iterable[UserRow], deletes: Iterable[int],
+                    countdown_upserts: Iterable[CountdownRow] = (),
+                    countdown_deletes: Iterable[CountdownKey] = (),
+                    inactive: Iterable[int] = (), active: Iterable[int] = ()) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO users (user_id, target_date, notification_time, timezone) "
+                    "VALUES (?, ?, ?, ?)",
+                    upserts
+                )
+                self._conn.executemany(
+                    "DELETE FROM users WHERE user_id = ?",
+                    ((user_id,) for user_id in deletes)
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO countdowns (user_id, name, target_date, notification_time) "
+                    "VALUES (?, ?, ?, ?)",
+                    countdown_upserts
+                )
+                self._conn.executemany("DELETE FROM countdowns WHERE user_id = ? AND name = ?", countdown_deletes)
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO inactive_users (user_id) VALUES (?)",
+                    ((user_id,) for user_id in inactive)
+                )
+                self._conn.executemany(
+                    "DELETE FROM inactive_users WHERE user_id = ?",
+                    ((user_id,) for user_id in active)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def read_snapshot(path: str, offset: int = 0, batch_size: int = 10000) -> Iterator[UserRow]:
+    """
+    Прочитать пользователей из файла SQLite, не мешая работающему боту
+
+    Соединение открывается только на чтение, а выборка идет в одной читающей
+    транзакции: в режиме WAL она видит согласованный снимок и не блокирует
+    запись. Строки идут по возрастанию user_id и читаются пачками.
+
+    Args:
+        path: путь к файлу данных
+        offset: сколько первых записей пропустить
+        batch_size: размер пачки чтения
+
+    Raises:
+        FileNotFoundError: если файла нет
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Файл данных не найден: {path}")
+
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, isolation_level=None)
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+        timezone_column = "timezone" if "timezone" in columns else "NULL"
+        conn.execute("BEGIN")
+        cursor = conn.execute(
+            f"SELECT user_id, target_date, notification_time, {timezone_column} FROM users "
+            "ORDER BY user_id LIMIT -1 OFFSET ?",
+            (offset,)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+BACKENDS: Dict[str, Type[StorageBackend]] = {
+    'sqlite': SQLiteBackend,
+    'memory': MemoryBackend,
+}
+
+
+def create_backend(name: str, path: str) -> StorageBackend:
+    """
+    Создать бэкенд хранения по имени
+
+    Args:
+        name: имя бэкенда (sqlite, memory)
+        path: путь к файлу данных
+
+    Returns:
+        StorageBackend: экземпляр бэкенда
+
+    Raises:
+        ValueError: если бэкенд неизвестен
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд хранения: {name}. Доступны: {', '.join(BACKENDS)}")
+    return BACKENDS[name](path)
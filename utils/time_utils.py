@@ -1,19 +1,145 @@
 """
 Утилиты для работы со временем
 """
-from datetime import datetime, timedelta
-from typing import Tuple
+import re
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
 
+from utils.messages import DEFAULT_LOCALE, text
+from utils.render_cache import LRUCache
 
-def calculate_time_left(target_date: datetime) -> Tuple[int, int, int]:
+# Часовой пояс пользователей, которые не выбрали свой (исторически бот работал по Москве)
+DEFAULT_TIMEZONE = "Europe/Moscow"
+
+# Фиксированное смещение от UTC: "UTC+3", "+03:00", "GMT-5:30"
+_OFFSET_PATTERN = re.compile(r"^(?:UTC|GMT)?\s*([+-])(\d{1,2})(?::?(\d{2}))?$", re.IGNORECASE)
+
+# Общий кэш текстов обратного отсчета: ключ (целевая дата, ее пояс, текущая минута)
+countdown_cache = LRUCache(max_size=4096, ttl=120)
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> tzinfo:
+    """
+    Получить часовой пояс по имени (IANA или каноническое смещение вида UTC+03:00)
+    
+    Raises:
+        ValueError: если пояс неизвестен
+    """
+    match = _OFFSET_PATTERN.match(name)
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+        if offset > timedelta(hours=14):
+            raise ValueError(f"Смещение вне диапазона: {name}")
+        return timezone(-offset if sign == "-" else offset, name)
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Неизвестный часовой пояс: {name}")
+
+
+@lru_cache(maxsize=1)
+def _zone_names_by_lower() -> dict:
+    """Имена поясов IANA без учета регистра (строится при первом обращении)"""
+    return {name.lower(): name for name in available_timezones()}
+
+
+def parse_timezone(text: str) -> str:
+    """
+    Разобрать ввод пользователя в каноническое имя часового пояса
+    
+    Принимаются имена IANA в любом регистре (europe/berlin) и смещения
+    (UTC+3, +05:30, GMT-4).
+    
+    Returns:
+        str: имя пояса для хранения
+        
+    Raises:
+        ValueError: если пояс не распознан
+    """
+    text = text.strip()
+    match = _OFFSET_PATTERN.match(text)
+    if match:
+        sign, hours, minutes = match.groups()
+        name = f"UTC{sign}{int(hours):02d}:{int(minutes or 0):02d}"
+    elif text.upper() in ("UTC", "GMT", "Z"):
+        name = "UTC"
+    else:
+        name = _zone_names_by_lower().get(text.lower())
+        if name is None:
+            raise ValueError(f"Неизвестный часовой пояс: {text}")
+    get_zone(name)
+    return name
+
+
+def utc_offset_minutes(zone: tzinfo, at: datetime) -> int:
+    """Смещение пояса от UTC (в минутах) в момент at (aware datetime)"""
+    return int(at.astimezone(zone).utcoffset().total_seconds()) // 60
+
+
+def next_transition(zone: tzinfo, after: datetime, horizon_days: int = 400) -> Optional[datetime]:
+    """
+    Найти ближайший перевод часов в поясе после момента after
+    
+    Смещение проверяется с шагом в сутки, затем момент смены уточняется
+    бинарным поиском до минуты.
+    
+    Args:
+        zone: часовой пояс
+        after: момент (aware datetime)
+        horizon_days: сколько дней вперед искать
+        
+    Returns:
+        Optional[datetime]: первая минута (UTC) с новым смещением или None, если переводов нет
+    """
+    if isinstance(zone, timezone):
+        return None
+    
+    start = after.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    offset = utc_offset_minutes(zone, start)
+    low = start
+    for day in range(1, horizon_days + 1):
+        high = start + timedelta(days=day)
+        if utc_offset_minutes(zone, high) != offset:
+            break
+        low = high
+    else:
+        return None
+    
+    # Инвариант: в low старое смещение, в high - новое
+    while high - low > timedelta(minutes=1):
+        middle = low + (high - low) // 2
+        middle = middle.replace(second=0, microsecond=0)
+        if utc_offset_minutes(zone, middle) == offset:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def calculate_time_left(target_date: datetime, now: Optional[datetime] = None) -> Tuple[int, int, int]:
     """
     Вычислить оставшееся время до даты
     
+    Для дат с часовым поясом разница считается между моментами в UTC, поэтому
+    перевод часов между сейчас и целевой датой учитывается.
+    
+    Args:
+        target_date: целевая дата (aware datetime)
+        now: текущее время (по умолчанию - сейчас)
+    
     Returns:
         Tuple[int, int, int]: (дни, часы, минуты)
     """
-    now = datetime.now()
-    time_diff = target_date - now
+    if target_date.tzinfo is None:
+        time_diff = target_date - (now or datetime.now())
+    else:
+        # Вычитание aware datetime с одинаковым tzinfo идет по "настенному" времени, поэтому через UTC
+        now = now or datetime.now(timezone.utc)
+        time_diff = target_date.astimezone(timezone.utc) - now.astimezone(timezone.utc)
     
     days = time_diff.days
     hours = time_diff.seconds // 3600
@@ -22,7 +148,8 @@ def calculate_time_left(target_date: datetime) -> Tuple[int, int, int]:
     return days, hours, minutes
 
 
-def format_time_left(days: int, hours: int, minutes: int, target_date: datetime) -> str:
+def format_time_left(days: int, hours: int, minutes: int, target_date: datetime,
+                     locale: str = DEFAULT_LOCALE, granularity: str = "minute") -> str:
     """
     Форматировать оставшееся время в читаемый вид
     
@@ -31,18 +158,59 @@ def format_time_left(days: int, hours: int, minutes: int, target_date: datetime)
         hours: количество часов
         minutes: количество минут
         target_date: целевая дата
+        locale: язык текста
+        granularity: точность текста: "minute", "hour" (без минут) или "day" (только дни,
+            в последние сутки - часы)
         
     Returns:
         str: отформатированная строка времени
     """
+    date = target_date.strftime('%d.%m.%Y')
+    if granularity == "day" and days > 0:
+        return text("countdown_days_only", locale, date=date, days=days)
+    if granularity != "minute":
+        if days > 0:
+            return text("countdown_days_hours", locale, date=date, days=days, hours=hours)
+        return text("countdown_hours_only", locale, date=date, hours=hours)
     if days > 0:
-        time_text = f"📅 До {target_date.strftime('%d.%m.%Y')} осталось:\n\n"
-        time_text += f"🕐 {days} дней, {hours} часов, {minutes} минут"
+        return text("countdown_days", locale, date=date, days=days, hours=hours, minutes=minutes)
+    return text("countdown_hours", locale, date=date, hours=hours, minutes=minutes)
+
+
+def render_time_left(target_date: datetime, now: Optional[datetime] = None,
+                     locale: str = DEFAULT_LOCALE, granularity: str = "minute") -> str:
+    """
+    Получить текст оставшегося времени через общий кэш
+    
+    Текст считается один раз на пару (целевая дата, текущая минута) и
+    переиспользуется для всех пользователей с той же датой и языком в эту минуту.
+    
+    Args:
+        target_date: целевая дата (aware datetime)
+        now: текущее время (по умолчанию - сейчас)
+        locale: язык текста
+        granularity: точность текста (см. format_time_left)
+        
+    Returns:
+        str: отформатированная строка времени
+    """
+    if target_date.tzinfo is None:
+        now = now or datetime.now()
+        # Номер минуты считается без создания нового datetime (replace заметно дороже)
+        minute_index = now.toordinal() * 1440 + now.hour * 60 + now.minute
     else:
-        time_text = f"📅 До {target_date.strftime('%d.%m.%Y')} осталось:\n\n"
-        time_text += f"🕐 {hours} часов, {minutes} минут"
+        now = now or datetime.now(timezone.utc)
+        minute_index = int(now.timestamp()) // 60
+    
+    def render() -> str:
+        minute = now.replace(second=0, microsecond=0)
+        days, hours, minutes = calculate_time_left(target_date, minute)
+        return format_time_left(days, hours, minutes, target_date, locale, granularity)
     
-    return time_text
+    # Пояс входит в ключ: aware даты сравниваются по моменту, а текст зависит от местной даты
+    return countdown_cache.get_or_compute(
+        (target_date, target_date.tzinfo, minute_index, locale, granularity), render
+    )
 
 
 def is_date_in_future(date: datetime) -> bool:
@@ -50,12 +218,12 @@ def is_date_in_future(date: datetime) -> bool:
     Проверить, что дата в будущем
     
     Args:
-        date: проверяемая дата
+        date: проверяемая дата (aware datetime)
         
     Returns:
         bool: True если дата в будущем
     """
-    return date > datetime.now()
+    return date > (datetime.now(timezone.utc) if date.tzinfo is not None else datetime.now())
 
 
 def is_date_passed(date: datetime) -> bool:
@@ -63,17 +231,127 @@ def is_date_passed(date: datetime) -> bool:
     Проверить, что дата уже прошла
     
     Args:
-        date: проверяемая дата
+        date: проверяемая дата (aware datetime)
         
     Returns:
         bool: True если дата уже прошла
     """
-    return date <= datetime.now()
+    return date <= (datetime.now(timezone.utc) if date.tzinfo is not None else datetime.now())
+
+
+# Самый поздний год даты (хранилище держит даты в минутах в int32, это примерно до 6053 года)
+MAX_YEAR = 3000
+
+# Дней в месяце для невисокосного года (индекс - номер месяца)
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _is_number(text: str) -> bool:
+    """Строка из ASCII цифр (str.isdigit пропускает и другие символы вроде "²")"""
+    return text.isascii() and text.isdigit()
+
+
+class ParseError(ValueError):
+    """
+    Ошибка разбора даты или времени
+
+    Причина задается кодом и значениями для подстановки, а текст берется из
+    каталога сообщений (ключ parse_<код>) на языке пользователя.
+    """
+
+    def __init__(self, code: str, values: Dict[str, object]):
+        super().__init__(code, values)
+        self.code = code
+        self.values = values
+
+    def message(self, locale: str) -> str:
+        """Текст причины на языке пользователя"""
+        from utils.messages import text
+        return text(f"parse_{self.code}", locale, **self.values)
+
+    def __str__(self) -> str:
+        from utils.messages import DEFAULT_LOCALE
+        return self.message(DEFAULT_LOCALE)
+
+
+# Результат разбора: значение или (код ошибки, значения для подстановки)
+ParseFailure = Tuple[str, Dict[str, object]]
+
+
+@lru_cache(maxsize=256)
+def _parse_date_cached(date_text: str) -> Union[datetime, ParseFailure]:
+    """
+    Разобрать дату без strptime
+    
+    Returns:
+        Union[datetime, ParseFailure]: дата или код ошибки со значениями (ошибки
+        тоже кэшируются, поэтому повторный неверный ввод обходится так же дешево)
+    """
+    date_text = date_text.strip()
+    if "-" in date_text:
+        parts = date_text.split("-")
+        if len(parts) != 3:
+            return "date_parts_iso", {}
+        year_text, month_text, day_text = parts
+    else:
+        separator = "." if "." in date_text else "/" if "/" in date_text else None
+        if separator is None:
+            return "date_unrecognized", {}
+        parts = date_text.split(separator)
+        if len(parts) != 3:
+            return "date_parts", {"separator": separator}
+        day_text, month_text, year_text = parts
+    
+    if not (_is_number(day_text) and _is_number(month_text) and _is_number(year_text)):
+        return "date_not_numbers", {}
+    if len(year_text) != 4:
+        return "year_digits", {}
+    if len(day_text) > 2 or len(month_text) > 2:
+        return "day_month_digits", {}
+    
+    year, month, day = int(year_text), int(month_text), int(day_text)
+    if not 1 <= year <= MAX_YEAR:
+        return "year_range", {"max_year": MAX_YEAR}
+    if not 1 <= month <= 12:
+        return "month_range", {"month": month}
+    days_in_month = _DAYS_IN_MONTH[month]
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        days_in_month = 29
+    if not 1 <= day <= days_in_month:
+        return "day_range", {"days": days_in_month, "month": month, "year": year, "day": day}
+    return datetime(year, month, day)
+
+
+@lru_cache(maxsize=256)
+def _parse_time_cached(time_text: str) -> Union[datetime, ParseFailure]:
+    """Разобрать время без strptime (результат или код ошибки со значениями)"""
+    time_text = time_text.strip()
+    if ":" in time_text:
+        hour_text, _, minute_text = time_text.partition(":")
+        if not hour_text or len(hour_text) > 2 or len(minute_text) != 2:
+            return "time_format", {}
+    elif 3 <= len(time_text) <= 4:
+        # Без разделителя: 0900 или 900
+        hour_text, minute_text = time_text[:-2], time_text[-2:]
+    else:
+        return "time_format", {}
+    
+    if not (_is_number(hour_text) and _is_number(minute_text)):
+        return "time_not_numbers", {}
+    hour, minute = int(hour_text), int(minute_text)
+    if hour > 23:
+        return "hour_range", {"hour": hour}
+    if minute > 59:
+        return "minute_range", {"minute": minute}
+    return datetime(1900, 1, 1, hour, minute)
 
 
 def parse_date(date_text: str) -> datetime:
     """
-    Парсить дату из строки формата ДД.ММ.ГГГГ
+    Парсить дату из строки
+    
+    Поддерживаются форматы ДД.ММ.ГГГГ, ДД/ММ/ГГГГ и ГГГГ-ММ-ДД (день и месяц
+    можно писать одной цифрой). Недавние строки кэшируются.
     
     Args:
         date_text: строка с датой
@@ -82,22 +360,30 @@ def parse_date(date_text: str) -> datetime:
         datetime: объект даты
         
     Raises:
-        ValueError: если формат даты неверный
+        ParseError: если дату не удалось разобрать (код причины и текст на любом языке)
     """
-    return datetime.strptime(date_text, "%d.%m.%Y")
+    result = _parse_date_cached(date_text)
+    if result.__class__ is tuple:
+        raise ParseError(*result)
+    return result
 
 
 def parse_time(time_text: str) -> datetime:
     """
-    Парсить время из строки формата ЧЧ:ММ
+    Парсить время из строки
+    
+    Поддерживаются форматы ЧЧ:ММ, Ч:ММ и ЧЧММ. Недавние строки кэшируются.
     
     Args:
         time_text: строка со временем
         
     Returns:
-        datetime: объект времени
+        datetime: объект времени (дата 01.01.1900, как у strptime)
         
     Raises:
-        ValueError: если формат времени неверный
+        ParseError: если время не удалось разобрать (код причины и текст на любом языке)
     """
-    return datetime.strptime(time_text, "%H:%M") 
\ No newline at end of file
+    result = _parse_time_cached(time_text)
+    if result.__class__ is tuple:
+        raise ParseError(*result)
+    return result
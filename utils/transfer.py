@@ -0,0 +1,417 @@
+"""
+Потоковый экспорт и импорт данных пользователей
+
+Записи идут через цепочку генераторов пачками по chunk_size, поэтому память
+не зависит от числа пользователей. Экспорт читает снимок файла SQLite через
+отдельное соединение только на чтение и не мешает работающему боту (снимок
+отстает от памяти бота не больше чем на STORAGE_FLUSH_INTERVAL). Импорт
+выполняется при остановленном боте: запущенный бот не увидит новые записи до
+перезапуска.
+
+Форматы:
+    jsonl  - по объекту на строку:
+             {"user_id": 1, "target_date": "2026-12-25T00:00", "notification_time": "09:00",
+              "timezone": "Europe/Berlin"}
+    binary - заголовок TBUSERS1, затем записи:
+             b"U" + <q user_id, i дата в минутах, h минута суток, H номер пояса>
+             b"Z" + <H номер пояса, B длина> + имя пояса (определение пояса перед первым использованием)
+
+Запуск:
+    python -m utils.transfer export users.jsonl
+    python -m utils.transfer export users.bin --offset 500000 --append   # дописать после обрыва
+    python -m utils.transfer import users.bin --chunk-size 20000
+    python -m utils.transfer import users.jsonl --offset 300000          # продолжить с записи
+"""
+import argparse
+import json
+import logging
+import struct
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+from utils.columnar_store import MAX_EPOCH_MINUTES, MIN_EPOCH_MINUTES
+from utils.storage_backends import (
+    UserRow, create_backend, datetime_to_seconds, read_snapshot, seconds_to_datetime
+)
+from utils.time_utils import get_zone
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "binary")
+DEFAULT_CHUNK_SIZE = 10000
+
+BINARY_MAGIC = b"TBUSERS1"
+_USER_RECORD = struct.Struct("<qihH")
+_ZONE_HEADER = struct.Struct("<HB")
+_NO_DATE = 2 ** 31 - 1
+_NO_NOTIFICATION = -1
+
+# Минута суток -> "ЧЧ:ММ"
+_MINUTE_TEXT = tuple(f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(1440))
+
+
+class RecordError(ValueError):
+    """Некорректная запись во входных данных"""
+
+
+# Элемент потока импорта: (номер записи, строка хранилища или ошибка этой записи)
+DecodedRecord = Tuple[int, Union[UserRow, RecordError]]
+
+
+def detect_format(path: str) -> str:
+    """Определить формат по расширению файла (.jsonl или .bin)"""
+    return "binary" if path.endswith((".bin", ".dat")) else "jsonl"
+
+
+@lru_cache(maxsize=4096)
+def _format_target(seconds: int) -> str:
+    """Дата в секундах -> строка ISO (у большинства пользователей даты совпадают)"""
+    return seconds_to_datetime(seconds).isoformat(timespec="minutes")
+
+
+@lru_cache(maxsize=4096)
+def _parse_target(text: str) -> int:
+    """Строка ISO -> дата в секундах"""
+    date = datetime.fromisoformat(text)
+    if date.tzinfo is not None:
+        raise RecordError("target_date задается местным временем без смещения")
+    return datetime_to_seconds(date)
+
+
+@lru_cache(maxsize=2048)
+def _canonical_notification(text: str) -> str:
+    """Проверить время уведомлений и привести его к виду ЧЧ:ММ"""
+    hour, separator, minute = text.partition(":")
+    if not separator or len(minute) != 2 or not (hour.isascii() and hour.isdigit() and minute.isdigit()):
+        raise RecordError(f"notification_time должно быть в формате ЧЧ:ММ: {text!r}")
+    if int(hour) > 23 or int(minute) > 59:
+        raise RecordError(f"notification_time вне диапазона: {text!r}")
+    return f"{int(hour):02d}:{minute}"
+
+
+@lru_cache(maxsize=1024)
+def _json_string(text: str) -> str:
+    """Строка в виде JSON литерала (имена поясов повторяются, поэтому кэшируется)"""
+    return json.dumps(text, ensure_ascii=False)
+
+
+@lru_cache(maxsize=1024)
+def _check_zone(name: str) -> str:
+    """Проверить имя часового пояса"""
+    try:
+        get_zone(name)
+    except ValueError as e:
+        raise RecordError(str(e))
+    return name
+
+
+def validate_row(user_id, target_seconds, notification_time, timezone_name) -> UserRow:
+    """
+    Проверить поля записи и привести их к строке хранилища
+
+    Raises:
+        RecordError: если поле некорректно
+    """
+    if not isinstance(user_id, int) or isinstance(user_id, bool) or not 0 < user_id < 2 ** 63:
+        raise RecordError(f"user_id должен быть положительным целым: {user_id!r}")
+    if target_seconds is not None:
+        if not isinstance(target_seconds, int):
+            raise RecordError(f"Некорректная дата: {target_seconds!r}")
+        # Та же граница, что у колонки дат хранилища (минуты в int32)
+        if not MIN_EPOCH_MINUTES <= target_seconds // 60 <= MAX_EPOCH_MINUTES:
+            raise RecordError(f"Дата вне допустимого диапазона: {target_seconds!r}")
+    if notification_time is not None:
+        if notification_time.__class__ is not str:
+            raise RecordError(f"notification_time должно быть строкой: {notification_time!r}")
+        notification_time = _canonical_notification(notification_time)
+    if timezone_name is not None:
+        if timezone_name.__class__ is not str:
+            raise RecordError(f"timezone должно быть строкой: {timezone_name!r}")
+        _check_zone(timezone_name)
+    if target_seconds is None and notification_time is None and timezone_name is None:
+        raise RecordError(f"У пользователя {user_id} нет ни одного поля")
+    return user_id, target_seconds, notification_time, timezone_name
+
+
+# --- JSONL ---
+
+def encode_jsonl(rows: Iterable[UserRow]) -> Iterator[str]:
+    """Строки хранилища -> строки JSONL"""
+    # Строка собирается напрямую: json.dumps на каждую запись в несколько раз медленнее
+    for user_id, target_seconds, notification_time, timezone_name in rows:
+        line = f'{{"user_id": {int(user_id)}'
+        if target_seconds is not None:
+            line += f', "target_date": "{_format_target(target_seconds)}"'
+        if notification_time is not None:
+            line += f', "notification_time": {_json_string(notification_time)}'
+        if timezone_name is not None:
+            line += f', "timezone": {_json_string(timezone_name)}'
+        yield line + "}\n"
+
+
+def decode_jsonl(lines: Iterable[str]) -> Iterator[DecodedRecord]:
+    """
+    Строки JSONL -> (номер строки, строка хранилища или RecordError)
+
+    Ошибка отдельной строки не обрывает поток: она передается дальше вместо
+    строки хранилища, а решение (пропустить или прерваться) принимает импорт.
+    """
+    # raw_decode без обертки json.loads: заметно быстрее на миллионах коротких строк
+    decode = json.JSONDecoder().raw_decode
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = decode(line.lstrip())[0]
+            if record.__class__ is not dict:
+                raise RecordError("ожидается JSON объект")
+            target = record.get("target_date")
+            row = validate_row(
+                record.get("user_id"),
+                _parse_target(target) if target is not None else None,
+                record.get("notification_time"),
+                record.get("timezone"),
+            )
+        except (ValueError, TypeError) as e:
+            yield line_number, RecordError(f"строка {line_number}: {e}")
+            continue
+        yield line_number, row
+
+
+# --- Бинарный формат ---
+
+def encode_binary(rows: Iterable[UserRow], write_header: bool = True) -> Iterator[bytes]:
+    """Строки хранилища -> записи бинарного формата"""
+    if write_header:
+        yield BINARY_MAGIC
+    zones: Dict[str, int] = {}
+    pack = _USER_RECORD.pack
+    for user_id, target_seconds, notification_time, timezone_name in rows:
+        zone_number = 0
+        if timezone_name is not None:
+            zone_number = zones.get(timezone_name, 0)
+            if not zone_number:
+                zone_number = zones[timezone_name] = len(zones) + 1
+                name = timezone_name.encode()
+                yield b"Z" + _ZONE_HEADER.pack(zone_number, len(name)) + name
+        yield b"U" + pack(
+            user_id,
+            target_seconds // 60 if target_seconds is not None else _NO_DATE,
+            int(notification_time[:2]) * 60 + int(notification_time[3:]) if notification_time else _NO_NOTIFICATION,
+            zone_number,
+        )
+
+
+def decode_binary(stream: BinaryIO) -> Iterator[DecodedRecord]:
+    """
+    Записи бинарного формата -> (номер записи, строка хранилища или RecordError)
+
+    Raises:
+        RecordError: если нарушена структура файла (дальше читать нельзя)
+    """
+    if stream.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise RecordError("Неизвестный формат файла (нет заголовка TBUSERS1)")
+
+    zones: Dict[int, str] = {}
+    unpack = _USER_RECORD.unpack
+    size = _USER_RECORD.size
+    record_number = 0
+    while True:
+        tag = stream.read(1)
+        if not tag:
+            return
+        if tag == b"Z":
+            header = stream.read(_ZONE_HEADER.size)
+            if len(header) != _ZONE_HEADER.size:
+                raise RecordError("Файл обрывается на определении пояса")
+            zone_number, length = _ZONE_HEADER.unpack(header)
+            name = stream.read(length).decode("utf-8", errors="replace")
+            zones[zone_number] = _check_zone(name)
+            continue
+        if tag != b"U":
+            raise RecordError(f"Неизвестный тип записи {tag!r} после записи {record_number}")
+
+        data = stream.read(size)
+        if len(data) != size:
+            raise RecordError(f"Файл обрывается на записи {record_number + 1}")
+        record_number += 1
+        user_id, epoch_minutes, minute_of_day, zone_number = unpack(data)
+        # Поля уже числовые, поэтому проверяются диапазоны, а не разбор строк
+        if user_id <= 0:
+            yield record_number, RecordError(f"запись {record_number}: user_id должен быть положительным: {user_id}")
+        elif zone_number and zone_number not in zones:
+            yield record_number, RecordError(f"запись {record_number}: пояс {zone_number} не определен")
+        elif minute_of_day != _NO_NOTIFICATION and not 0 <= minute_of_day < 1440:
+            yield record_number, RecordError(f"запись {record_number}: минута суток вне диапазона: {minute_of_day}")
+        elif epoch_minutes == _NO_DATE and minute_of_day == _NO_NOTIFICATION and not zone_number:
+            yield record_number, RecordError(f"запись {record_number}: у пользователя {user_id} нет ни одного поля")
+        else:
+            yield record_number, (
+                user_id,
+                epoch_minutes * 60 if epoch_minutes != _NO_DATE else None,
+                _MINUTE_TEXT[minute_of_day] if minute_of_day != _NO_NOTIFICATION else None,
+                zones[zone_number] if zone_number else None,
+            )
+
+
+# --- Экспорт и импорт ---
+
+def _chunks(items: Iterable, chunk_size: int) -> Iterator[list]:
+    """Разбить поток на пачки"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Counter:
+    """Обертка над потоком, считающая прошедшие элементы"""
+
+    def __init__(self, items: Iterable):
+        self.items = iter(items)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self.items)
+        self.count += 1
+        return item
+
+
+def export_users(rows: Iterable[UserRow], output, fmt: str = "jsonl",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, write_header: bool = True) -> int:
+    """
+    Выгрузить строки хранилища в файл пачками
+
+    Args:
+        rows: поток строк хранилища
+        output: текстовый (jsonl) или бинарный (binary) файл
+        fmt: формат (jsonl или binary)
+        chunk_size: сколько записей писать за одну операцию
+        write_header: писать ли заголовок бинарного формата (нет при дозаписи)
+
+    Returns:
+        int: количество выгруженных пользователей
+    """
+    counted = _Counter(rows)
+    encoded = encode_jsonl(counted) if fmt == "jsonl" else encode_binary(counted, write_header)
+    for chunk in _chunks(encoded, chunk_size):
+        output.writelines(chunk)
+        output.flush()
+        logger.info(f"Выгружено записей: {counted.count}")
+    return counted.count
+
+
+def import_users(records: Iterable[DecodedRecord], backend, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 offset: int = 0, strict: bool = False) -> Tuple[int, int]:
+    """
+    Загрузить записи в бэкенд пачками (каждая пачка - одна транзакция)
+
+    После каждой пачки в лог пишется позиция во входных данных: при обрыве
+    импорт продолжается с нее через offset.
+
+    Args:
+        records: поток (номер записи, строка хранилища) из decode_jsonl/decode_binary
+        backend: бэкенд хранения
+        chunk_size: размер пачки
+        offset: сколько первых записей входных данных пропустить
+        strict: прерваться на первой некорректной записи (иначе запись пропускается)
+
+    Returns:
+        Tuple[int, int]: (загружено, отклонено)
+    """
+    imported = rejected = 0
+    chunk: List[UserRow] = []
+    for position, row in records:
+        if position <= offset:
+            continue
+        if isinstance(row, RecordError):
+            if strict:
+                raise row
+            rejected += 1
+            logger.warning(f"Пропущена некорректная запись: {row}")
+            continue
+
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            backend.write_batch(chunk, [])
+            imported += len(chunk)
+            chunk = []
+            logger.info(f"Загружено записей: {imported}, позиция во входных данных: {position}")
+
+    if chunk:
+        backend.write_batch(chunk, [])
+        imported += len(chunk)
+    return imported, rejected
+
+
+def main() -> None:
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Экспорт и импорт данных пользователей")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("export", "выгрузить пользователей в файл"), ("import", "загрузить пользователей из файла")):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument("file", help="путь к файлу (- для stdin/stdout)")
+        command.add_argument("--format", choices=FORMATS, help="формат (по умолчанию по расширению: .bin - binary)")
+        command.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="размер пачки")
+        command.add_argument("--offset", type=int, default=0, help="пропустить первые N записей")
+        command.add_argument("--storage-path", help="файл данных бота (по умолчанию STORAGE_PATH)")
+    subparsers.choices["export"].add_argument("--append", action="store_true", help="дописать в конец файла")
+    subparsers.choices["import"].add_argument("--strict", action="store_true",
+                                              help="прерваться на первой некорректной записи")
+    args = parser.parse_args()
+
+    storage_path = args.storage_path
+    if storage_path is None:
+        from config import STORAGE_PATH
+        storage_path = STORAGE_PATH
+    fmt = args.format or detect_format(args.file)
+    started = time.perf_counter()
+
+    if args.command == "export":
+        mode = ("a" if args.append else "w") + ("b" if fmt == "binary" else "")
+        if args.file == "-":
+            output = sys.stdout.buffer if fmt == "binary" else sys.stdout
+        else:
+            output = open(args.file, mode, **({} if fmt == "binary" else {"encoding": "utf-8"}))
+        try:
+            write_header = not (args.append and output.tell() > 0)
+            exported = export_users(read_snapshot(storage_path, args.offset), output, fmt,
+                                    args.chunk_size, write_header)
+        finally:
+            if output not in (sys.stdout, sys.stdout.buffer):
+                output.close()
+        logger.info(f"Экспорт завершен: {exported} пользователей за {time.perf_counter() - started:.1f} с")
+        return
+
+    if args.file == "-":
+        source = sys.stdin.buffer if fmt == "binary" else sys.stdin
+    else:
+        source = open(args.file, "rb" if fmt == "binary" else "r", **({} if fmt == "binary" else {"encoding": "utf-8"}))
+    backend = create_backend("sqlite", storage_path)
+    try:
+        records = decode_binary(source) if fmt == "binary" else decode_jsonl(source)
+        imported, rejected = import_users(records, backend, args.chunk_size, args.offset, args.strict)
+    except RecordError as e:
+        logger.error(f"Импорт прерван: {e}")
+        sys.exit(1)
+    finally:
+        backend.close()
+        if source not in (sys.stdin, sys.stdin.buffer):
+            source.close()
+    logger.info(f"Импорт завершен: загружено {imported}, отклонено {rejected} "
+                f"за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()